@@ -18,7 +18,7 @@ setuptools.setup(
     version="0.0.1",
     entry_points={
         'console_scripts': [
-            'play = mod_or_die.levels.level_01:main',
+            'play = mod_or_die.run:main',
         ]
     },
     package_dir={'': 'src'},
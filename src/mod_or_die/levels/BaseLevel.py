@@ -1,7 +1,20 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import Dict, Union
 import os
 import arcade
+import numpy as np
+import pyglet
+from ..tools import assets, level_format
+from ..tools.audio import Mixer
+from ..tools.chunks import ChunkManager
+from ..tools.culling import ViewCuller
+from ..tools.geometry import compile_collision
+from ..tools.layers import BakedLayer
+from ..tools.physics import GridPhysicsEngine
+from ..tools.pool import SpritePool
+from ..tools.preload import PreloadError, Preloader
+from ..tools.snapshot import LevelSnapshot
+from ..tools.telemetry import FrameTelemetry
 
 
 class Conf:
@@ -15,6 +28,15 @@ class Conf:
         self.SPRITE_RESOURCES = os.path.abspath(self.FILE_ROOT + "/../resources/arcade/character_sprites/")
         self.AUDIO_RESOURCES = os.path.abspath(self.FILE_ROOT + "/../resources/audio/")
         self.TILE_RESOURCES = os.path.abspath(self.FILE_ROOT + "/../resources/arcade/tiles/")
+        # Item, enemy and projectile images, such as coin_01 and laserBlue01
+        self.ARCADE_RESOURCES = os.path.abspath(self.FILE_ROOT + "/../resources/arcade/")
+        # Built by tools.atlas, loose files are used when it is missing
+        self.ATLAS_RESOURCES = os.path.abspath(self.FILE_ROOT + "/../resources/arcade/atlas/")
+        # Hit boxes trimmed to the opaque pixels, cached on disk by tools.hitbox.
+        # Off by default: untrimmed sprites collide with their whole image.
+        # Levels only read the cache, images missing from it are scanned in memory.
+        self.HIT_BOX_CACHE = os.path.abspath(self.FILE_ROOT + "/../resources/arcade/hitboxes.json")
+        self.TRIM_HIT_BOXES = False
 
         # How many pixels to keep as a minimum margin between the character
         # and the edge of the screen.
@@ -23,6 +45,33 @@ class Conf:
         self.BOTTOM_VIEWPORT_MARGIN = 150
         self.TOP_VIEWPORT_MARGIN = 100
 
+        # Sprites further than this outside the viewport are not drawn
+        self.CULL_MARGIN = 4 * self.TILE_RADIUS
+        # Size of the world grid baked layers are cut along, see tools.layers
+        self.BAKE_CELL = 2048
+
+        # Streaming: width of a level chunk, how many chunks either side of
+        # the player are loaded and how far away they get evicted
+        self.CHUNK_WIDTH = 32 * self.TILE_RADIUS
+        self.CHUNK_RADIUS = 1
+        self.CHUNK_EVICT_RADIUS = 2
+
+        # Sounds playing at once, and copies of the same sound at once
+        self.AUDIO_VOICES = 8
+        self.AUDIO_SOUND_LIMIT = 2
+
+        # Sprites a spawn pool starts with, and what spawn() does once they
+        # are all out: "grow", "drop" or "recycle", see tools.pool
+        self.POOL_CAPACITY = 32
+        self.POOL_FULL = "grow"
+
+        # Frame-time instrumentation: frames kept, the key that toggles the
+        # overlay and the key that writes the frames to TELEMETRY_EXPORT
+        self.TELEMETRY_FRAMES = 600
+        self.TELEMETRY_KEY = arcade.key.F3
+        self.TELEMETRY_EXPORT_KEY = arcade.key.F4
+        self.TELEMETRY_EXPORT = "telemetry.jsonl"
+
         self.PLAYER_START_X, self.PLAYER_START_Y = (200, 200)
 
 
@@ -40,10 +89,28 @@ class BaseLevel(arcade.Window, metaclass=MetaLevel):
 
     Provides functions for drawing the ground and base functions to override.
     """
-
-    def __init__(self, title: str="LEVEL", gravity: float=1.0, speed: float=20.0, map: Dict[int, Dict]=None):
+    # Tiles and sounds setup() loads, so tools.preload can fetch them early.
+    # Levels that draw or play more extend these.
+    map_tiles = ("grassLeft", "grassMid", "grassRight")
+    sounds = ("jump1", "gameover2")
+    # Asset lists drawn from baked textures: "static" ones never move,
+    # "rigid" ones only move as a whole, see tools.layers
+    baked_layers = {"block": "static"}
+    # Sprites spawned while the level runs, pool name -> (asset list, image
+    # under ARCADE_RESOURCES[, capacity]), e.g. {"coin": ("objects", "coin_01", 64)}
+    pooled = {}
+
+    def __init__(self, title: str="LEVEL", gravity: float=1.0, speed: float=20.0, map: Union[str, Dict]=None,
+                 headless: bool=False):
         self.conf = Conf()
-        super().__init__(self.conf.SCREEN_WIDTH, self.conf.SCREEN_HEIGHT, title)
+        assets.use_atlas(self.conf.ATLAS_RESOURCES)
+        if self.conf.TRIM_HIT_BOXES:
+            assets.use_hit_boxes(self.conf.HIT_BOX_CACHE)
+
+        # Headless levels never open a window or touch GL, see tools.headless
+        self.headless = headless
+        if not headless:
+            super().__init__(self.conf.SCREEN_WIDTH, self.conf.SCREEN_HEIGHT, title)
 
         self.assets = {
             "statics": None,
@@ -52,18 +119,44 @@ class BaseLevel(arcade.Window, metaclass=MetaLevel):
             "enemy": None,
             "player": None,
         }
+        # Lists whose sprites never move, skipped by the respawn snapshot
+        self.static_assets = {"statics", "block"}
+        self.snapshot = None
+
+        # Animated tile groups stepped once per update, see tools.animation
+        self.animations = []
+        # Spawn pools by name and the asset list each one fills, see spawn()
+        self.pools: Dict[str, SpritePool] = {}
+        self.pool_lists: Dict[str, str] = {}
+        self.culler = None
+        self.chunks = None
+        self.layers = {}
+        # Set while preload() is loading assets in the background
+        self.preloader = None
+        # Frame timings, only recorded once enable_telemetry() was called
+        self.telemetry = None
+        self.show_telemetry = False
+        self._telemetry_lines = []
+        # Key events are logged here when set, see tools.replay
+        self.recorder = None
 
         self.player = None
 
         self.is_game_over = False
-        self.jump_sound = None
+        # Sounds in self.sounds, played by name, see tools.audio
+        self.mixer = Mixer(self.conf.AUDIO_VOICES, limit=self.conf.AUDIO_SOUND_LIMIT, muted=headless)
 
-        # Our physics engine
+        # Level map, see tools.level_format, and its named objects once loaded
         self.map = map
+        self.map_objects = {}
+
+        # Our physics engine
         self.gravity = gravity
         self.speed = speed
         self.jump_speed = speed * 2
         self.physics_engine = None
+        # Merged collision rectangles built from assets["block"] at load
+        self.collision_list = None
 
         # Used to keep track of our scrolling
         self.view_bottom = 0
@@ -72,71 +165,235 @@ class BaseLevel(arcade.Window, metaclass=MetaLevel):
         # Keep track of the score
         self.score = 0
 
-        arcade.set_background_color(arcade.color.SKY_BLUE)
+        if not headless:
+            arcade.set_background_color(arcade.color.SKY_BLUE)
 
     def setup(self):
+        if self.preloader is not None:
+            preloader, self.preloader = self.preloader, None
+            preloader.check()
+
         for k in self.assets.keys():
             self.assets[k] = arcade.SpriteList()
+        self.animations = []
+        self.chunks = ChunkManager(self, self.conf.CHUNK_WIDTH,
+                                   radius=self.conf.CHUNK_RADIUS,
+                                   evict_radius=self.conf.CHUNK_EVICT_RADIUS)
 
         self.player = Player()
         self.player.center_x, self.player.center_y = (self.conf.PLAYER_START_X, self.conf.PLAYER_START_Y)
         self.player.texture = self.a_tex("character0")
+        if self.conf.TRIM_HIT_BOXES:
+            self.player.set_points(assets.hit_box(self.conf.SPRITE_RESOURCES + "/character0.png"))
 
-        self.jump_sound = self.audio("jump1")
+        for name in self.sounds:
+            if name not in self.mixer:
+                self.mixer.add(name, self.audio(name))
 
         self.assets["player"].append(self.player)
 
+        # Pools outlive setup(), their sprites only move to the new lists
+        for name, pool in self.pools.items():
+            pool.attach(self.assets[self.pool_lists[name]])
+        for name, spec in self.pooled.items():
+            if name not in self.pools:
+                list_name, image = spec[:2]
+                self.add_pool(name, list_name, lambda image=image: self.sprite(self.conf.ARCADE_RESOURCES, image),
+                              *spec[2:])
+
         if self.map:
             self._init_map()
         else:
             self.draw_map()
 
-        self.physics_engine = arcade.PhysicsEnginePlatformer(self.player,
-                                                             self.assets["block"],
-                                                             self.gravity)
+        self.collision_list = compile_collision(self.assets["block"])
+        self.physics_engine = GridPhysicsEngine(self.player,
+                                                self.collision_list,
+                                                self.gravity,
+                                                cell_size=2 * self.conf.TILE_RADIUS)
+
+        self.snapshot = LevelSnapshot(self)
+
+        # Baking needs no GL but only pays off when something is drawn
+        self.layers = {}
+        if not self.headless:
+            for name, mode in self.baked_layers.items():
+                if self.assets.get(name) is not None:
+                    self.layers[name] = BakedLayer(self.assets[name], mode, self.conf.BAKE_CELL)
+
+        self.culler = ViewCuller(self.conf.CULL_MARGIN)
+        for name in self.static_assets:
+            if name not in self.layers and not any(s.change_x or s.change_y for s in self.assets[name]):
+                self.culler.add(self.assets[name])
+        for group in self.animations:
+            layer = next((layer for layer in self.layers.values() if layer.sprite_list is group.sprite_list), None)
+            if layer is not None:
+                group.bake(layer)
+            else:
+                group.views.append(self.culler.add(group.sprite_list, bounds=group.bounds))
+        self.update_culling()
+        self.chunks.update(self.player.center_x)
+
+    def preload_assets(self):
+        """ (texture paths, sound paths) that setup() is going to load. """
+        textures = [self.conf.SPRITE_RESOURCES + "/character0.png"]
+        if self.map:
+            level_map = level_format.load(self.map, tile_size=2 * self.conf.TILE_RADIUS)
+            tiles = list(level_map.tiles) + [obj["tile"] for obj in level_map.objects]
+        else:
+            tiles = list(self.map_tiles)
+        textures += [self.conf.TILE_RESOURCES + '/' + name + ".png" for name in tiles]
+        textures += [self.conf.ARCADE_RESOURCES + '/' + spec[1] + ".png" for spec in self.pooled.values()]
+        sounds = [self.conf.AUDIO_RESOURCES + '/' + name + ".wav" for name in self.sounds]
+        return textures, sounds
+
+    def preload(self, workers: int = 4) -> Preloader:
+        """
+        Start loading the level's assets in the background.
+
+        A window shows a loading screen and calls setup() by itself once
+        everything is in. Headless levels can call setup() right away, it only
+        waits for the assets it needs that are not decoded yet.
+        """
+        self.preloader = Preloader(*self.preload_assets(), workers=workers).start()
+        if not self.headless:
+            pyglet.clock.unschedule(self.update)
+            pyglet.clock.schedule_interval(self._load_step, 1 / 60)
+        return self.preloader
+
+    def _load_step(self, delta_time):
+        try:
+            if self.preloader.poll() < 1.0:
+                return
+        except PreloadError:
+            # Leave it on the preloader, setup() raises it
+            pass
+        pyglet.clock.unschedule(self._load_step)
+        self.setup()
+        pyglet.clock.schedule_interval(self.update, 1 / 60)
+
+    def draw_loading(self):
+        """ Progress bar shown while preload() runs. """
+        arcade.start_render()
+        width, height = self.get_size()
+        progress = self.preloader.progress
+        left, bottom = self.view_left + width * .25, self.view_bottom + height * .5
+        arcade.draw_lrtb_rectangle_outline(left, left + width * .5, bottom + 20, bottom - 20,
+                                           arcade.csscolor.WHITE, 2)
+        arcade.draw_lrtb_rectangle_filled(left, left + width * .5 * progress, bottom + 20, bottom - 20,
+                                          arcade.csscolor.WHITE)
+        arcade.draw_text(f"Loading {progress:.0%}", left, bottom + 40, arcade.csscolor.WHITE, 18)
+
+    def enable_telemetry(self, frames: int = None) -> FrameTelemetry:
+        """ Start timing the phases of every frame, see tools.telemetry. """
+        if self.telemetry is None:
+            self.telemetry = FrameTelemetry(frames or self.conf.TELEMETRY_FRAMES)
+        return self.telemetry
+
+    def add_pool(self, name: str, list_name: str, factory, capacity: int = None, full: str = None) -> SpritePool:
+        """ Preallocate sprites made by factory in assets[list_name], handed out by spawn(name, ...). """
+        pool = SpritePool(factory, self.assets[list_name], capacity or self.conf.POOL_CAPACITY,
+                          full or self.conf.POOL_FULL)
+        self.pools[name] = pool
+        self.pool_lists[name] = list_name
+        return pool
+
+    def spawn(self, name: str, x: float, y: float, **attributes) -> Union[arcade.Sprite, None]:
+        """ A sprite from pool name at (x, y), None if the pool is full and drops spawns. """
+        return self.pools[name].spawn(x, y, **attributes)
+
+    def despawn(self, sprite: arcade.Sprite):
+        """ Hand a spawned sprite back to its pool. """
+        for pool in self.pools.values():
+            if pool.owns(sprite):
+                pool.release(sprite)
+                return
+        raise ValueError("sprite was not spawned from a pool of this level")
+
+    def sprite_counts(self) -> Dict[str, int]:
+        return {k: len(v) for k, v in self.assets.items() if v is not None}
+
+    def draw_telemetry(self):
+        """ Frame time percentiles and sprite counts in the top left corner. """
+        # Refreshed twice a second, so draw_text keeps hitting its label cache
+        if self.telemetry.frames % 30 == 0 or not self._telemetry_lines:
+            self._telemetry_lines = self.telemetry.overlay_lines(self.sprite_counts())
+            for name, pool in self.pools.items():
+                self._telemetry_lines.append(f"pool {name:<5} {pool.active}/{pool.capacity} "
+                                             f"peak {pool.high_water} grown {pool.grown} dropped {pool.dropped}")
+        top = self.view_bottom + self.get_size()[1] - 20
+        for i, line in enumerate(self._telemetry_lines):
+            arcade.draw_text(line, self.view_left + 10, top - 16 * i, arcade.csscolor.WHITE, 11)
 
     @abstractmethod
     def draw_map(self):
-        wall = self.tile_sprite("grassLeft")
-        wall.center_x = 0
-        wall.center_y = self.conf.TILE_RADIUS
-        self.assets["block"].append(wall)
+        self.place_tile("block", "grassLeft", 0, self.conf.TILE_RADIUS)
         for x in range(2 * self.conf.TILE_RADIUS, 100 * 2 * self.conf.TILE_RADIUS, 2 * self.conf.TILE_RADIUS):
-            wall = self.tile_sprite("grassMid")
-            wall.center_x = x
-            wall.center_y = self.conf.TILE_RADIUS
-            self.assets["block"].append(wall)
-        wall = self.tile_sprite("grassRight")
-        wall.center_x = 100 * 2 * self.conf.TILE_RADIUS
-        wall.center_y = self.conf.TILE_RADIUS
-        self.assets["block"].append(wall)
+            self.place_tile("block", "grassMid", x, self.conf.TILE_RADIUS)
+        self.place_tile("block", "grassRight", 100 * 2 * self.conf.TILE_RADIUS, self.conf.TILE_RADIUS)
+
+    def _init_map(self):
+        """ Load self.map: grid tiles are streamed in chunks, objects are created now. """
+        level_map = level_format.load(self.map, tile_size=2 * self.conf.TILE_RADIUS)
+        for name in level_map.lists:
+            if self.assets.get(name) is None:
+                self.assets[name] = arcade.SpriteList()
+        self.chunks.add_records(level_map.records, level_map.tiles, level_map.lists)
+
+        self.map_objects = {}
+        for obj in level_map.objects:
+            sprite = self.tile_sprite(obj["tile"])
+            sprite.center_x = obj["x"]
+            sprite.center_y = obj["y"]
+            list_name = obj.get("list", "statics")
+            if self.assets.get(list_name) is None:
+                self.assets[list_name] = arcade.SpriteList()
+            self.assets[list_name].append(sprite)
+            if "name" in obj:
+                self.map_objects[obj["name"]] = sprite
+
+    def place_tile(self, list_name, name, x, y):
+        """ Add a static tile that is streamed in with its chunk instead of created now. """
+        self.chunks.place(list_name, name, x, y)
 
     @staticmethod
-    def sprite(path, name):
-        return arcade.Sprite(path + '/' + name + ".png")
+    def sprite(path, name, scale: float=1, mirrored: bool=False, trim: bool=False):
+        return assets.sprite(path + '/' + name + ".png", scale=scale, mirrored=mirrored, trim=trim)
 
     def audio(self, name):
-        return arcade.load_sound(self.conf.AUDIO_RESOURCES + '/' + name + ".wav")
+        return assets.load_sound(self.conf.AUDIO_RESOURCES + '/' + name + ".wav")
 
     def a_sprite(self, name):
-        return self.sprite(self.conf.SPRITE_RESOURCES, name)
+        return self.sprite(self.conf.SPRITE_RESOURCES, name, trim=self.conf.TRIM_HIT_BOXES)
 
-    def a_tex(self, name):
-        return arcade.load_texture(self.conf.SPRITE_RESOURCES + '/' + name + ".png")
+    def a_tex(self, name, mirrored: bool=False):
+        return assets.load_texture(self.conf.SPRITE_RESOURCES + '/' + name + ".png", mirrored=mirrored)
 
     def tile_sprite(self, name):
-        return self.sprite(self.conf.TILE_RESOURCES, name)
+        return self.sprite(self.conf.TILE_RESOURCES, name, trim=self.conf.TRIM_HIT_BOXES)
 
     @abstractmethod
     def on_draw(self):
         """ Render the screen. """
 
+        if self.preloader is not None:
+            self.draw_loading()
+            return
+
+        telemetry = self.telemetry
+        if telemetry is not None:
+            telemetry.mark()
+
         # Clear the screen to the background color
         arcade.start_render()
 
-        # Draw our sprites
+        # Draw our sprites, only the ones near the viewport for culled lists
         for k in self.assets.keys():
-            self.assets[k].draw()
+            layer = self.layers.get(k)
+            if layer is not None and layer.sprite_list is self.assets[k]:
+                layer.draw(self.culler.view)
+            else:
+                self.culler.visible(self.assets[k]).draw()
 
         # Draw our score on the screen, scrolling it with the viewport
         score_text = f"Score: {self.score}"
@@ -147,13 +404,28 @@ class BaseLevel(arcade.Window, metaclass=MetaLevel):
             arcade.csscolor.WHITE, 18
         )
 
+        if telemetry is not None:
+            telemetry.lap("draw")
+            if self.show_telemetry:
+                self.draw_telemetry()
+
     def on_key_press(self, key, modifiers):
         """Called whenever a key is pressed. """
+        if key == self.conf.TELEMETRY_KEY:
+            self.enable_telemetry()
+            self.show_telemetry = not self.show_telemetry
+        elif key == self.conf.TELEMETRY_EXPORT_KEY and self.telemetry is not None:
+            self.telemetry.export(self.conf.TELEMETRY_EXPORT)
+
+        if self.physics_engine is None:
+            return
+        if self.recorder is not None:
+            self.recorder.record("press", key)
 
         if key == arcade.key.UP or key == arcade.key.W:
             if self.physics_engine.can_jump():
                 self.player.change_y = self.jump_speed
-                arcade.play_sound(self.jump_sound)
+                self.mixer.play("jump1")
         elif key == arcade.key.LEFT or key == arcade.key.A:
             self.player.change_x = -self.speed
         elif key == arcade.key.RIGHT or key == arcade.key.D:
@@ -161,6 +433,10 @@ class BaseLevel(arcade.Window, metaclass=MetaLevel):
 
     def on_key_release(self, key, modifiers):
         """Called when the user releases a key. """
+        if self.player is None:
+            return
+        if self.recorder is not None:
+            self.recorder.record("release", key)
 
         if key == arcade.key.LEFT or key == arcade.key.A:
             self.player.change_x = 0
@@ -171,12 +447,27 @@ class BaseLevel(arcade.Window, metaclass=MetaLevel):
     def update(self, delta_time):
         """ Movement and game logic """
 
+        if self.recorder is not None:
+            self.recorder.tick()
+        telemetry = self.telemetry
+        if telemetry is not None:
+            telemetry.begin(self.sprite_counts())
+
         # Call update on all sprites (The sprites don't do much in this
         # example though.)
         self.physics_engine.update()
+        if telemetry is not None:
+            telemetry.lap("physics")
 
         self.assets["player"].update()
         self.assets["player"].update_animation()
+        if telemetry is not None:
+            telemetry.lap("sprites")
+
+        for group in self.animations:
+            group.step()
+        if telemetry is not None:
+            telemetry.lap("animation")
 
         # --- Manage Scrolling ---
 
@@ -218,24 +509,62 @@ class BaseLevel(arcade.Window, metaclass=MetaLevel):
             changed = True
 
         if changed:
-            # Only scroll to integers. Otherwise we end up with pixels that
-            # don't line up on the screen
-            self.view_bottom = int(self.view_bottom)
-            self.view_left = int(self.view_left)
+            self.set_view(self.view_left, self.view_bottom)
+
+        self.update_culling()
+        self.chunks.update(self.player.center_x)
+        if telemetry is not None:
+            telemetry.lap("scrolling")
+
+    def observe(self) -> np.ndarray:
+        """ Player position, velocity and footing as numbers, for tools.environment. """
+        player = self.player
+        return np.array([player.center_x, player.center_y, player.change_x, player.change_y,
+                         self.physics_engine.on_ground()], dtype=np.float32)
 
-            # Do the scrolling
+    def set_view(self, left, bottom):
+        """ Scroll the viewport so its lower left corner is at (left, bottom). """
+
+        # Only scroll to integers. Otherwise we end up with pixels that
+        # don't line up on the screen
+        self.view_bottom = int(bottom)
+        self.view_left = int(left)
+
+        # Do the scrolling
+        if not self.headless:
             arcade.set_viewport(self.view_left,
                                 self.conf.SCREEN_WIDTH + self.view_left,
                                 self.view_bottom,
                                 self.conf.SCREEN_HEIGHT + self.view_bottom)
+        self.update_culling()
+
+    def refresh_layer(self, name: str):
+        """ Tell the culler and the baked layers that sprites were added to or removed from a list. """
+        if self.culler is not None:
+            self.culler.refresh(self.assets[name])
+        if name in self.layers:
+            self.layers[name].dirty = True
+
+    def update_culling(self):
+        """ Refresh which sprites of the culled lists are near the viewport. """
+        if self.culler is not None:
+            self.culler.update(self.view_left, self.view_bottom,
+                               self.conf.SCREEN_WIDTH, self.conf.SCREEN_HEIGHT)
 
     def game_over(self):
         # self.physics_engine = None
-        self.audio("gameover2")
-        self.setup()
+        self.mixer.play("gameover2")
+        if self.snapshot is not None and self.snapshot.matches(self):
+            self.snapshot.restore(self)
+            self.chunks.update(self.player.center_x)
+        else:
+            self.setup()
 
     @abstractmethod
     def win(self):
         self.is_game_over = True
+        self.animations = []
+        for pool in self.pools.values():
+            pool.release_all()
         for k in self.assets.keys():
             self.assets[k] = arcade.SpriteList()
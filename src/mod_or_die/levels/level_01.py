@@ -1,11 +1,18 @@
+import sys
 import arcade
+import numpy as np
 from .BaseLevel import BaseLevel
-from ..tools.funcs import scale_generator
+from ..tools.animation import WaveGroup
 
 
 class L1(BaseLevel):
-    def __init__(self, speed, title):
-        super().__init__(speed=speed, title=title)
+    map_tiles = BaseLevel.map_tiles + ("waterTop_low", "water", "signExit")
+    sounds = BaseLevel.sounds + ("gameover1",)
+    # The water only rises and sways as a whole
+    baked_layers = dict(BaseLevel.baked_layers, water="rigid")
+
+    def __init__(self, speed, title, **kwargs):
+        super().__init__(speed=speed, title=title, **kwargs)
         self.water_list = None
         self.exit = None
 
@@ -16,16 +23,16 @@ class L1(BaseLevel):
             wall = self.tile_sprite("waterTop_low")
             wall.center_y = 0
             wall.center_x = x
-            wall.start_x = x
-            wall.waves = scale_generator(x=0, offset=0, step=0.02)
             self.assets["water"].append(wall)
             for y in range(2 * self.conf.TILE_RADIUS, 6 * self.conf.TILE_RADIUS, 2 * self.conf.TILE_RADIUS):
                 wall = self.tile_sprite('water')
                 wall.center_y = -y
                 wall.center_x = x
-                wall.start_x = x
-                wall.waves = scale_generator(x=0, offset=0, step=0.02)
                 self.assets["water"].append(wall)
+        self.water_list = WaveGroup(self.assets["water"], phase=0, offset=0, step=0.02,
+                                    amplitude=self.conf.TILE_RADIUS, rise=0.18)
+        self.animations.append(self.water_list)
+
         door = self.tile_sprite('signExit')
         door.center_x = 100 * self.conf.TILE_RADIUS
         # door.center_x = 10 * self.conf.TILE_RADIUS
@@ -38,16 +45,16 @@ class L1(BaseLevel):
         if self.is_game_over:
             return
 
-        for water in self.assets["water"]:
-            water.center_x = water.start_x + next(water.waves) * self.conf.TILE_RADIUS
-            water.center_y += 0.18
-
-        if self.player.top < self.assets["water"].__getitem__(0).top:
+        if self.player.top < self.water_list.top(0):
             self.game_over()
 
         if self.player.center_x > self.exit.center_x:
             self.win()
 
+    def observe(self):
+        """ Adds the water line and the exit to what BaseLevel observes. """
+        return np.append(super().observe(), np.float32([self.water_list.top(0), self.exit.center_x]))
+
     def on_draw(self):
         super().on_draw()
         if self.is_game_over:
@@ -60,16 +67,15 @@ class L1(BaseLevel):
 
     def win(self):
         super().win()
-        self.audio("gameover1")
+        self.mixer.play("gameover1")
         self.score = 1000
 
 
 def main():
-    """ Main method """
-    window = L1(speed=5.0, title="LEVEL 1: RUN")
-    window.setup()
-    arcade.run()
+    """ Play level 1 through the launcher, which also handles --record and --reload. """
+    from .. import run
+    return run.main(["level_01"] + sys.argv[1:])
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
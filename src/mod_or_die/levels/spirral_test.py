@@ -1,42 +1,67 @@
 import arcade
-from src.tools.funcs import rand_range, scale_generator
+from ..tools.entities import EntityStore
+from ..tools.funcs import rand_range
+from ..tools.motion import rotation, sine
 import math
+import os
 from random import random
 
 SCREEN_WIDTH = 1280
 SCREEN_HEIGHT = 1280
 SCREEN_TITLE = "Spiral animation using sprite scaling"
 
+# Radians per second the stars pulse and the spiral turns
+PULSE_RATE = .01 * 60
+SPIN_RATE = math.radians(.1) * 60
+
+FILE_ROOT = os.path.dirname(__file__)
+STAR_IMAGE = os.path.abspath(FILE_ROOT + "/../resources/arcade/gold_1.png")
+
 
 class Spiral(arcade.Window):
     """
     Main application class.
     """
 
-    def __init__(self):
+    def __init__(self, headless: bool = False):
 
-        # Call the parent class and set up the window
-        super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE)
+        # Call the parent class and set up the window, headless runs skip it
+        self.headless = headless
+        if not headless:
+            super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE)
 
         # These are 'lists' that keep track of our sprites. Each sprite should
         # go into a list.
         self.sprite_list = None
+        # Each star's start position and the phase its scale follows
+        self.stars = None
+        # Seconds since setup(), every star is placed from it each frame
+        self.time = 0.0
 
-        arcade.set_background_color(arcade.csscolor.AQUAMARINE)
+        if not headless:
+            arcade.set_background_color(arcade.csscolor.AQUAMARINE)
 
     def setup(self):
         """ Set up the game here. Call this function to restart the game. """
 
         # Create the Sprite lists
         self.sprite_list = arcade.SpriteList()
+        self.stars = EntityStore()
+        self.stars.define("start_x")
+        self.stars.define("start_y")
+        self.stars.define("phase")
+        self.stars.define("scale")
+        self.time = 0.0
 
         r = 60
         for x in rand_range(0, 100 * math.pi, scale=math.pi / 5):
-            star = arcade.Sprite("../../resources/arcade/gold_1.png")
+            star = arcade.Sprite(STAR_IMAGE)
             star.center_x = SCREEN_WIDTH / 2 + r * math.cos(x)
             star.center_y = SCREEN_HEIGHT / 2 + r * math.sin(x)
-            star.seed = scale_generator(x=random() * math.pi, offset=.5, step=.01)
-            star.scale = next(star.seed)
+            phase = random() * math.pi
+            star.scale = abs(math.sin(phase)) + .5
+            self.stars.add(star, x=star.center_x, y=star.center_y, start_x=star.center_x, start_y=star.center_y,
+                           phase=phase)
             self.sprite_list.append(star)
             r += 3
 
@@ -62,19 +87,15 @@ class Spiral(arcade.Window):
     def update(self, delta_time):
         """ Movement and game logic """
 
+        self.time += delta_time
+        stars = self.stars
+        stars["scale"][:] = sine(self.time, stars["phase"], PULSE_RATE, offset=.5 - 1, absolute=True)
+        stars["x"][:], stars["y"][:] = rotation(self.time, stars["start_x"], stars["start_y"],
+                                                SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2, SPIN_RATE)
+        stars.write_back(scale="scale")
+
         # Call update on all sprites (The sprites don't do much in this
         # example though.)
-
-        for star in self.sprite_list:
-            star.scale = next(star.seed) - 1
-            star.center_x, star.center_y = arcade.draw_commands.rotate_point(
-                star.center_x,
-                star.center_y,
-                SCREEN_WIDTH / 2,
-                SCREEN_HEIGHT / 2,
-                .1
-            )
-
         self.sprite_list.update()
 
 
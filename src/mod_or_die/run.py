@@ -0,0 +1,239 @@
+"""
+Game launcher.
+
+Levels are listed in a registry of "module:Class" specs and nothing heavier
+than the standard library is imported until one is picked, so ``--list`` and
+argument errors answer at once and a level only pays for its own imports.
+Mods add levels by declaring an entry point in the ``mod_or_die.levels``
+group::
+
+    entry_points={"mod_or_die.levels": ["snakes = my_mod.snakes:Snakes"]}
+
+Every launch times its startup phases up to the first frame drawn, the cold
+time-to-first-frame, and can append them to a JSONL file to track over time::
+
+    play level_01 --metrics startup.jsonl
+    play level_01 --headless --metrics startup.jsonl
+"""
+import time
+
+# Taken before anything else is imported, the launch clock starts here
+START = time.perf_counter()
+
+from typing import Dict, List
+import argparse
+import json
+import sys
+
+ENTRY_POINT_GROUP = "mod_or_die.levels"
+DEFAULT_LEVEL = "level_01"
+
+
+class LevelEntry:
+    """ A level the launcher can start, not imported until load() is called. """
+
+    def __init__(self, name: str, spec: str, kwargs: Dict = None, source: str = "built-in"):
+        self.name = name
+        self.spec = spec
+        self.kwargs = kwargs or {}
+        self.source = source
+
+    def load(self):
+        from .tools.headless import load_level_class
+        return load_level_class(self.spec)
+
+    def __repr__(self):
+        return f"{self.name:<12} {self.spec} ({self.source})"
+
+
+def is_base_level(level_class) -> bool:
+    """ True for BaseLevel subclasses, the levels with a player, key recording and hot reload. """
+    from .levels.BaseLevel import BaseLevel
+    return issubclass(level_class, BaseLevel)
+
+
+# The levels that ship with the game, and the arguments they are played with
+LEVELS = {
+    "level_01": LevelEntry("level_01", "mod_or_die.levels.level_01:L1", {"speed": 5.0, "title": "LEVEL 1: RUN"}),
+    "spiral": LevelEntry("spiral", "mod_or_die.levels.spirral_test:Spiral"),
+}
+
+
+def _entry_points() -> List:
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # Python 3.7
+        return []
+    found = entry_points()
+    if hasattr(found, "select"):
+        return list(found.select(group=ENTRY_POINT_GROUP))
+    return list(found.get(ENTRY_POINT_GROUP, []))
+
+
+def registry() -> Dict[str, LevelEntry]:
+    """ Built-in levels plus those installed mods declare, built-in names win on a clash. """
+    levels = {}
+    for point in _entry_points():
+        # Only the spec string is read, the module is imported when the level is picked
+        levels[point.name] = LevelEntry(point.name, point.value, source="entry point")
+    levels.update(LEVELS)
+    return levels
+
+
+def find(name: str) -> LevelEntry:
+    """ The level called name, installed packages are only scanned for names not built in. """
+    if name in LEVELS:
+        return LEVELS[name]
+    return registry().get(name)
+
+
+class StartupTimer:
+    """ Seconds from START to the end of each startup phase. """
+
+    def __init__(self, start: float = START):
+        self.start = start
+        self.last = start
+        self.phases = {}
+
+    def lap(self, phase: str):
+        now = time.perf_counter()
+        self.phases[phase] = now - self.last
+        self.last = now
+
+    @property
+    def total(self) -> float:
+        return self.last - self.start
+
+    def record(self, level: str, headless: bool) -> Dict:
+        return {
+            "time": time.time(),
+            "level": level,
+            "headless": headless,
+            "python": sys.version.split()[0],
+            "phases": self.phases,
+            "first_frame": self.total,
+        }
+
+    def __repr__(self):
+        phases = ", ".join(f"{name} {seconds * 1000:.0f}" for name, seconds in self.phases.items())
+        return f"first frame after {self.total * 1000:.0f} ms ({phases} ms)"
+
+
+def _report(timer: StartupTimer, entry: LevelEntry, headless: bool, metrics: str = None, quiet: bool = False):
+    if not quiet:
+        print(f"{entry.name}: {timer}")
+    if metrics:
+        with open(metrics, "a") as fh:
+            fh.write(json.dumps(timer.record(entry.name, headless)) + "\n")
+
+
+def _prepare(window):
+    """ Load a level's assets, in the background where the level supports it. """
+    if hasattr(window, "preload"):
+        window.preload()
+    else:
+        window.setup()
+
+
+def launch_headless(level_class, timer: StartupTimer, kwargs: Dict) -> object:
+    """ Start a level without a window, its first frame is its first update. """
+    level = level_class(headless=True, **kwargs)
+    timer.lap("construct")
+    if hasattr(level, "preload"):
+        # setup() only waits for the assets it reaches that are still decoding
+        level.preload()
+    level.setup()
+    timer.lap("setup")
+    level.update(1 / 60)
+    timer.lap("first_frame")
+    return level
+
+
+def launch(level_class, timer: StartupTimer, kwargs: Dict, on_first_frame=None) -> object:
+    """ Open the level's window, on_first_frame is called after the first frame of the level itself. """
+    window = level_class(**kwargs)
+    timer.lap("construct")
+    _prepare(window)
+    timer.lap("prepare")
+
+    # Hook the instance so the first frame past the loading screen is timed
+    on_draw = window.on_draw
+
+    def first_draw():
+        on_draw()
+        if getattr(window, "preloader", None) is not None:
+            return
+        del window.on_draw
+        timer.lap("first_frame")
+        if on_first_frame is not None:
+            on_first_frame()
+
+    window.on_draw = first_draw
+    return window
+
+
+def _value(text: str):
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Play a level of mod-or-die.")
+    parser.add_argument("level", nargs="?", default=DEFAULT_LEVEL, help="level name, see --list")
+    parser.add_argument("--list", action="store_true", help="show the levels that can be played")
+    parser.add_argument("--arg", action="append", default=[], help="level argument as name=value")
+    parser.add_argument("--record", help="save the key presses of this run, see tools.replay")
+    parser.add_argument("--reload", action="store_true",
+                        help="restart the level on its new code whenever its files are saved, see tools.reload")
+    parser.add_argument("--metrics", help="append the startup times to this JSONL file")
+    parser.add_argument("--headless", action="store_true",
+                        help="time startup without a window, up to the first update, and exit")
+    parser.add_argument("--quiet", action="store_true", help="do not print the startup times")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for entry in registry().values():
+            print(entry)
+        return 0
+    entry = find(args.level)
+    if entry is None:
+        parser.error(f"unknown level {args.level!r}, choose from {', '.join(registry())}")
+
+    timer = StartupTimer()
+    timer.lap("launcher")
+    kwargs = dict(entry.kwargs)
+    kwargs.update((name, _value(value)) for name, _, value in (a.partition("=") for a in args.arg))
+
+    level_class = entry.load()
+    timer.lap("import")
+    if args.record and not is_base_level(level_class):
+        parser.error(f"{args.level} has no player to record, --record needs a BaseLevel")
+    if args.reload and not is_base_level(level_class):
+        parser.error(f"{args.level} cannot be reloaded, --reload needs a BaseLevel")
+
+    if args.headless:
+        launch_headless(level_class, timer, kwargs)
+        _report(timer, entry, True, args.metrics, args.quiet)
+        return 0
+
+    window = launch(level_class, timer, kwargs, lambda: _report(timer, entry, False, args.metrics, args.quiet))
+    if args.record:
+        from .tools.replay import InputRecorder
+        window.recorder = InputRecorder(entry.spec, kwargs)
+    if args.reload:
+        from .tools.reload import LevelReloader
+        LevelReloader(window, kwargs).start()
+
+    import arcade
+    arcade.run()
+    if args.record:
+        window.recorder.save(args.record, window)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
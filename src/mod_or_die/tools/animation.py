@@ -0,0 +1,126 @@
+"""
+Batched animation of whole groups of tiles.
+"""
+import numpy as np
+import arcade
+
+
+class WaveGroup:
+    """
+    Sways every sprite of a SpriteList with ``abs(sin(phase)) + offset`` and
+    lets the whole group rise or sink.
+
+    This is the vectorized form of giving each sprite its own
+    ``scale_generator``: phase, base x and y live in NumPy arrays, one call to
+    ``step()`` advances the entire group. The draw buffers are written in one
+    array operation, the sprites themselves in one loop, see write_sprites().
+    """
+
+    def __init__(self, sprite_list: arcade.SpriteList, phase: float = 0.0, offset: float = 0.0,
+                 step: float = 0.02, amplitude: float = 1.0, rise: float = 0.0):
+        self.sprite_list = sprite_list
+        self.offset = offset
+        self.step_size = step
+        self.amplitude = amplitude
+        self.rise = rise
+
+        self.base_x = np.array([s.center_x for s in sprite_list], dtype=np.float64)
+        self.y = np.array([s.center_y for s in sprite_list], dtype=np.float64)
+        self.phase = np.full(len(sprite_list), phase, dtype=np.float64)
+        self.x = self.base_x.copy()
+        self.half_width = np.array([s.width / 2 for s in sprite_list], dtype=np.float64)
+        self.half_height = np.array([s.height / 2 for s in sprite_list], dtype=np.float64)
+
+        # Culled layers drawing a subset of this group, see tools.culling
+        self.views = []
+        # Baked layer drawing this group instead of its list, see bake()
+        self.layer = None
+
+        self._initial = self.state()
+
+    def step(self):
+        """ Advance the whole group by one frame. """
+        self.x = self.base_x + (np.abs(np.sin(self.phase)) + self.offset) * self.amplitude
+        self.y += self.rise
+        self.phase += self.step_size
+        self.write_back()
+
+    def state(self):
+        """ Copy of everything step() changes, for set_state(). """
+        return self.x.copy(), self.y.copy(), self.phase.copy()
+
+    def set_state(self, state):
+        x, y, phase = state
+        self.x = x.copy()
+        self.y = y.copy()
+        self.phase = phase.copy()
+        self.write_back()
+
+    def reset(self):
+        """ Return the group to where it was when it was created. """
+        self.set_state(self._initial)
+
+    def top(self, index: int = 0) -> float:
+        return self.y[index] + self.half_height[index]
+
+    def bounds(self):
+        """ Left, right, bottom and top of every sprite in the group. """
+        return (self.x - self.half_width, self.x + self.half_width,
+                self.y - self.half_height, self.y + self.half_height)
+
+    def bake(self, layer):
+        """
+        Let a rigid tools.layers.BakedLayer draw the group. It only follows
+        the first sprite, so step() moves just that one and the rest are
+        written when the layer rebakes.
+        """
+        self.layer = layer
+        layer.sync = self.write_sprites
+
+    def write_back(self):
+        """ Copy the group's positions into its sprites and the list's draw buffer. """
+        self.write_sprites(None if self.layer is None else 1)
+        self.write_buffers()
+
+    def write_sprites(self, count: int = None):
+        """
+        Copy the group's positions into its first count sprites, all by default.
+
+        Every arcade Sprite keeps its position in a list of its own, so this
+        is one store per sprite and the only part of a step that grows with
+        the group in Python rather than in NumPy. tools.bench measures it as
+        water.write_sprites next to the whole water.step.
+        """
+        sprite_list = self.sprite_list
+        sprites = sprite_list.sprite_list[:count]
+        xs, ys = self.x[:count].tolist(), self.y[:count].tolist()
+        if sprite_list.use_spatial_hash:
+            for sprite, x, y in zip(sprites, xs, ys):
+                sprite.position = (x, y)
+            return
+
+        # Bypass the per-sprite property setters, they notify every list
+        # the sprite belongs to one sprite at a time. In arcade 2.0.9 the
+        # setter only stores into _position, a list that is never replaced,
+        # clears _point_list_cache and calls update_location() on each list,
+        # which write_buffers() does at once for the group's list and views,
+        # the only lists its sprites are in. Lists with a spatial hash also
+        # re-file the sprite, so they take the setter above.
+        for sprite, x, y in zip(sprites, xs, ys):
+            position = sprite._position
+            position[0] = x
+            position[1] = y
+            sprite._point_list_cache = None
+
+    def write_buffers(self):
+        """ Copy the group's positions into the draw buffers of its list and views, one array write each. """
+        sprite_list = self.sprite_list
+        # Sprites in a spatial hash already updated the buffer one by one
+        if not sprite_list.use_spatial_hash and sprite_list.vao is not None:
+            sprite_list.sprite_data['position'][:, 0] = self.x
+            sprite_list.sprite_data['position'][:, 1] = self.y
+
+        for view in self.views:
+            if view.visible.vao is not None:
+                view.visible.sprite_data['position'][:, 0] = self.x[view.indices]
+                view.visible.sprite_data['position'][:, 1] = self.y[view.indices]
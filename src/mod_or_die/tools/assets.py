@@ -0,0 +1,182 @@
+"""
+Process-wide asset cache shared by every level.
+
+Textures and sounds are keyed by their path plus the options they were loaded
+with, so every sprite built from the same tile shares a single texture and a
+level reload or respawn never touches the disk twice for the same file.
+Images and sounds queued by tools.preload are decoded in worker threads and
+picked up from PENDING the first time they are asked for.
+"""
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable
+import threading
+import PIL.Image
+import PIL.ImageOps
+import arcade
+import pyglet
+from . import hitbox
+from .atlas import Atlas
+
+
+class AssetCache:
+    """
+    Least recently used cache with hit/miss counters.
+
+    Safe to share with preload threads. The lock only guards the bookkeeping,
+    so two threads missing the same key at once may both run the loader.
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, loader: Callable):
+        """ Return the cached value for key, calling loader() on a miss. """
+        with self._lock:
+            if key in self._items:
+                self.hits += 1
+                self._items.move_to_end(key)
+                return self._items[key]
+            self.misses += 1
+
+        value = loader()
+        with self._lock:
+            self._items[key] = value
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._items),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+CACHE = AssetCache()
+
+# Texture atlas used to resolve image paths, see use_atlas()
+ATLAS = None
+# Persistent hit-box cache, see use_hit_boxes()
+HIT_BOXES = None
+# ("image" | "sound", path) -> Future of a decode running in tools.preload
+PENDING: Dict[tuple, Future] = {}
+# Atlas pages are shared by many images, only one thread should decode each
+_PAGE_LOCK = threading.Lock()
+
+
+def use_atlas(folder: str):
+    """ Resolve textures against the atlas built in folder, if there is one. """
+    global ATLAS
+    if ATLAS is None or ATLAS.folder != folder:
+        ATLAS = Atlas.load(folder)
+
+
+def use_hit_boxes(path: str):
+    """ Look trimmed hit boxes up in the cache file at path, built by tools.hitbox. """
+    global HIT_BOXES
+    if HIT_BOXES is None or HIT_BOXES.path != path:
+        HIT_BOXES = hitbox.HitBoxCache(path)
+
+
+def _read_page(page: str) -> PIL.Image.Image:
+    image = PIL.Image.open(page)
+    image.load()
+    return image
+
+
+def _take_pending(key: tuple, loader: Callable):
+    """ The result of a queued preload for key, waiting for it if needed, or loader() without one. """
+    future = PENDING.pop(key, None)
+    if future is None:
+        return loader()
+    return future.result()
+
+
+def decode_image(path: str) -> PIL.Image.Image:
+    """ Decode the image at path from the atlas or its own file, safe to call from any thread. """
+    region = ATLAS.find(path) if ATLAS is not None else None
+    if region is None:
+        image = PIL.Image.open(path)
+        image.load()
+        return image
+
+    page, box = region
+    with _PAGE_LOCK:
+        image = CACHE.get(("page", page), lambda: _read_page(page))
+    return image.crop(box)
+
+
+def _read_image(path: str) -> PIL.Image.Image:
+    return _take_pending(("image", path), lambda: decode_image(path))
+
+
+def _read_texture(path: str, scale: float, mirrored: bool) -> arcade.Texture:
+    image = _read_image(path)
+    if mirrored:
+        image = PIL.ImageOps.mirror(image)
+
+    # SpriteList builds its atlas by texture name, so the name has to be
+    # unique per decoded image and not just per file.
+    texture = arcade.Texture(f"{path}:{scale}:{mirrored}", image)
+    texture.scale = scale
+    return texture
+
+
+def load_texture(path: str, scale: float = 1, mirrored: bool = False) -> arcade.Texture:
+    return CACHE.get(("texture", path, scale, mirrored),
+                     lambda: _read_texture(path, scale, mirrored))
+
+
+def hit_box(path: str, scale: float = 1, mirrored: bool = False) -> hitbox.Points:
+    """ Points around the opaque pixels of the image, for Sprite.set_points. """
+    def compute():
+        if HIT_BOXES is None:
+            return hitbox.compute(decode_image(path))
+        return HIT_BOXES.get(path, lambda: decode_image(path))
+
+    points = CACHE.get(("hit_box", path), compute)
+    return hitbox.transform(points, scale, mirrored)
+
+
+def decode_sound(path: str) -> pyglet.media.StaticSource:
+    """ Decode the whole sound into memory so it can be replayed without touching the disk. """
+    return pyglet.media.load(path, streaming=False)
+
+
+def load_sound(path: str) -> pyglet.media.StaticSource:
+    return CACHE.get(("sound", path), lambda: _take_pending(("sound", path), lambda: decode_sound(path)))
+
+
+def sprite(path: str, scale: float = 1, mirrored: bool = False, trim: bool = False) -> arcade.Sprite:
+    """
+    Build a sprite that shares its texture with every other sprite of the same image.
+
+    With trim the hit box is cut down to the opaque pixels instead of covering
+    the whole image.
+    """
+    texture = load_texture(path, scale, mirrored)
+    new_sprite = arcade.Sprite(scale=scale)
+    new_sprite.texture = texture
+    new_sprite.textures = [texture]
+    if trim:
+        new_sprite.set_points(hit_box(path, scale, mirrored))
+    return new_sprite
@@ -0,0 +1,135 @@
+"""
+Texture atlas build step.
+
+Packs the character and tile images into a few large pages plus an index of
+named regions, so starting a level opens and decodes a handful of files
+instead of one per sprite. Build it before packaging with::
+
+    python -m mod_or_die.tools.atlas
+
+``tools.assets`` picks the atlas up automatically when it exists and falls
+back to the loose files otherwise.
+"""
+from typing import Dict, List, Tuple
+import argparse
+import json
+import os
+from PIL import Image
+
+RESOURCES = os.path.abspath(os.path.dirname(__file__) + "/../resources/arcade/")
+FOLDERS = ("character_sprites", "tiles")
+INDEX = "atlas.json"
+
+# page, x, y, width, height
+Region = Tuple[int, int, int, int, int]
+
+
+def _collect(root: str, folders) -> List[Tuple[str, Image.Image]]:
+    images = []
+    for folder in folders:
+        for name in sorted(os.listdir(os.path.join(root, folder))):
+            if name.lower().endswith(".png"):
+                image = Image.open(os.path.join(root, folder, name))
+                image.load()
+                images.append((folder + "/" + name, image))
+    return images
+
+
+def pack(images: List[Tuple[str, Image.Image]], page_size: int = 2048,
+         padding: int = 1) -> Tuple[List[Tuple[int, int]], Dict[str, Region]]:
+    """
+    Shelf-pack images, tallest first. Returns the size of every page and the
+    region of every image.
+    """
+    order = sorted(images, key=lambda item: (-item[1].height, item[0]))
+    pages = []
+    regions = {}
+    x = y = shelf = 0
+    page = -1
+
+    for name, image in order:
+        width, height = image.size
+        if width > page_size or height > page_size:
+            raise ValueError(f"{name} is {width}x{height}, larger than a {page_size} atlas page")
+        if page < 0 or x + width > page_size:
+            x, y, shelf = 0, y + shelf, 0
+        if page < 0 or y + height > page_size:
+            page += 1
+            pages.append((0, 0))
+            x = y = shelf = 0
+
+        regions[name] = (page, x, y, width, height)
+        pages[page] = (max(pages[page][0], x + width), max(pages[page][1], y + height))
+        x += width + padding
+        shelf = max(shelf, height + padding)
+
+    return pages, regions
+
+
+def build(root: str = RESOURCES, folders=FOLDERS, out: str = None, page_size: int = 2048) -> Dict:
+    out = out or os.path.join(root, "atlas")
+    os.makedirs(out, exist_ok=True)
+    images = _collect(root, folders)
+    sizes, regions = pack(images, page_size)
+
+    pages = [Image.new("RGBA", size) for size in sizes]
+    for name, image in images:
+        page, x, y, _, _ = regions[name]
+        pages[page].paste(image.convert("RGBA"), (x, y))
+
+    page_names = []
+    for i, image in enumerate(pages):
+        page_names.append(f"atlas_{i}.png")
+        image.save(os.path.join(out, page_names[-1]))
+
+    index = {"root": os.path.relpath(root, out), "pages": page_names, "regions": regions}
+    with open(os.path.join(out, INDEX), "w") as fh:
+        json.dump(index, fh, indent=1, sort_keys=True)
+    return index
+
+
+class Atlas:
+    """ A built atlas: finds the page and box of a resource path. """
+
+    def __init__(self, folder: str):
+        with open(os.path.join(folder, INDEX)) as fh:
+            index = json.load(fh)
+        self.folder = folder
+        self.root = os.path.normpath(os.path.join(folder, index["root"]))
+        self.pages = [os.path.join(folder, page) for page in index["pages"]]
+        self.regions = {name: tuple(region) for name, region in index["regions"].items()}
+
+    @classmethod
+    def load(cls, folder: str):
+        """ The atlas in folder, or None if it has not been built. """
+        if not os.path.exists(os.path.join(folder, INDEX)):
+            return None
+        return cls(folder)
+
+    def find(self, path: str):
+        """ (page file, crop box) for an image path, or None if it is not in the atlas. """
+        name = os.path.relpath(os.path.normpath(path), self.root).replace(os.sep, "/")
+        region = self.regions.get(name)
+        if region is None:
+            return None
+        page, x, y, width, height = region
+        return self.pages[page], (x, y, x + width, y + height)
+
+    def __len__(self) -> int:
+        return len(self.regions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack sprite folders into texture atlas pages.")
+    parser.add_argument("--root", default=RESOURCES)
+    parser.add_argument("--folders", default=",".join(FOLDERS))
+    parser.add_argument("--out", default=None, help="defaults to <root>/atlas")
+    parser.add_argument("--page-size", type=int, default=2048)
+    args = parser.parse_args()
+
+    index = build(args.root, args.folders.split(","), args.out, args.page_size)
+    print(f"{len(index['regions'])} images packed into {len(index['pages'])} pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Pooled sound playback.
+
+Sounds are decoded into memory once and played by name on a fixed number of
+voices. When every voice is busy the quietest claim loses: the oldest voice of
+the lowest priority is stopped and reused, or the new sound is dropped if
+everything playing matters more. A per-sound limit keeps one repeated event,
+like jumping, from taking over all the voices.
+"""
+from typing import Callable, Dict, List, Optional
+import time
+import pyglet
+
+
+class Voice:
+    """ One playback slot, the sound on it and when that sound ends. """
+
+    def __init__(self):
+        self.player = None
+        self.name = None
+        self.priority = 0
+        self.started = 0.0
+        self.ends = 0.0
+
+    def busy(self, now: float) -> bool:
+        return now < self.ends
+
+    def start(self, source, volume: float):
+        player = pyglet.media.Player()
+        player.volume = volume
+        player.queue(source)
+        # Let go of the player as soon as it runs out, not when the voice is next used
+        player.push_handlers(on_player_eos=lambda: self.finished(player))
+        player.play()
+        self.player = player
+
+    def finished(self, player):
+        """ Free the voice if player is still the one on it. """
+        if player is self.player:
+            self.stop()
+
+    def stop(self):
+        if self.player is not None:
+            self.player.pause()
+            self.player.delete()
+            self.player = None
+        self.name = None
+        self.ends = 0.0
+
+
+class Mixer:
+    """
+    Fixed pool of voices playing preloaded sounds by name.
+
+    A muted mixer does all the bookkeeping without creating players, which is
+    what headless levels and machines without an audio driver get.
+    """
+
+    def __init__(self, voices: int = 8, limit: int = 2, muted: bool = False,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.voices = [Voice() for _ in range(voices)]
+        self.limit = limit
+        self.muted = muted or pyglet.media.get_audio_driver() is None
+        self.clock = clock
+        self.sounds = {}
+        self.played = 0
+        self.stolen = 0
+        self.dropped = 0
+
+    def add(self, name: str, source, limit: int = None, priority: int = 0):
+        """ Register a decoded source (see tools.assets.load_sound) under name. """
+        self.sounds[name] = (source, limit or self.limit, priority)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.sounds
+
+    def _pick(self, name: str, limit: int, priority: int, now: float) -> Optional[Voice]:
+        busy = [voice for voice in self.voices if voice.busy(now)]
+        same = [voice for voice in busy if voice.name == name]
+        if len(same) >= limit:
+            return min(same, key=lambda voice: voice.started)
+
+        for voice in self.voices:
+            if not voice.busy(now):
+                return voice
+
+        victim = min(busy, key=lambda voice: (voice.priority, voice.started))
+        return victim if victim.priority <= priority else None
+
+    def play(self, name: str, volume: float = 1.0) -> Optional[Voice]:
+        """ Start the sound on a voice, returns it, or None when it was dropped. """
+        source, limit, priority = self.sounds[name]
+        now = self.clock()
+        voice = self._pick(name, limit, priority, now)
+        if voice is None:
+            self.dropped += 1
+            return None
+        if voice.busy(now):
+            self.stolen += 1
+
+        voice.stop()
+        voice.name = name
+        voice.priority = priority
+        voice.started = now
+        voice.ends = now + (source.duration or 0.0)
+        if not self.muted:
+            voice.start(source, volume)
+        self.played += 1
+        return voice
+
+    def active(self) -> List[str]:
+        now = self.clock()
+        return [voice.name for voice in self.voices if voice.busy(now)]
+
+    def stop(self):
+        for voice in self.voices:
+            voice.stop()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "voices": len(self.voices),
+            "active": len(self.active()),
+            "played": self.played,
+            "stolen": self.stolen,
+            "dropped": self.dropped,
+        }
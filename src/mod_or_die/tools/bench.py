@@ -0,0 +1,350 @@
+"""
+Benchmarks for the level hot paths.
+
+Every benchmark returns the median seconds per call for one set of parameters.
+Results can be written as JSON and compared against a stored baseline::
+
+    python -m mod_or_die.tools.bench --json results.json --save-baseline baseline.json
+    python -m mod_or_die.tools.bench --baseline baseline.json --tolerance 0.25
+
+The run exits with status 1 if any benchmark got slower than the baseline by
+more than the tolerance, or if a baseline benchmark it ran has no timing,
+so compare with the sizes the baseline was saved with. Only drawing is
+skipped, on machines without a display; any other error ends the run.
+"""
+from typing import Callable, Dict, List
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import PIL.Image
+import arcade
+from . import assets
+from .animation import WaveGroup
+from .color_to_alpha import transparent
+from .layers import RIGID, BakedLayer
+from .physics import GridPhysicsEngine
+from .pool import SpritePool
+from ..levels.BaseLevel import BaseLevel, Conf
+
+
+def build_ground(tiles: int, conf: Conf = None) -> arcade.SpriteList:
+    """ A flat floor of grassMid tiles like BaseLevel.draw_map, but of any length. """
+    conf = conf or Conf()
+    blocks = arcade.SpriteList()
+    for i in range(tiles):
+        block = assets.sprite(conf.TILE_RESOURCES + "/grassMid.png")
+        block.center_x = i * 2 * conf.TILE_RADIUS
+        block.center_y = conf.TILE_RADIUS
+        blocks.append(block)
+    return blocks
+
+
+class FlatLevel(BaseLevel):
+    """
+    BaseLevel with a floor of any length and nothing else, also the level the
+    tests stream and snapshot. on_draw, update and win are abstract in
+    BaseLevel, so they are declared here only to be concrete.
+    """
+
+    def __init__(self, tiles: int = 100, **kwargs):
+        self.tiles = tiles
+        super().__init__(**kwargs)
+
+    def draw_map(self):
+        for i in range(self.tiles):
+            self.place_tile("block", "grassMid", i * 2 * self.conf.TILE_RADIUS, self.conf.TILE_RADIUS)
+
+    def on_draw(self):
+        super().on_draw()
+
+    def update(self, delta_time):
+        super().update(delta_time)
+
+    def win(self):
+        super().win()
+
+
+def measure(func: Callable, repeat: int = 200, setup: Callable = None) -> float:
+    """ Median seconds of func() over repeat calls, setup() runs untimed before each. """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def bench_physics(engine_class, tiles: int, frames: int = 300) -> float:
+    """ Seconds per physics frame for a player running and jumping along the floor. """
+    conf = Conf()
+    blocks = build_ground(tiles, conf)
+    player = arcade.Sprite()
+    player.texture = assets.load_texture(conf.SPRITE_RESOURCES + "/character0.png")
+    player.center_x, player.center_y = (conf.PLAYER_START_X, conf.PLAYER_START_Y)
+    player.change_x = 5
+    engine = engine_class(player, blocks, 1.0)
+
+    state = {"frame": 0}
+
+    def frame():
+        if state["frame"] % 30 == 0 and engine.can_jump():
+            player.change_y = 10
+        engine.update()
+        state["frame"] += 1
+
+    return measure(frame, frames)
+
+
+def bench_setup(tiles: int, warm: bool, repeat: int = 20) -> float:
+    level = FlatLevel(tiles=tiles, headless=True)
+    if warm:
+        level.setup()
+        return measure(level.setup, repeat)
+    return measure(level.setup, repeat, setup=assets.CACHE.clear)
+
+
+def bench_level_update(tiles: int, frames: int = 300) -> float:
+    level = FlatLevel(tiles=tiles, headless=True)
+    level.setup()
+    level.on_key_press(arcade.key.RIGHT, 0)
+    return measure(lambda: level.update(1 / 60), frames)
+
+
+def bench_l1_update(frames: int = 300) -> float:
+    from ..levels.level_01 import L1
+    level = L1(speed=5, title="bench", headless=True)
+    level.setup()
+    return measure(lambda: level.update(1 / 60), frames)
+
+
+def build_water(sprites: int) -> WaveGroup:
+    conf = Conf()
+    water = arcade.SpriteList()
+    for i in range(sprites):
+        tile = assets.sprite(conf.TILE_RESOURCES + "/water.png")
+        tile.center_x = i * 2 * conf.TILE_RADIUS
+        water.append(tile)
+    return WaveGroup(water, step=0.02, amplitude=conf.TILE_RADIUS, rise=0.18)
+
+
+def bench_water(sprites: int, frames: int = 300, baked: bool = False) -> float:
+    """ The L1 water animation on its own, for a band of any width, drawn as sprites or from a rigid bake. """
+    group = build_water(sprites)
+    if baked:
+        group.bake(BakedLayer(group.sprite_list, RIGID))
+    return measure(group.step, frames)
+
+
+def bench_water_write_sprites(sprites: int, frames: int = 300) -> float:
+    """ The per-sprite part of a water step, the rest of it is NumPy. """
+    return measure(build_water(sprites).write_sprites, frames)
+
+
+class Skipped(Exception):
+    """ A benchmark that cannot run on this machine. """
+
+
+def _no_display_errors() -> tuple:
+    """ What opening a window raises without a display to open it on. """
+    import pyglet.window
+    errors = [pyglet.window.NoSuchConfigException]
+    try:
+        from pyglet.canvas.xlib import NoSuchDisplayException
+        errors.append(NoSuchDisplayException)
+    except ImportError:  # not X11
+        pass
+    return tuple(errors)
+
+
+def bench_draw(tiles: int, frames: int = 100) -> float:
+    """ on_draw() of a level, needs a display. """
+    try:
+        level = FlatLevel(tiles=tiles)
+    except _no_display_errors() as e:
+        raise Skipped(f"no display: {e}") from e
+    try:
+        level.setup()
+        level.on_draw()
+        return measure(level.on_draw, frames)
+    finally:
+        level.close()
+
+
+def bench_spiral(frames: int = 100) -> float:
+    from ..levels.spirral_test import Spiral
+    spiral = Spiral(headless=True)
+    spiral.setup()
+    return measure(lambda: spiral.update(1 / 60), frames)
+
+
+def bench_spawn(pooled: bool, live: int = 16, frames: int = 300) -> float:
+    """ One sprite spawned and the oldest of live ones removed per frame, from a pool or created anew. """
+    path = Conf().ARCADE_RESOURCES + "/coin_01.png"
+    sprites = arcade.SpriteList()
+    spawned = []
+    if pooled:
+        pool = SpritePool(lambda: assets.sprite(path), sprites, capacity=live + 1)
+
+        def frame():
+            spawned.append(pool.spawn(100, 100))
+            if len(spawned) > live:
+                pool.release(spawned.pop(0))
+    else:
+        def frame():
+            sprite = assets.sprite(path)
+            sprite.position = (100, 100)
+            sprites.append(sprite)
+            spawned.append(sprite)
+            if len(spawned) > live:
+                spawned.pop(0).remove_from_sprite_lists()
+    return measure(frame, frames)
+
+
+def bench_transparent(side: int, repeat: int = 3) -> float:
+    """ color_to_alpha.transparent on a side x side image that is half white. """
+    pixels = np.zeros((side, side, 3), dtype=np.uint8)
+    pixels[:, : side // 2] = 255
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "image.png")
+        image = PIL.Image.fromarray(pixels)
+        return measure(lambda: transparent(path, (255, 255, 255)), repeat,
+                       setup=lambda: image.save(path))
+
+
+def bench_startup(level: str, repeat: int = 3) -> float:
+    """ Cold time-to-first-frame of a level through the launcher, each run a new process. """
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "startup.jsonl")
+        for _ in range(repeat):
+            subprocess.run([sys.executable, "-m", "mod_or_die.run", level, "--headless", "--quiet",
+                            "--metrics", path], check=True)
+        with open(path) as fh:
+            return statistics.median(json.loads(line)["first_frame"] for line in fh)
+
+
+def suite(sizes: List[int]) -> List[Dict]:
+    """ (name, params, callable) for every benchmark at every size. """
+    cases = []
+    for tiles in sizes:
+        cases.append(("physics.arcade", {"tiles": tiles},
+                      lambda t=tiles: bench_physics(arcade.PhysicsEnginePlatformer, t)))
+        cases.append(("physics.grid", {"tiles": tiles},
+                      lambda t=tiles: bench_physics(GridPhysicsEngine, t)))
+        cases.append(("setup.cold", {"tiles": tiles}, lambda t=tiles: bench_setup(t, warm=False)))
+        cases.append(("setup.warm", {"tiles": tiles}, lambda t=tiles: bench_setup(t, warm=True)))
+        cases.append(("level.update", {"tiles": tiles}, lambda t=tiles: bench_level_update(t)))
+        cases.append(("water.step", {"sprites": tiles}, lambda t=tiles: bench_water(t)))
+        cases.append(("water.step_baked", {"sprites": tiles}, lambda t=tiles: bench_water(t, baked=True)))
+        cases.append(("water.write_sprites", {"sprites": tiles}, lambda t=tiles: bench_water_write_sprites(t)))
+        cases.append(("level.draw", {"tiles": tiles}, lambda t=tiles: bench_draw(t)))
+    cases.append(("l1.update", {}, bench_l1_update))
+    cases.append(("spiral.update", {}, bench_spiral))
+    cases.append(("spawn.pooled", {}, lambda: bench_spawn(True)))
+    cases.append(("spawn.created", {}, lambda: bench_spawn(False)))
+    cases.append(("startup.first_frame", {"level": "level_01"}, lambda: bench_startup("level_01")))
+    cases.append(("color_to_alpha.transparent", {"side": 256}, lambda: bench_transparent(256)))
+    return cases
+
+
+def key(result: Dict) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+    return f"{result['name']}[{params}]"
+
+
+def run(sizes: List[int], only: str = None) -> List[Dict]:
+    results = []
+    for name, params, func in suite(sizes):
+        if only and only not in name:
+            continue
+        result = {"name": name, "params": params}
+        try:
+            result["seconds"] = func()
+        except Skipped as e:
+            result["skipped"] = str(e)
+        results.append(result)
+    return results
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """ Describe every result slower than its baseline by more than tolerance. """
+    previous = {key(r): r for r in baseline if "seconds" in r}
+    regressions = []
+    for result in results:
+        old = previous.get(key(result))
+        if old is None or "seconds" not in result:
+            continue
+        ratio = result["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+        result["baseline"] = old["seconds"]
+        result["ratio"] = ratio
+        if ratio > 1 + tolerance:
+            regressions.append(f"{key(result)}: {old['seconds'] * 1e6:.1f}us -> "
+                               f"{result['seconds'] * 1e6:.1f}us ({ratio:.2f}x)")
+    return regressions
+
+
+def missing(results: List[Dict], baseline: List[Dict], only: str = None) -> List[str]:
+    """ Keys of the timed baseline benchmarks selected by only that have no timing in results. """
+    timed = {key(r) for r in results if "seconds" in r}
+    return [key(r) for r in baseline
+            if "seconds" in r and (not only or only in r["name"]) and key(r) not in timed]
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the level hot paths.")
+    parser.add_argument("--sizes", default="100,1000,5000", help="comma separated map sizes")
+    parser.add_argument("--only", help="only run benchmarks whose name contains this")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against results stored in this file")
+    parser.add_argument("--save-baseline", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown against the baseline, 0.2 is 20%%")
+    args = parser.parse_args(argv)
+
+    results = run([int(size) for size in args.sizes.split(",")], args.only)
+
+    regressions = []
+    untimed = []
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        untimed = missing(results, baseline, args.only)
+
+    for result in results:
+        if "seconds" in result:
+            line = f"{key(result):<45} {result['seconds'] * 1e6:>12.1f} us"
+            if "ratio" in result:
+                line += f"  ({result['ratio']:.2f}x baseline)"
+        else:
+            line = f"{key(result):<45} {'skipped':>15}  {result['skipped']}"
+        print(line)
+
+    document = {"python": sys.version.split()[0], "results": results}
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w") as fh:
+                json.dump(document, fh, indent=2)
+
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print("  " + regression)
+    if untimed:
+        print("\nIn the baseline but not timed:")
+        for name in untimed:
+            print("  " + name)
+    if regressions or untimed:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""
+Chunked level streaming.
+
+The world is cut into fixed-width columns. Levels register tile placements
+instead of creating sprites, and only the chunks around the player are turned
+into sprites and collision bodies. Chunks that fall far behind are evicted.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+import math
+import numpy as np
+import arcade
+from .geometry import compile_collision
+
+# (asset list name, tile name, center x, center y)
+Placement = Tuple[str, str, float, float]
+
+
+def remove_sprites(sprite_list: arcade.SpriteList, sprites: Iterable[arcade.Sprite]):
+    """
+    Remove many sprites from a list in one pass.
+
+    ``SpriteList.remove`` rebuilds the list's index on every call, which makes
+    dropping a whole chunk quadratic.
+    """
+    doomed = {id(sprite) for sprite in sprites}
+    if not doomed:
+        return
+
+    kept = []
+    for sprite in sprite_list.sprite_list:
+        if id(sprite) in doomed:
+            if sprite_list in sprite.sprite_lists:
+                sprite.sprite_lists.remove(sprite_list)
+            if sprite_list.use_spatial_hash:
+                sprite_list.spatial_hash.remove_object(sprite)
+        else:
+            kept.append(sprite)
+
+    sprite_list.sprite_list = kept
+    sprite_list.sprite_idx = {sprite: i for i, sprite in enumerate(kept)}
+    sprite_list.vao = None
+
+
+def append_sprites(sprite_list: arcade.SpriteList, sprites: List[arcade.Sprite]):
+    """ ``SpriteList.append`` for many sprites, invalidating the list's buffers once. """
+    start = len(sprite_list.sprite_list)
+    sprite_list.sprite_list.extend(sprites)
+    index = sprite_list.sprite_idx
+    for i, sprite in enumerate(sprites, start):
+        index[sprite] = i
+        sprite.sprite_lists.append(sprite_list)
+        if sprite_list.use_spatial_hash:
+            sprite_list.spatial_hash.insert_object_for_box(sprite)
+    sprite_list.vao = None
+
+
+def _clone(template: arcade.Sprite, x: float, y: float) -> arcade.Sprite:
+    """ A new sprite of template's texture and hit box at (x, y), without the per-property setters. """
+    sprite = arcade.Sprite(scale=template.scale, center_x=x, center_y=y)
+    sprite._texture = template._texture
+    sprite.textures = template.textures
+    sprite._width = template._width
+    sprite._height = template._height
+    sprite._points = template._points
+    return sprite
+
+
+class Chunk:
+    """ The sprites and collision bodies of one loaded column. """
+
+    def __init__(self):
+        self.sprites: Dict[str, List[arcade.Sprite]] = defaultdict(list)
+        self.bodies: List[arcade.Sprite] = []
+
+
+class ChunkManager:
+    """
+    Instantiates the chunks within ``radius`` chunks of the player and evicts
+    the ones more than ``evict_radius`` away.
+    """
+
+    def __init__(self, level, width: float, radius: int = 1, evict_radius: int = 2):
+        self.level = level
+        self.width = width
+        self.radius = radius
+        self.evict_radius = max(evict_radius, radius)
+        self.placements: Dict[int, List[Placement]] = defaultdict(list)
+        # Compiled level records per chunk, see tools.level_format
+        self.records: Dict[int, np.ndarray] = {}
+        self.tiles: List[str] = []
+        self.lists: List[str] = []
+        self.loaded: Dict[int, Chunk] = {}
+        self.current = None
+
+    def chunk_of(self, x: float) -> int:
+        return math.floor(x / self.width)
+
+    def place(self, list_name: str, tile: str, x: float, y: float):
+        """ Register a tile to be created when its chunk comes into range. """
+        self.placements[self.chunk_of(x)].append((list_name, tile, x, y))
+
+    def add_records(self, records: np.ndarray, tiles: List[str], lists: List[str]):
+        """
+        Register a whole compiled map at once.
+
+        The records are split into chunks with one vectorized pass, each chunk
+        keeps a slice of the (possibly memory-mapped) array.
+        """
+        self.tiles = list(tiles)
+        self.lists = list(lists)
+        if len(records) == 0:
+            return
+        keys = np.floor(records["x"] / self.width).astype(np.int64)
+        order = np.argsort(keys, kind="stable")
+        if not np.array_equal(order, np.arange(len(order))):
+            records = records[order]
+            keys = keys[order]
+        starts = np.flatnonzero(np.diff(keys)) + 1
+        bounds = np.concatenate(([0], starts, [len(keys)]))
+        for start, stop in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            self.records[int(keys[start])] = records[start:stop]
+
+    def update(self, x: float):
+        """ Stream chunks around world position x. """
+        index = self.chunk_of(x)
+        if index == self.current:
+            return
+        self.current = index
+
+        changed = set()
+        for key in [k for k in self.loaded if abs(k - index) > self.evict_radius]:
+            changed.update(self._evict(key))
+        for key in range(index - self.radius, index + self.radius + 1):
+            if key not in self.loaded and (key in self.placements or key in self.records):
+                changed.update(self._load(key))
+
+        for name in changed:
+            self.level.refresh_layer(name)
+
+    def _load(self, key: int):
+        level = self.level
+        chunk = Chunk()
+        for list_name, tile, x, y in self.placements.get(key, ()):
+            sprite = level.tile_sprite(tile)
+            sprite.center_x = x
+            sprite.center_y = y
+            level.assets[list_name].append(sprite)
+            chunk.sprites[list_name].append(sprite)
+
+        # Blocks whose bounds are read from their sprites, the rest come as rects
+        measured = list(chunk.sprites.get("block", ()))
+        rects = []
+        records = self.records.get(key)
+        if records is not None:
+            more, rects = self._load_records(records, chunk)
+            measured += more
+
+        if chunk.sprites.get("block"):
+            chunk.bodies = compile_collision(measured, rects).sprite_list
+            level.physics_engine.add(chunk.bodies)
+
+        self.loaded[key] = chunk
+        return chunk.sprites.keys()
+
+    def _load_records(self, records: np.ndarray, chunk: Chunk):
+        """
+        Create the sprites of a chunk's records and add them to their lists.
+
+        Each (list, tile) pair is built once as a template and copied to every
+        position. Returns the blocks with custom hit boxes, and the
+        (left, right, bottom, top) boxes of the others worked out from the
+        records in one pass.
+        """
+        level = self.level
+        lists = records["list"]
+        keys = lists.astype(np.int64) << 16 | records["tile"]
+        unique, inverse = np.unique(keys, return_inverse=True)
+        templates = [level.tile_sprite(self.tiles[key & 0xFFFF]) for key in unique.tolist()]
+        xs, ys = records["x"].tolist(), records["y"].tolist()
+        sprites = [_clone(templates[t], x, y) for t, x, y in zip(inverse.tolist(), xs, ys)]
+
+        for list_id in np.unique(lists).tolist():
+            name = self.lists[list_id]
+            group = [sprites[i] for i in np.flatnonzero(lists == list_id).tolist()]
+            append_sprites(level.assets[name], group)
+            chunk.sprites[name].extend(group)
+
+        if "block" not in self.lists:
+            return [], []
+        blocks = lists == self.lists.index("block")
+        plain = np.array([template._points is None for template in templates])[inverse]
+        boxed = blocks & plain
+        half_width = np.array([template.width / 2 for template in templates])[inverse[boxed]]
+        half_height = np.array([template.height / 2 for template in templates])[inverse[boxed]]
+        x = records["x"][boxed].astype(np.float64)
+        y = records["y"][boxed].astype(np.float64)
+        rects = list(zip((x - half_width).tolist(), (x + half_width).tolist(),
+                         (y - half_height).tolist(), (y + half_height).tolist()))
+        return [sprites[i] for i in np.flatnonzero(blocks & ~plain).tolist()], rects
+
+    def _evict(self, key: int):
+        level = self.level
+        chunk = self.loaded.pop(key)
+        if chunk.bodies:
+            level.physics_engine.remove(chunk.bodies)
+        for list_name, sprites in chunk.sprites.items():
+            remove_sprites(level.assets[list_name], sprites)
+        return chunk.sprites.keys()
@@ -1,26 +1,119 @@
-import glob
+"""
+Key a background color out of PNG images.
+
+    python -m mod_or_die.tools.color_to_alpha resources/images --color 255,255,255 \\
+        --tolerance 8 --softness 24 --out build/images --workers 4
+
+Pixels within ``tolerance`` of the key color become fully transparent. Pixels
+up to ``softness`` further away fade in, with the key color un-mixed from them
+so anti-aliased edges keep their real color instead of a halo. Either ``--out``
+or ``--in-place`` has to be given, so source art is never overwritten by
+accident.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+import argparse
+import os
+import time
+import numpy as np
 from PIL import Image
 
-def transparent(img, color: (int, int, int)):
-    img = Image.open(img)
-    img = img.convert("RGBA")
+Color = Tuple[int, int, int]
+
+
+def key_out(pixels: np.ndarray, color: Color, tolerance: int = 0, softness: int = 0) -> np.ndarray:
+    """ Return a keyed copy of an RGBA uint8 array. """
+    rgb = pixels[..., :3].astype(np.float32)
+    key = np.array(color, dtype=np.float32)
+    distance = np.abs(rgb - key).max(axis=-1)
+
+    if softness > 0:
+        alpha = np.clip((distance - tolerance) / softness, 0.0, 1.0)
+    else:
+        alpha = (distance > tolerance).astype(np.float32)
+
+    # Un-mix the key color from partially keyed pixels
+    partial = (alpha > 0) & (alpha < 1)
+    a = alpha[partial][:, None]
+    rgb[partial] = np.clip((rgb[partial] - (1 - a) * key) / a, 0, 255)
+    rgb[alpha == 0] = 255
+
+    out = np.empty_like(pixels)
+    out[..., :3] = np.rint(rgb).astype(np.uint8)
+    out[..., 3] = np.rint(pixels[..., 3] * alpha).astype(np.uint8)
+    return out
+
+
+def transparent(path, color: Color, tolerance: int = 0, softness: int = 0, out: str = None) -> int:
+    """ Key color out of the image at path, write it to out (default: in place), return the pixel count. """
+    img = Image.open(path).convert("RGBA")
+    pixels = key_out(np.asarray(img), color, tolerance, softness)
+    Image.fromarray(pixels, "RGBA").save(out or path, "PNG")
+    return pixels.shape[0] * pixels.shape[1]
+
+
+def _job(args) -> int:
+    return transparent(*args)
+
+
+def find_images(root: str, out_root: str = None) -> List[Tuple[str, str]]:
+    """ (source, output) pairs for every PNG under root whose output is missing or stale. """
+    jobs = []
+    for folder, _, files in os.walk(root):
+        for name in sorted(files):
+            if not name.lower().endswith(".png"):
+                continue
+            source = os.path.join(folder, name)
+            if out_root is None:
+                jobs.append((source, source))
+                continue
+            target = os.path.join(out_root, os.path.relpath(source, root))
+            if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source):
+                continue
+            jobs.append((source, target))
+    return jobs
+
+
+def batch(root: str, color: Color, tolerance: int = 0, softness: int = 0,
+          out_root: str = None, workers: int = None) -> Tuple[int, int, float]:
+    """
+    Key every PNG under root in a process pool.
 
-    pixdata = img.load()
+    With out_root, results mirror the tree there and files whose output is
+    newer than the source are skipped. Without it images are keyed in place.
+    Returns (images, pixels, seconds).
+    """
+    jobs = find_images(root, out_root)
+    for _, target in jobs:
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
 
-    width, height = img.size
-    for y in range(height):
-        for x in range(width):
-            if pixdata[x, y][:3] == color:
-                pixdata[x, y] = (255, 255, 255, 0)
+    start = time.perf_counter()
+    work = [(source, color, tolerance, softness, target) for source, target in jobs]
+    if workers == 1 or len(work) < 2:
+        pixels = sum(map(_job, work))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pixels = sum(pool.map(_job, work, chunksize=4))
+    return len(jobs), pixels, time.perf_counter() - start
 
-    img.save(img, "PNG")
 
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Make a background color transparent in PNGs.")
+    parser.add_argument("root", help="folder searched recursively for PNGs")
+    parser.add_argument("--color", default="255,255,255", help="key color as r,g,b")
+    parser.add_argument("--tolerance", type=int, default=0, help="max channel difference keyed out fully")
+    parser.add_argument("--softness", type=int, default=0, help="width of the fade past the tolerance")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--out", help="write results to this folder, mirroring the tree under root")
+    target.add_argument("--in-place", action="store_true", help="overwrite the images under root")
+    parser.add_argument("--workers", type=int, default=None, help="processes, defaults to the CPU count")
+    args = parser.parse_args(argv)
 
-def main(color: (int, int, int)):
-    for image in glob.glob("*.png"):
-        transparent(image, color)
+    color = tuple(int(c) for c in args.color.split(","))
+    images, pixels, seconds = batch(args.root, color, args.tolerance, args.softness, args.out, args.workers)
+    rate = pixels / seconds if seconds > 0 else 0
+    print(f"{images} images, {pixels} pixels in {seconds:.2f}s ({rate / 1e6:.1f} Mpixel/s)")
 
 
 if __name__ == "__main__":
-    color = (255, 255, 255)
-    main(color)
\ No newline at end of file
+    main()
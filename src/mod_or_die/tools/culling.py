@@ -0,0 +1,145 @@
+"""
+Viewport culling for sprite lists.
+
+Each culled list gets a companion ``visible`` SpriteList holding only the
+sprites that intersect the viewport plus a margin, and that companion is what
+gets drawn. Static layers are sorted by their left edge once, so finding the
+visible range is a binary search, and the companion is only rebuilt when the
+camera leaves the area it was last built for.
+"""
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+import arcade
+
+Bounds = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def sprite_bounds(sprite_list: arcade.SpriteList) -> Bounds:
+    """ Left, right, bottom and top of every sprite in the list as arrays. """
+    edges = np.array([(s.left, s.right, s.bottom, s.top) for s in sprite_list],
+                     dtype=np.float64).reshape(-1, 4)
+    return edges[:, 0], edges[:, 1], edges[:, 2], edges[:, 3]
+
+
+class CulledLayer:
+    """
+    A SpriteList and the subset of it worth drawing.
+
+    ``bounds`` is called to get fresh sprite bounds for layers that move, such
+    as a WaveGroup. Static layers leave it out and have their bounds read once.
+    """
+
+    def __init__(self, sprite_list: arcade.SpriteList, margin: float,
+                 bounds: Optional[Callable[[], Bounds]] = None):
+        self.sprite_list = sprite_list
+        self.margin = margin
+        self.bounds = bounds
+        self.visible = arcade.SpriteList()
+        self.indices = np.zeros(0, dtype=np.int64)
+        self.window = None
+
+        if bounds is None:
+            left, right, bottom, top = sprite_bounds(sprite_list)
+            self._order = np.argsort(left, kind="stable")
+            self._left = left[self._order]
+            self._right = right[self._order]
+            self._bottom = bottom[self._order]
+            self._top = top[self._order]
+            # Widest sprite, bounds how far left of the window a visible sprite can start
+            self._reach = float((right - left).max()) if len(left) else 0.0
+
+    def _contains(self, view: Tuple[float, float, float, float]) -> bool:
+        if self.window is None:
+            return False
+        left, right, bottom, top = view
+        w_left, w_right, w_bottom, w_top = self.window
+        slack = self.margin / 2
+        return (w_left <= left - slack and right + slack <= w_right
+                and w_bottom <= bottom - slack and top + slack <= w_top)
+
+    def update(self, view: Tuple[float, float, float, float]):
+        """ Refresh the visible subset for a (left, right, bottom, top) viewport. """
+        if not self._contains(view):
+            left, right, bottom, top = view
+            self.window = (left - self.margin, right + self.margin,
+                           bottom - self.margin, top + self.margin)
+        elif self.bounds is None:
+            return
+
+        w_left, w_right, w_bottom, w_top = self.window
+        if self.bounds is None:
+            start = np.searchsorted(self._left, w_left - self._reach, side="left")
+            stop = np.searchsorted(self._left, w_right, side="right")
+            mask = ((self._right[start:stop] >= w_left)
+                    & (self._top[start:stop] >= w_bottom)
+                    & (self._bottom[start:stop] <= w_top))
+            indices = np.sort(self._order[start:stop][mask])
+        else:
+            left, right, bottom, top = self.bounds()
+            mask = (right >= w_left) & (left <= w_right) & (top >= w_bottom) & (bottom <= w_top)
+            indices = np.flatnonzero(mask)
+
+        if not np.array_equal(indices, self.indices):
+            self._show(indices)
+
+    def _show(self, indices: np.ndarray):
+        """ Swap the visible list's contents, touching only sprites that enter or leave. """
+        visible = self.visible
+        sprites = self.sprite_list.sprite_list
+        shown = [sprites[i] for i in indices.tolist()]
+        old = {id(sprite) for sprite in visible.sprite_list}
+        new = {id(sprite) for sprite in shown}
+
+        for sprite in visible.sprite_list:
+            if id(sprite) not in new and visible in sprite.sprite_lists:
+                sprite.sprite_lists.remove(visible)
+        for sprite in shown:
+            if id(sprite) not in old:
+                sprite.register_sprite_list(visible)
+
+        visible.sprite_list = shown
+        visible.sprite_idx = {sprite: i for i, sprite in enumerate(shown)}
+        visible.vao = None
+        self.indices = indices
+
+
+class ViewCuller:
+    """
+    The culled layers of a level, looked up by the SpriteList they wrap.
+    """
+
+    def __init__(self, margin: float):
+        self.margin = margin
+        self.layers: Dict[int, CulledLayer] = {}
+        self.view = None
+
+    def add(self, sprite_list: arcade.SpriteList,
+            bounds: Optional[Callable[[], Bounds]] = None) -> CulledLayer:
+        layer = CulledLayer(sprite_list, self.margin, bounds)
+        self.layers[id(sprite_list)] = layer
+        return layer
+
+    def refresh(self, sprite_list: arcade.SpriteList):
+        """ Rebuild the layer of a static list whose sprites were added or removed. """
+        old = self.layers.get(id(sprite_list))
+        if old is None or old.bounds is not None:
+            return
+        layer = self.add(sprite_list)
+        # Keep drawing through the same SpriteList so its GL program is reused
+        layer.visible = old.visible
+        # Never equal to a real selection, so the next update resyncs the list
+        layer.indices = np.full(len(old.indices), -1, dtype=np.int64)
+        if self.view is not None:
+            layer.update(self.view)
+
+    def update(self, left: float, bottom: float, width: float, height: float):
+        self.view = (left, left + width, bottom, bottom + height)
+        for layer in self.layers.values():
+            layer.update(self.view)
+
+    def visible(self, sprite_list: arcade.SpriteList) -> arcade.SpriteList:
+        """ The list to draw in place of sprite_list. """
+        layer = self.layers.get(id(sprite_list))
+        if layer is None or layer.sprite_list is not sprite_list:
+            return sprite_list
+        return layer.visible
@@ -0,0 +1,163 @@
+"""
+Structure-of-arrays store for per-entity gameplay state.
+
+Instead of hanging attributes off sprites (``star.seed = ...``) a level
+defines columns once and keeps one row per entity. Each row links to its
+render sprite by index, so systems update whole columns with NumPy and only
+the results are written to the sprites::
+
+    store = EntityStore()
+    store.define("phase")
+    i = store.add(sprite, x=sprite.center_x, y=sprite.center_y, phase=0.5)
+    live = store.indices()
+    store["phase"][live] += 0.01
+    store.write_back(live)
+
+Column views are only valid until the next add(), which may grow them.
+"""
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import arcade
+
+
+class Entity:
+    """ One row of an EntityStore, read and written as attributes. """
+    __slots__ = ("store", "index")
+
+    def __init__(self, store: "EntityStore", index: int):
+        object.__setattr__(self, "store", store)
+        object.__setattr__(self, "index", index)
+
+    @property
+    def sprite(self) -> Optional[arcade.Sprite]:
+        return self.store.sprites[self.index]
+
+    def __getattr__(self, name):
+        try:
+            return self.store.columns[name][self.index].item()
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        if name not in self.store.columns:
+            raise AttributeError(f"EntityStore has no column {name!r}")
+        self.store.columns[name][self.index] = value
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={column[self.index]}" for name, column in self.store.columns.items())
+        return f"Entity({self.index}, {values})"
+
+
+class EntityStore:
+    """
+    Rows of typed NumPy columns, one per entity, with a sprite per row.
+
+    Every store has x and y columns. Removed rows are reused by later adds,
+    so indices stay stable for as long as an entity lives.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        # Rows handed out so far, live or removed, columns are valid up to here
+        self.count = 0
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.columns: Dict[str, np.ndarray] = {}
+        self.defaults = {}
+        self.sprites: List[Optional[arcade.Sprite]] = []
+        self._free = []
+        self.define("x")
+        self.define("y")
+
+    def define(self, name: str, dtype=np.float64, default=0):
+        """ Add a column, rows that exist already get default. """
+        if name in self.columns:
+            return
+        self.columns[name] = np.full(self.capacity, default, dtype=dtype)
+        self.defaults[name] = default
+
+    def _grow(self):
+        self.capacity *= 2
+        self.alive = np.concatenate((self.alive, np.zeros(self.capacity - len(self.alive), dtype=bool)))
+        for name, column in self.columns.items():
+            extra = np.full(self.capacity - len(column), self.defaults[name], dtype=column.dtype)
+            self.columns[name] = np.concatenate((column, extra))
+
+    def add(self, sprite: arcade.Sprite = None, **values) -> int:
+        """ Store a new entity, values are its columns, returns its row index. """
+        if self._free:
+            index = self._free.pop()
+            self.sprites[index] = sprite
+        else:
+            if self.count == self.capacity:
+                self._grow()
+            index = self.count
+            self.count += 1
+            self.sprites.append(sprite)
+        # Reused and cleared rows still hold the values of their last entity
+        for name, column in self.columns.items():
+            column[index] = self.defaults[name]
+        self.alive[index] = True
+        for name, value in values.items():
+            self.columns[name][index] = value
+        return index
+
+    def remove(self, index: int):
+        if not self.alive[index]:
+            return
+        self.alive[index] = False
+        self.sprites[index] = None
+        self._free.append(index)
+
+    def clear(self):
+        self.count = 0
+        self.alive[:] = False
+        self.sprites = []
+        self._free = []
+
+    def __len__(self) -> int:
+        return self.count - len(self._free)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """ The column called name, one value per row handed out. """
+        return self.columns[name][:self.count]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def indices(self) -> np.ndarray:
+        """ Rows of the live entities. """
+        if not self._free:
+            return np.arange(self.count)
+        return np.flatnonzero(self.alive[:self.count])
+
+    def entity(self, index: int) -> Entity:
+        return Entity(self, index)
+
+    def write_back(self, indices: Sequence[int] = None, scale: str = None):
+        """ Move the sprites of indices, all live ones by default, to their x and y, and scale them. """
+        indices = self.indices() if indices is None else np.asarray(indices, dtype=np.int64)
+        sprites = self.sprites
+        xs = self.columns["x"][indices].tolist()
+        ys = self.columns["y"][indices].tolist()
+        if scale is None:
+            for i, x, y in zip(indices.tolist(), xs, ys):
+                sprites[i].position = (x, y)
+            return
+        for i, x, y, s in zip(indices.tolist(), xs, ys, self.columns[scale][indices].tolist()):
+            sprite = sprites[i]
+            sprite.position = (x, y)
+            sprite.scale = s
+
+    def state(self):
+        """ Copy of every row, for set_state(). """
+        return (self.count, self.alive.copy(), {name: column.copy() for name, column in self.columns.items()},
+                list(self.sprites), list(self._free))
+
+    def set_state(self, state):
+        count, alive, columns, sprites, free = state
+        self.count = count
+        self.alive = alive.copy()
+        self.capacity = len(alive)
+        self.columns = {name: column.copy() for name, column in columns.items()}
+        self.sprites = list(sprites)
+        self._free = list(free)
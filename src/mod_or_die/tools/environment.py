@@ -0,0 +1,212 @@
+"""
+Batched gym-style environments for training agents on levels.
+
+A ``LevelEnv`` wraps one headless level. Actions are the solver's six held
+inputs (see tools.solver.ACTIONS), observations come from ``level.observe()``
+and an episode ends when the level is won or ``game_over()`` is called.
+``VecEnv`` steps N of them in lockstep and returns NumPy batches. With
+``workers`` it spreads the instances over that many processes::
+
+    env = VecEnv("mod_or_die.levels.level_01:L1", 64, {"speed": 5, "title": "L1"}, workers=4)
+    observations = env.reset()
+    observations, rewards, dones, infos = env.step(np.random.randint(0, 6, 64))
+
+Finished instances reset themselves. The observation that ended their episode
+is in ``infos[i]["terminal_observation"]``, like gym's vectorized envs.
+"""
+from multiprocessing import Pipe, Process
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+import arcade
+from .headless import load_level_class
+from .snapshot import LevelSnapshot
+from .solver import ACTIONS, action_events
+
+
+class LevelEnv:
+    """
+    One headless level as an environment.
+
+    Rewards are the distance moved right times ``progress_reward``, plus
+    ``win_reward`` on a win and ``death_reward`` on a death. reset() restores a
+    snapshot instead of running setup() again, unless the episode was won:
+    win() replaces the level's sprite lists, so only setup() can undo it.
+    """
+
+    def __init__(self, spec: str, kwargs: Dict = None, attributes: Dict = None, frames_per_step: int = 4,
+                 max_steps: int = 1000, progress_reward: float = 0.01, win_reward: float = 10.0,
+                 death_reward: float = -10.0):
+        self.level = load_level_class(spec)(headless=True, **(kwargs or {}))
+        for name, value in (attributes or {}).items():
+            setattr(self.level, name, value)
+        self.level.setup()
+        self.frames_per_step = frames_per_step
+        self.max_steps = max_steps
+        self.progress_reward = progress_reward
+        self.win_reward = win_reward
+        self.death_reward = death_reward
+
+        self.died = False
+        self.level.game_over = self._died
+        self.start = LevelSnapshot(self.level)
+        self.steps = 0
+        self.action_count = len(ACTIONS)
+        self.observation_size = len(self.level.observe())
+
+    def _died(self):
+        self.died = True
+
+    def _rebuild(self):
+        """ Run setup() again and snapshot it, win() replaces the lists the old snapshot holds. """
+        level = self.level
+        level.is_game_over = False
+        level.score = self.start.score
+        level.set_view(self.start.view_left, self.start.view_bottom)
+        level.setup()
+        self.start = LevelSnapshot(level)
+
+    def reset(self) -> np.ndarray:
+        level = self.level
+        if level.is_game_over or not self.start.matches(level):
+            self._rebuild()
+        else:
+            self.start.restore(level)
+            level.chunks.update(level.player.center_x)
+        self.died = False
+        self.steps = 0
+        return level.observe()
+
+    def step(self, action: int) -> Tuple[np.ndarray, float, bool, Dict]:
+        level = self.level
+        for kind, key_name in action_events(int(action)):
+            key = getattr(arcade.key, key_name)
+            if kind == "press":
+                level.on_key_press(key, 0)
+            else:
+                level.on_key_release(key, 0)
+
+        x = level.player.center_x
+        for _ in range(self.frames_per_step):
+            level.update(1 / 60)
+            if self.died or level.is_game_over:
+                break
+        self.steps += 1
+
+        won = level.is_game_over and not self.died
+        reward = (level.player.center_x - x) * self.progress_reward
+        if won:
+            reward += self.win_reward
+        elif self.died:
+            reward += self.death_reward
+        done = won or self.died or self.steps >= self.max_steps
+        info = {"won": won, "died": self.died, "score": level.score, "steps": self.steps}
+        return level.observe(), reward, done, info
+
+
+class _Batch:
+    """ A list of LevelEnvs stepped together, used in-process and inside each worker. """
+
+    def __init__(self, count: int, args: Tuple, options: Dict):
+        self.envs = [LevelEnv(*args, **options) for _ in range(count)]
+
+    def reset(self) -> np.ndarray:
+        return np.stack([env.reset() for env in self.envs])
+
+    def step(self, actions: Sequence[int]):
+        observations, rewards, dones, infos = [], [], [], []
+        for env, action in zip(self.envs, actions):
+            observation, reward, done, info = env.step(action)
+            if done:
+                info["terminal_observation"] = observation
+                observation = env.reset()
+            observations.append(observation)
+            rewards.append(reward)
+            dones.append(done)
+            infos.append(info)
+        return np.stack(observations), np.array(rewards, dtype=np.float32), np.array(dones), infos
+
+
+def _worker(connection, count: int, args: Tuple, options: Dict):
+    batch = _Batch(count, args, options)
+    connection.send((batch.envs[0].observation_size, batch.envs[0].action_count))
+    while True:
+        command, data = connection.recv()
+        if command == "step":
+            connection.send(batch.step(data))
+        elif command == "reset":
+            connection.send(batch.reset())
+        elif command == "close":
+            connection.close()
+            return
+
+
+class VecEnv:
+    """
+    N level instances stepped in lockstep.
+
+    With workers > 1 the instances are split over that many processes, each
+    stepping its share while the others do the same.
+    """
+
+    def __init__(self, spec: str, count: int, kwargs: Dict = None, attributes: Dict = None,
+                 workers: int = None, **options):
+        self.count = count
+        args = (spec, kwargs, attributes)
+        self.workers = min(workers or 1, count)
+        self._local = None
+        self._pipes = []
+        self._processes = []
+        self._sizes = []
+
+        if self.workers == 1:
+            self._local = _Batch(count, args, options)
+            env = self._local.envs[0]
+            self.observation_size, self.action_count = env.observation_size, env.action_count
+            return
+
+        for i in range(self.workers):
+            size = count // self.workers + (i < count % self.workers)
+            parent, child = Pipe()
+            process = Process(target=_worker, args=(child, size, args, options), daemon=True)
+            process.start()
+            child.close()
+            self._pipes.append(parent)
+            self._processes.append(process)
+            self._sizes.append(size)
+        self.observation_size, self.action_count = [pipe.recv() for pipe in self._pipes][0]
+
+    def reset(self) -> np.ndarray:
+        """ Restart every instance, returns a (count, observation_size) array. """
+        if self._local is not None:
+            return self._local.reset()
+        for pipe in self._pipes:
+            pipe.send(("reset", None))
+        return np.concatenate([pipe.recv() for pipe in self._pipes])
+
+    def step(self, actions: Sequence[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[Dict]]:
+        """ One action per instance, returns batched observations, rewards, dones and infos. """
+        actions = np.asarray(actions, dtype=np.int64)
+        if self._local is not None:
+            return self._local.step(actions)
+
+        start = 0
+        for pipe, size in zip(self._pipes, self._sizes):
+            pipe.send(("step", actions[start:start + size]))
+            start += size
+        results = [pipe.recv() for pipe in self._pipes]
+        return (np.concatenate([r[0] for r in results]), np.concatenate([r[1] for r in results]),
+                np.concatenate([r[2] for r in results]), [info for r in results for info in r[3]])
+
+    def close(self):
+        for pipe in self._pipes:
+            pipe.send(("close", None))
+        for process in self._processes:
+            process.join()
+        self._pipes = []
+        self._processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
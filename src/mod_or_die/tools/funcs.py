@@ -1,3 +1,9 @@
+"""
+Frame-stepped number generators, each next() is one frame.
+
+Animations move with tools.motion instead, which evaluates the same kind of
+curves at an absolute time for a whole group at once.
+"""
 from random import random
 import math
 
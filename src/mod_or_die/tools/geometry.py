@@ -0,0 +1,87 @@
+"""
+Static level geometry compiler.
+
+Turns the solid tiles of a level into as few collision rectangles as
+possible. The merged rectangles are invisible sprites that only the physics
+engine sees, the tiles themselves keep being drawn as before.
+"""
+from collections import defaultdict
+from typing import Iterable, List, Tuple
+import arcade
+
+# Tiles closer than this, in pixels, count as touching
+TOLERANCE = 0.5
+
+Rect = Tuple[float, float, float, float]
+
+
+def _is_mergeable(sprite: arcade.Sprite) -> bool:
+    """ Only plain, unrotated, non-moving boxes can be merged. """
+    return (sprite._points is None and sprite.angle == 0
+            and sprite.change_x == 0 and sprite.change_y == 0
+            and sprite.boundary_left is None and sprite.boundary_right is None
+            and sprite.boundary_top is None and sprite.boundary_bottom is None)
+
+
+def _merge_runs(rects: List[Rect], axis: int) -> List[Rect]:
+    """
+    Merge rectangles sharing the same extent on the other axis into runs.
+
+    Rects are (left, right, bottom, top). axis 0 merges along x, axis 1 along y.
+    """
+    lo, hi = (0, 1) if axis == 0 else (2, 3)
+    other = (2, 3) if axis == 0 else (0, 1)
+
+    lanes = defaultdict(list)
+    for rect in rects:
+        lanes[round(rect[other[0]], 2), round(rect[other[1]], 2)].append(rect)
+
+    merged = []
+    for lane in lanes.values():
+        lane.sort(key=lambda r: r[lo])
+        run = list(lane[0])
+        for rect in lane[1:]:
+            if rect[lo] <= run[hi] + TOLERANCE:
+                run[hi] = max(run[hi], rect[hi])
+            else:
+                merged.append(tuple(run))
+                run = list(rect)
+        merged.append(tuple(run))
+    return merged
+
+
+def merge_rects(rects: List[Rect]) -> List[Rect]:
+    """ Coalesce touching axis-aligned rectangles into rows, then stack equal rows. """
+    if not rects:
+        return []
+    return _merge_runs(_merge_runs(rects, axis=0), axis=1)
+
+
+def _body(rect: Rect) -> arcade.Sprite:
+    left, right, bottom, top = rect
+    body = arcade.Sprite(center_x=(left + right) / 2, center_y=(bottom + top) / 2)
+    body.width = right - left
+    body.height = top - bottom
+    return body
+
+
+def compile_collision(blocks: Iterable[arcade.Sprite], rects: Iterable[Rect] = ()) -> arcade.SpriteList:
+    """
+    Build the collision list for a level from its solid tiles.
+
+    Plain static tiles are merged into spans. Anything else (moving platforms,
+    custom hit boxes, rotated tiles) is passed through untouched so it keeps
+    its exact shape and behaviour. rects are the boxes of plain tiles that are
+    already known, so their sprites need not be measured again.
+    """
+    collision = arcade.SpriteList()
+    rects = list(rects)
+    for block in blocks:
+        if _is_mergeable(block):
+            rects.append((block.left, block.right, block.bottom, block.top))
+        else:
+            collision.append(block)
+
+    for rect in merge_rects(rects):
+        collision.append(_body(rect))
+    return collision
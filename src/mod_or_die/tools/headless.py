@@ -0,0 +1,140 @@
+"""
+Headless fixed-timestep simulation of levels.
+
+Runs a level's ``setup()`` and ``update(delta_time)`` without a window or GL
+context, as fast as the CPU allows. Key events come from a script instead of
+the keyboard, which makes runs repeatable for regression tests and lets the
+simulation be benchmarked on its own.
+
+From the command line::
+
+    python -m mod_or_die.tools.headless mod_or_die.levels.level_01:L1 \\
+        --steps 3600 --arg speed=5 --arg title=L1 --press 0:RIGHT
+"""
+from collections import defaultdict
+from typing import Dict, List, Tuple, Union
+import argparse
+import importlib
+import time
+import arcade
+
+# frame -> [("press" | "release", key name such as "RIGHT" or "W", or a key code)]
+Script = Dict[int, List[Tuple[str, str]]]
+
+
+class SimResult:
+    """ What a headless run did and how fast it did it. """
+
+    def __init__(self, steps: int, seconds: float, level):
+        self.steps = steps
+        self.seconds = seconds
+        self.steps_per_second = steps / seconds if seconds > 0 else float("inf")
+        self.player_x = level.player.center_x
+        self.player_y = level.player.center_y
+        self.score = level.score
+        self.is_game_over = level.is_game_over
+
+    def as_dict(self) -> Dict:
+        return dict(self.__dict__)
+
+    def __repr__(self):
+        return (f"SimResult(steps={self.steps}, steps_per_second={self.steps_per_second:.0f}, "
+                f"player=({self.player_x:.2f}, {self.player_y:.2f}), score={self.score})")
+
+
+def load_level_class(spec: str):
+    """ Resolve "package.module:Class" to the level class. """
+    module_name, _, class_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class HeadlessRunner:
+    """
+    Drives one headless level instance with a fixed timestep.
+    """
+
+    def __init__(self, level_class, dt: float = 1 / 60, **kwargs):
+        self.dt = dt
+        self.level = level_class(headless=True, **kwargs)
+        self.level.setup()
+        self.frame = 0
+
+    def send(self, action: str, key_name: Union[str, int]):
+        key = key_name if isinstance(key_name, int) else getattr(arcade.key, key_name.upper())
+        if action == "press":
+            self.level.on_key_press(key, 0)
+        elif action == "release":
+            self.level.on_key_release(key, 0)
+        else:
+            raise ValueError(f"Unknown key action {action!r}, expected 'press' or 'release'")
+
+    def step(self, events: List[Tuple[str, str]] = ()):
+        for action, key_name in events:
+            self.send(action, key_name)
+        self.level.update(self.dt)
+        self.frame += 1
+
+    def run(self, steps: int, script: Script = None, stop_on_win: bool = False) -> SimResult:
+        """ Advance the level by steps frames, feeding script events on their frame. """
+        script = script or {}
+        start = time.perf_counter()
+        done = 0
+        for _ in range(steps):
+            self.step(script.get(self.frame, ()))
+            done += 1
+            if stop_on_win and self.level.is_game_over:
+                break
+        return SimResult(done, time.perf_counter() - start, self.level)
+
+
+def parse_script(presses: List[str], releases: List[str] = ()) -> Script:
+    """ Turn "frame:KEY" strings such as "0:RIGHT" or "30:W" into a Script. """
+    script = defaultdict(list)
+    for action, events in (("press", presses), ("release", releases)):
+        for event in events:
+            frame, _, key_name = event.partition(":")
+            script[int(frame)].append((action, key_name))
+    return dict(script)
+
+
+def _value(text: str):
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a level without a window.")
+    parser.add_argument("level", help="level class, e.g. mod_or_die.levels.level_01:L1")
+    parser.add_argument("--steps", type=int, default=3600)
+    parser.add_argument("--dt", type=float, default=1 / 60)
+    parser.add_argument("--arg", action="append", default=[], help="level argument as name=value")
+    parser.add_argument("--press", action="append", default=[], help="frame:KEY to press")
+    parser.add_argument("--release", action="append", default=[], help="frame:KEY to release")
+    parser.add_argument("--stop-on-win", action="store_true")
+    parser.add_argument("--telemetry", help="write frame timings to this .jsonl or .csv file")
+    parser.add_argument("--record", help="write the key events to this file, see tools.replay")
+    args = parser.parse_args()
+
+    kwargs = dict((name, _value(value)) for name, _, value in (a.partition("=") for a in args.arg))
+    runner = HeadlessRunner(load_level_class(args.level), dt=args.dt, **kwargs)
+    if args.telemetry:
+        runner.level.enable_telemetry(args.steps + 1)
+    if args.record:
+        from .replay import InputRecorder
+        runner.level.recorder = InputRecorder(args.level, kwargs, args.dt)
+    result = runner.run(args.steps, parse_script(args.press, args.release), stop_on_win=args.stop_on_win)
+    print(result)
+    if args.telemetry:
+        # begin() commits the frame in progress
+        runner.level.telemetry.begin()
+        print(f"{runner.level.telemetry.export(args.telemetry)} frames written to {args.telemetry}")
+    if args.record:
+        runner.level.recorder.save(args.record, runner.level)
+
+
+if __name__ == "__main__":
+    main()
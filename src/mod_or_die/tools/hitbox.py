@@ -0,0 +1,154 @@
+"""
+Persistent hit-box cache.
+
+Hit boxes are the box around an image's opaque pixels, relative to the image
+centre, so transparent margins around a sprite do not collide. Working them out
+means decoding the image and scanning its alpha channel, so the results are
+kept in a JSON file keyed by a hash of the image content. A level load only
+stats the file, and it only rescans an image when its content changed. Levels
+never write the file, since it sits inside the installed package; fill it
+ahead of time with::
+
+    python -m mod_or_die.tools.hitbox
+"""
+from typing import Callable, Dict, Tuple
+import argparse
+import hashlib
+import json
+import os
+import numpy as np
+from PIL import Image
+
+RESOURCES = os.path.abspath(os.path.dirname(__file__) + "/../resources/arcade/")
+FOLDERS = ("character_sprites", "tiles")
+INDEX = "hitboxes.json"
+
+# Alpha values at or below this do not collide
+THRESHOLD = 0
+
+Points = Tuple[Tuple[float, float], ...]
+
+
+def compute(image: Image.Image, threshold: int = THRESHOLD) -> Points:
+    """ Corners of the box around the opaque pixels, in arcade's y-up, centre-relative space. """
+    width, height = image.size
+    if "A" not in image.getbands():
+        box = (0, 0, width, height)
+    else:
+        alpha = np.asarray(image.getchannel("A")) > threshold
+        cols = np.flatnonzero(alpha.any(axis=0))
+        rows = np.flatnonzero(alpha.any(axis=1))
+        if len(cols) == 0:
+            box = (0, 0, width, height)
+        else:
+            box = (cols[0], rows[0], cols[-1] + 1, rows[-1] + 1)
+
+    left, top, right, bottom = (float(v) for v in box)
+    x0, x1 = left - width / 2, right - width / 2
+    y0, y1 = height / 2 - bottom, height / 2 - top
+    return (x0, y0), (x1, y0), (x1, y1), (x0, y1)
+
+
+def file_hash(path: str) -> str:
+    with open(path, "rb") as fh:
+        return hashlib.sha1(fh.read()).hexdigest()
+
+
+def _read(path: str) -> Image.Image:
+    image = Image.open(path)
+    image.load()
+    return image
+
+
+class HitBoxCache:
+    """
+    Hit boxes by image content hash, stored in a JSON file.
+
+    Every file remembers the size, mtime and hash it had when it was last seen,
+    so an unchanged file is never read again, and a changed file whose content
+    is already known (a copy, or a revert) is hashed but not rescanned.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files = {}
+        self.boxes = {}
+        self.computed = 0
+        self.dirty = False
+        if os.path.exists(path):
+            try:
+                with open(path) as fh:
+                    data = json.load(fh)
+                self.files = data["files"]
+                self.boxes = data["boxes"]
+            except (ValueError, KeyError):
+                # Corrupt or outdated, it gets rebuilt as images load
+                pass
+
+    def get(self, path: str, loader: Callable[[], Image.Image] = None) -> Points:
+        """ Hit box of the image at path, loader() decodes it if it has to be scanned. """
+        # Relative to the cache so the file stays valid when the tree moves
+        name = os.path.relpath(os.path.abspath(path), os.path.dirname(os.path.abspath(self.path)))
+        stat = os.stat(path)
+        seen = self.files.get(name)
+        if seen is not None and seen[0] == stat.st_size and seen[1] == stat.st_mtime:
+            digest = seen[2]
+        else:
+            digest = file_hash(path)
+            self.files[name] = [stat.st_size, stat.st_mtime, digest]
+            self.dirty = True
+
+        box = self.boxes.get(digest)
+        if box is None:
+            box = compute(loader() if loader is not None else _read(path))
+            self.boxes[digest] = box
+            self.computed += 1
+            self.dirty = True
+        return tuple(tuple(point) for point in box)
+
+    def save(self):
+        """ Write the cache if anything changed since it was loaded. """
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp = self.path + ".tmp"
+        with open(temp, "w") as fh:
+            json.dump({"files": self.files, "boxes": self.boxes}, fh, sort_keys=True)
+        os.replace(temp, self.path)
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+
+def transform(points: Points, scale: float = 1, mirrored: bool = False) -> Points:
+    """ Points of a hit box for a sprite drawn at scale, optionally mirrored left to right. """
+    flip = -1 if mirrored else 1
+    return tuple((flip * x * scale, y * scale) for x, y in points)
+
+
+def build(root: str = RESOURCES, folders=FOLDERS, out: str = None) -> Dict[str, int]:
+    cache = HitBoxCache(out or os.path.join(root, INDEX))
+    images = 0
+    for folder in folders:
+        for name in sorted(os.listdir(os.path.join(root, folder))):
+            if name.lower().endswith(".png"):
+                cache.get(os.path.join(root, folder, name))
+                images += 1
+    cache.save()
+    return {"images": images, "computed": cache.computed, "boxes": len(cache)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute sprite hit boxes.")
+    parser.add_argument("--root", default=RESOURCES)
+    parser.add_argument("--folders", default=",".join(FOLDERS))
+    parser.add_argument("--out", default=None, help="defaults to <root>/" + INDEX)
+    args = parser.parse_args()
+
+    stats = build(args.root, args.folders.split(","), args.out)
+    print(f"{stats['images']} images, {stats['computed']} scanned, {stats['boxes']} hit boxes cached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Render caching for tile layers.
+
+A layer whose sprites never move relative to each other is baked into a few
+large textures and drawn as those instead of one quad per tile. "static"
+layers never move at all. "rigid" layers move as one piece, like L1's rising
+water, and their baked textures follow the layer's first sprite.
+
+Textures are cut along a fixed world grid of ``cell`` pixel squares, so a
+chunk streaming in or out only rebakes the cells it touches, and each texture
+is trimmed to the tiles inside its cell. A rebaked cell keeps its sprite,
+SpriteList and texture name, and its old image and GL texture are dropped, so
+rebaking does not pile up textures. Only cells inside the view are drawn.
+"""
+from typing import Dict, List, Tuple
+import itertools
+import math
+import arcade
+import PIL.Image
+
+STATIC, RIGID = "static", "rigid"
+
+_layers = itertools.count()
+
+
+def _image(sprite: arcade.Sprite) -> PIL.Image.Image:
+    """ The sprite's texture at the size it is drawn. """
+    image = sprite.texture.image.convert("RGBA")
+    size = (int(round(sprite.width)), int(round(sprite.height)))
+    if image.size != size:
+        image = image.resize(size, PIL.Image.BILINEAR)
+    return image
+
+
+def _bakeable(sprite: arcade.Sprite) -> bool:
+    return sprite.texture is not None and sprite.angle == 0 and sprite.alpha == 255
+
+
+class BakedLayer:
+    """ A SpriteList drawn from cached textures. """
+
+    def __init__(self, sprite_list: arcade.SpriteList, mode: str = STATIC, cell: int = 2048):
+        if mode not in (STATIC, RIGID):
+            raise ValueError(f"Unknown layer mode {mode!r}, expected {STATIC!r} or {RIGID!r}")
+        self.sprite_list = sprite_list
+        self.name = f"baked:{next(_layers)}"
+        self.mode = mode
+        self.cell = cell
+        # (column, row) -> (signature, SpriteList holding the baked sprite)
+        self.cells: Dict[Tuple[int, int], Tuple[tuple, arcade.SpriteList]] = {}
+        # Sprites that cannot be baked (rotated, faded), drawn as they are
+        self.loose = arcade.SpriteList()
+        self.anchor = None
+        self.offset = (0.0, 0.0)
+        self.dirty = True
+        # Brings the sprites up to date before a bake, for animations that
+        # only keep the first one moving, see WaveGroup.bake()
+        self.sync = None
+
+    def _cells_of(self, sprite: arcade.Sprite):
+        cell = self.cell
+        columns = range(math.floor(sprite.left / cell), math.floor((sprite.right - 1e-6) / cell) + 1)
+        rows = range(math.floor(sprite.bottom / cell), math.floor((sprite.top - 1e-6) / cell) + 1)
+        return itertools.product(columns, rows)
+
+    def _bake_cell(self, key: Tuple[int, int], sprites: List[arcade.Sprite],
+                   baked_list: arcade.SpriteList = None) -> arcade.SpriteList:
+        """ Bake sprites into the texture of one cell, into baked_list if the cell had one. """
+        cell = self.cell
+        # The part of the cell the sprites cover, in whole pixels
+        left = max(key[0] * cell, math.floor(min(s.left for s in sprites)))
+        right = min((key[0] + 1) * cell, math.ceil(max(s.right for s in sprites)))
+        bottom = max(key[1] * cell, math.floor(min(s.bottom for s in sprites)))
+        top = min((key[1] + 1) * cell, math.ceil(max(s.top for s in sprites)))
+
+        width, height = right - left, top - bottom
+        canvas = PIL.Image.new("RGBA", (width, height))
+        for sprite in sprites:
+            image = _image(sprite)
+            x = int(round(sprite.left - left))
+            y = int(round(top - sprite.top))
+            # alpha_composite cannot take negative offsets, crop what hangs out instead
+            crop = (max(0, -x), max(0, -y), min(image.width, width - x), min(image.height, height - y))
+            if crop[0] < crop[2] and crop[1] < crop[3]:
+                canvas.alpha_composite(image.crop(crop), (x + crop[0], y + crop[1]))
+
+        texture = arcade.Texture(f"{self.name}:{key[0]},{key[1]}", canvas)
+        if baked_list is None:
+            baked = arcade.Sprite()
+            baked.texture = texture
+            baked.center_x = left + width / 2
+            baked.center_y = bottom + height / 2
+            baked_list = arcade.SpriteList()
+            baked_list.append(baked)
+            return baked_list
+
+        # The list knows the name already and would keep drawing its old
+        # image, forget that atlas, and the GL texture holding it, first
+        baked_list.array_of_images = None
+        baked_list.array_of_texture_names = []
+        baked_list._texture = None
+        baked = baked_list[0]
+        baked.texture = texture
+        baked.position = (left + width / 2, bottom + height / 2)
+        return baked_list
+
+    def rebake(self):
+        """ Rebake the cells whose sprites changed since the last bake. """
+        if self.sync is not None:
+            self.sync()
+        members: Dict[Tuple[int, int], List[arcade.Sprite]] = {}
+        loose = []
+        for sprite in self.sprite_list:
+            if not _bakeable(sprite):
+                loose.append(sprite)
+                continue
+            for key in self._cells_of(sprite):
+                members.setdefault(key, []).append(sprite)
+
+        cells = {}
+        for key, sprites in members.items():
+            signature = tuple((s.texture.name, s.center_x, s.center_y, s.width, s.height) for s in sprites)
+            old = self.cells.get(key)
+            # Kept cells must not carry a rigid offset into the new bake
+            if old is not None and old[0] == signature and self.offset == (0.0, 0.0):
+                cells[key] = old
+            else:
+                cells[key] = (signature, self._bake_cell(key, sprites, old[1] if old is not None else None))
+        self.cells = cells
+
+        self.loose = arcade.SpriteList()
+        for sprite in loose:
+            self.loose.append(sprite)
+
+        first = self.sprite_list[0] if len(self.sprite_list) else None
+        self.anchor = (first, first.center_x, first.center_y) if first is not None else None
+        self.offset = (0.0, 0.0)
+        self.dirty = False
+
+    def _follow(self):
+        """ Move the baked cells with a rigid layer. """
+        if self.anchor is None:
+            return
+        sprite, x, y = self.anchor
+        offset = (sprite.center_x - x, sprite.center_y - y)
+        if offset == self.offset:
+            return
+        dx, dy = offset[0] - self.offset[0], offset[1] - self.offset[1]
+        for _, baked_list in self.cells.values():
+            baked = baked_list[0]
+            baked.position = (baked.center_x + dx, baked.center_y + dy)
+        self.offset = offset
+
+    def draw(self, view: Tuple[float, float, float, float] = None):
+        """ Draw the cells overlapping view (left, right, bottom, top), or all of them. """
+        if self.dirty:
+            self.rebake()
+        if self.mode == RIGID:
+            self._follow()
+
+        for _, baked_list in self.cells.values():
+            baked = baked_list[0]
+            if view is not None and (baked.left > view[1] or baked.right < view[0]
+                                     or baked.bottom > view[3] or baked.top < view[2]):
+                continue
+            baked_list.draw()
+        if len(self.loose):
+            self.loose.draw()
@@ -0,0 +1,147 @@
+"""
+Declarative level maps and their compiled binary form.
+
+A level map is a dict (or a JSON file holding one)::
+
+    {
+        "layers": {
+            # asset list -> row -> column -> tile name, row 0 at the bottom
+            "block": {0: {0: "grassLeft", 1: "grassMid", 2: "grassRight"}},
+        },
+        "objects": [
+            # sprites created as soon as the level loads, named ones are
+            # reachable through BaseLevel.map_objects
+            {"name": "exit", "list": "statics", "tile": "signExit", "x": 6400, "y": 185},
+        ],
+    }
+
+Cells are ``tile_size`` pixels wide (two tile radii by default) and a cell's
+sprite is centered on (column * tile_size, row * tile_size + tile_size / 2),
+the same grid BaseLevel.draw_map uses.
+
+``compile_map`` turns that into a flat record array, ``save`` writes it as a
+small JSON header followed by the raw records, and ``load`` memory-maps the
+records back so a level of any size loads with one read.
+
+Compile from the command line with
+``python -m mod_or_die.tools.level_format level.json level.lvl``.
+"""
+from typing import Dict, List, Union
+import json
+import os
+import sys
+import numpy as np
+
+MAGIC = b"MODLVL1\0"
+ALIGN = 16
+
+RECORD = np.dtype([("tile", "<u2"), ("list", "<u1"), ("pad", "<u1"), ("x", "<f4"), ("y", "<f4")])
+# Distinct tiles and asset lists the record fields can index
+MAX_TILES = np.iinfo(RECORD["tile"]).max + 1
+MAX_LISTS = np.iinfo(RECORD["list"]).max + 1
+
+
+class LevelMap:
+    """ A compiled level: tile and list name tables, placement records and objects. """
+
+    def __init__(self, tiles: List[str], lists: List[str], records: np.ndarray,
+                 objects: List[Dict] = None, tile_size: float = 128):
+        self.tiles = tiles
+        self.lists = lists
+        self.records = records
+        self.objects = objects or []
+        self.tile_size = tile_size
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+def compile_map(source: Dict, tile_size: float = 128) -> LevelMap:
+    """ Flatten a declarative map into a LevelMap. """
+    tile_size = source.get("tile_size", tile_size)
+    tiles = []
+    tile_ids = {}
+    lists = []
+    rows = []
+
+    for list_name, grid in source.get("layers", {}).items():
+        list_id = len(lists)
+        lists.append(list_name)
+        for row, columns in grid.items():
+            for column, tile in columns.items():
+                if tile not in tile_ids:
+                    tile_ids[tile] = len(tiles)
+                    tiles.append(tile)
+                rows.append((tile_ids[tile], list_id, 0,
+                             int(column) * tile_size,
+                             int(row) * tile_size + tile_size / 2))
+
+    # NumPy would wrap larger ids around into other tiles without a word
+    if len(tiles) > MAX_TILES:
+        raise ValueError(f"Level map uses {len(tiles)} distinct tiles, the format holds at most {MAX_TILES}")
+    if len(lists) > MAX_LISTS:
+        raise ValueError(f"Level map uses {len(lists)} asset lists, the format holds at most {MAX_LISTS}")
+
+    records = np.array(rows, dtype=RECORD)
+    # Sorted by x so chunks are contiguous slices of the file
+    records = records[np.argsort(records["x"], kind="stable")]
+    return LevelMap(tiles, lists, records, list(source.get("objects", [])), tile_size)
+
+
+def save(level_map: LevelMap, path: str):
+    header = json.dumps({
+        "tiles": level_map.tiles,
+        "lists": level_map.lists,
+        "objects": level_map.objects,
+        "tile_size": level_map.tile_size,
+        "count": len(level_map.records),
+    }).encode("utf-8")
+    offset = len(MAGIC) + 4 + len(header)
+    padding = -offset % ALIGN
+
+    with open(path, "wb") as fh:
+        fh.write(MAGIC)
+        fh.write(np.uint32(len(header) + padding).tobytes())
+        fh.write(header + b" " * padding)
+        fh.write(level_map.records.astype(RECORD, copy=False).tobytes())
+
+
+def load(source: Union[str, Dict, LevelMap], tile_size: float = 128) -> LevelMap:
+    """
+    Load a level map from a compiled file, a JSON file or a dict.
+    Compiled records are memory-mapped, not read into Python objects.
+    """
+    if isinstance(source, LevelMap):
+        return source
+    if isinstance(source, dict):
+        return compile_map(source, tile_size)
+
+    with open(source, "rb") as fh:
+        magic = fh.read(len(MAGIC))
+        if magic != MAGIC:
+            fh.seek(0)
+            return compile_map(json.load(fh), tile_size)
+        header_size = int(np.frombuffer(fh.read(4), dtype=np.uint32)[0])
+        header = json.loads(fh.read(header_size).decode("utf-8"))
+
+    offset = len(MAGIC) + 4 + header_size
+    if header["count"]:
+        records = np.memmap(source, dtype=RECORD, mode="r", offset=offset, shape=(header["count"],))
+    else:
+        records = np.zeros(0, dtype=RECORD)
+    return LevelMap(header["tiles"], header["lists"], records, header["objects"], header["tile_size"])
+
+
+def main(argv: List[str]):
+    if len(argv) != 2:
+        print("usage: python -m mod_or_die.tools.level_format <level.json> <level.lvl>")
+        return 1
+    source, target = argv
+    level_map = load(source)
+    save(level_map, target)
+    print(f"{source} -> {target}: {len(level_map)} tiles, {os.path.getsize(target)} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
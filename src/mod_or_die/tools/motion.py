@@ -0,0 +1,120 @@
+"""
+Closed-form motion curves evaluated for whole groups at once.
+
+Every curve is a function of absolute time ``t`` in seconds and takes NumPy
+arrays of per-entity parameters, so a group of any size costs one call and a
+dropped frame cannot put an animation out of step: the next frame simply
+evaluates a later ``t``. This is the time-based form of the frame-stepped
+generators in tools.funcs::
+
+    # scale_generator(x=phase, offset=.5, step=.01) advanced once per frame
+    scale = sine(t, phase=phases, rate=.01 * 60, offset=.5, absolute=True)
+
+Curves that are expensive or evaluated very often can be sampled into a
+LookupTable once and interpolated from then on.
+"""
+from typing import Callable, Dict, Tuple
+import math
+import numpy as np
+
+
+def sine(t: float, phase=0.0, rate=1.0, amplitude=1.0, offset=0.0, absolute: bool = False) -> np.ndarray:
+    """ ``amplitude * sin(phase + rate * t) + offset``, rate in radians per second, abs() of the sine if absolute. """
+    wave = np.sin(np.add(phase, rate * t))
+    if absolute:
+        wave = np.abs(wave)
+    return amplitude * wave + offset
+
+
+def rotation(t: float, x, y, cx: float, cy: float, rate: float, angle: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """ Points (x, y) at t after spinning about (cx, cy) at rate radians per second from angle. """
+    theta = angle + rate * t
+    cos, sin = math.cos(theta), math.sin(theta)
+    dx = np.subtract(x, cx)
+    dy = np.subtract(y, cy)
+    return dx * cos - dy * sin + cx, dx * sin + dy * cos + cy
+
+
+def linear(u):
+    return u
+
+
+def in_quad(u):
+    return u * u
+
+
+def out_quad(u):
+    return u * (2 - u)
+
+
+def in_out_quad(u):
+    return np.where(u < .5, 2 * u * u, 1 - 2 * (1 - u) ** 2)
+
+
+def in_out_sine(u):
+    return .5 - .5 * np.cos(np.pi * u)
+
+
+def smoothstep(u):
+    return u * u * (3 - 2 * u)
+
+
+EASINGS: Dict[str, Callable] = {
+    "linear": linear,
+    "in_quad": in_quad,
+    "out_quad": out_quad,
+    "in_out_quad": in_out_quad,
+    "in_out_sine": in_out_sine,
+    "smoothstep": smoothstep,
+}
+
+
+def tween(t: float, start, end, begin=0.0, duration=1.0, easing: str = "linear") -> np.ndarray:
+    """ From start at time begin to end after duration, held at either end outside of it. """
+    u = np.clip((t - np.asarray(begin, dtype=np.float64)) / duration, 0.0, 1.0)
+    return np.add(start, np.subtract(end, start) * EASINGS[easing](u))
+
+
+def _lattice(cells: np.ndarray, seed) -> np.ndarray:
+    """ A repeatable pseudo-random value in [-1, 1] for every integer lattice point. """
+    h = (cells.astype(np.int64) * 374761393 + np.asarray(seed, dtype=np.int64) * 668265263) & 0xFFFFFFFF
+    h = ((h ^ (h >> 13)) * 1274126177) & 0xFFFFFFFF
+    return (h ^ (h >> 16)) / 0x7FFFFFFF - 1.0
+
+
+def noise(t: float, seed=0, rate=1.0, amplitude=1.0) -> np.ndarray:
+    """
+    Smooth 1D value noise in [-amplitude, amplitude], one independent curve
+    per seed, with about rate random turns per second.
+    """
+    x = np.multiply(rate, t) + np.zeros(np.shape(seed))
+    cell = np.floor(x)
+    u = smoothstep(x - cell)
+    a = _lattice(cell, seed)
+    b = _lattice(cell + 1, seed)
+    return amplitude * (a + (b - a) * u)
+
+
+class LookupTable:
+    """
+    A curve sampled at size points over [start, stop) and linearly interpolated.
+
+    periodic tables wrap their input into the range, use them for curves
+    that repeat, like sine over a full turn.
+    """
+
+    def __init__(self, func: Callable, start: float, stop: float, size: int = 1024, periodic: bool = False):
+        self.start = start
+        self.stop = stop
+        self.periodic = periodic
+        self.x = np.linspace(start, stop, size + 1)
+        self.y = func(self.x)
+
+    def __call__(self, x) -> np.ndarray:
+        if self.periodic:
+            x = np.mod(np.subtract(x, self.start), self.stop - self.start) + self.start
+        return np.interp(x, self.x, self.y)
+
+
+# sin() over one turn, within 3e-7 of np.sin
+SINE_TABLE = LookupTable(np.sin, 0.0, 2 * math.pi, 4096, periodic=True)
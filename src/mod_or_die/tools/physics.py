@@ -0,0 +1,233 @@
+"""
+Platformer physics with a uniform-grid broadphase.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+import math
+import arcade
+from .chunks import remove_sprites
+
+
+class SpatialGrid:
+    """
+    Uniform grid over static sprites.
+
+    Each sprite is filed under every cell its bounding box touches, so a query
+    only looks at the few cells around the sprite being tested instead of
+    the whole list.
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], List[arcade.Sprite]] = defaultdict(list)
+
+    def _span(self, sprite: arcade.Sprite):
+        size = self.cell_size
+        return (math.floor(sprite.left / size), math.floor(sprite.right / size),
+                math.floor(sprite.bottom / size), math.floor(sprite.top / size))
+
+    def insert(self, sprite: arcade.Sprite):
+        x1, x2, y1, y2 = self._span(sprite)
+        for i in range(x1, x2 + 1):
+            for j in range(y1, y2 + 1):
+                self.cells[i, j].append(sprite)
+
+    def remove(self, sprite: arcade.Sprite):
+        x1, x2, y1, y2 = self._span(sprite)
+        for i in range(x1, x2 + 1):
+            for j in range(y1, y2 + 1):
+                cell = self.cells.get((i, j))
+                if cell and sprite in cell:
+                    cell.remove(sprite)
+                    if not cell:
+                        del self.cells[i, j]
+
+    def query(self, sprite: arcade.Sprite) -> Iterable[arcade.Sprite]:
+        """ Return every sprite sharing a cell with sprite, without duplicates. """
+        x1, x2, y1, y2 = self._span(sprite)
+        cells = self.cells
+        found = {}
+        for i in range(x1, x2 + 1):
+            for j in range(y1, y2 + 1):
+                cell = cells.get((i, j))
+                if cell:
+                    for item in cell:
+                        found[id(item)] = item
+        return found.values()
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+
+class GridPhysicsEngine(arcade.PhysicsEnginePlatformer):
+    """
+    Drop-in replacement for ``arcade.PhysicsEnginePlatformer``.
+
+    Blocks that are not moving when the engine is built go into a SpatialGrid,
+    blocks with a velocity are always checked. ``update()`` and ``can_jump()``
+    behave like arcade's, but their cost depends on how many blocks are near
+    the player rather than on the length of the level. Use ``add()`` and
+    ``remove()`` for blocks streamed in and out, and call ``rebuild()`` if
+    blocks are moved by hand.
+    """
+
+    def __init__(self, player_sprite: arcade.Sprite, platforms: arcade.SpriteList,
+                 gravity_constant: float = 0.5, cell_size: float = 128):
+        super().__init__(player_sprite, platforms, gravity_constant)
+        self.cell_size = cell_size
+        self.grid = None
+        self.moving = []
+        self._order = {}
+        self._next = 0
+        self.rebuild()
+
+    def rebuild(self):
+        """ Re-index the platforms. """
+        self.grid = SpatialGrid(self.cell_size)
+        self.moving = []
+        self._order = {}
+        self._next = 0
+        for platform in self.platforms:
+            self._index(platform)
+
+    def _index(self, platform: arcade.Sprite):
+        self._order[id(platform)] = self._next
+        self._next += 1
+        if platform.change_x != 0 or platform.change_y != 0:
+            self.moving.append(platform)
+        else:
+            self.grid.insert(platform)
+
+    def add(self, platforms: Iterable[arcade.Sprite]):
+        """ Add platforms to the engine, e.g. when a level chunk is loaded. """
+        for platform in platforms:
+            self.platforms.append(platform)
+            self._index(platform)
+
+    def remove(self, platforms: Iterable[arcade.Sprite]):
+        """ Take platforms out of the engine, e.g. when a level chunk is evicted. """
+        platforms = list(platforms)
+        for platform in platforms:
+            self._order.pop(id(platform), None)
+            if platform in self.moving:
+                self.moving.remove(platform)
+            else:
+                self.grid.remove(platform)
+        remove_sprites(self.platforms, platforms)
+
+    def collisions(self, sprite: arcade.Sprite) -> List[arcade.Sprite]:
+        """ Same result as ``arcade.check_for_collision_with_list`` against the platforms. """
+        candidates = list(self.grid.query(sprite))
+        candidates.extend(self.moving)
+        hit_list = [item for item in candidates
+                    if item is not sprite and arcade.check_for_collision(sprite, item)]
+        if len(hit_list) > 1:
+            # Keep the list order arcade would report, the engine reads hit_list[0]
+            hit_list.sort(key=lambda item: self._order[id(item)])
+        return hit_list
+
+    def can_jump(self) -> bool:
+        self.player_sprite.center_y -= 2
+        hit_list = self.collisions(self.player_sprite)
+        self.player_sprite.center_y += 2
+
+        if len(hit_list) > 0:
+            self.jumps_since_ground = 0
+
+        return len(hit_list) > 0 or self.allow_multi_jump and self.jumps_since_ground < self.allowed_jumps
+
+    def on_ground(self) -> bool:
+        """ Whether the player stands on something, can_jump() without touching the jump count. """
+        self.player_sprite.center_y -= 2
+        grounded = len(self.collisions(self.player_sprite)) > 0
+        self.player_sprite.center_y += 2
+        return grounded
+
+    def update(self):
+        player = self.player_sprite
+
+        # --- Add gravity and move in the y direction
+        player.change_y -= self.gravity_constant
+        player.center_y += player.change_y
+
+        hit_list = self.collisions(player)
+        if len(hit_list) > 0:
+            if player.change_y > 0:
+                for item in hit_list:
+                    player.top = min(item.bottom, player.top)
+            elif player.change_y < 0:
+                for item in hit_list:
+                    while arcade.check_for_collision(player, item):
+                        player.bottom += 0.25
+
+                    if item.change_x != 0:
+                        player.center_x += item.change_x
+            player.change_y = min(0.0, hit_list[0].change_y)
+
+        player.center_y = round(player.center_y, 2)
+
+        # --- Move in the x direction
+        player.center_x += player.change_x
+
+        check_again = True
+        while check_again:
+            check_again = False
+            hit_list = self.collisions(player)
+            if len(hit_list) > 0:
+                change_x = player.change_x
+                if change_x > 0:
+                    for item in hit_list:
+                        # See if we can "run up" a ramp
+                        player.center_y += change_x
+                        if len(self.collisions(player)) > 0:
+                            player.center_y -= change_x
+                            player.right = min(item.left, player.right)
+                            check_again = True
+                            break
+                elif change_x < 0:
+                    for item in hit_list:
+                        player.center_y -= change_x
+                        if len(self.collisions(player)) > 0:
+                            player.center_y += change_x
+                            player.left = max(item.right, player.left)
+                            check_again = True
+                            break
+                else:
+                    print("Error, collision while player wasn't moving.\n"
+                          "Make sure you aren't calling multiple updates, like "
+                          "a physics engine update and an all sprites list update.")
+
+        for platform in self.moving:
+            self._move_platform(platform)
+
+    def _move_platform(self, platform: arcade.Sprite):
+        player = self.player_sprite
+        platform.center_x += platform.change_x
+
+        if platform.boundary_left is not None and platform.left <= platform.boundary_left:
+            platform.left = platform.boundary_left
+            if platform.change_x < 0:
+                platform.change_x *= -1
+
+        if platform.boundary_right is not None and platform.right >= platform.boundary_right:
+            platform.right = platform.boundary_right
+            if platform.change_x > 0:
+                platform.change_x *= -1
+
+        if arcade.check_for_collision(player, platform):
+            if platform.change_x < 0:
+                player.right = platform.left
+            if platform.change_x > 0:
+                player.left = platform.right
+
+        platform.center_y += platform.change_y
+
+        if platform.boundary_top is not None and platform.top >= platform.boundary_top:
+            platform.top = platform.boundary_top
+            if platform.change_y > 0:
+                platform.change_y *= -1
+
+        if platform.boundary_bottom is not None and platform.bottom <= platform.boundary_bottom:
+            platform.bottom = platform.boundary_bottom
+            if platform.change_y < 0:
+                platform.change_y *= -1
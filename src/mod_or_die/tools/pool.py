@@ -0,0 +1,172 @@
+"""
+Object pools for sprites spawned while a level runs.
+
+Projectiles, coins and enemies come and go many times a second. Creating
+and dropping a sprite for each one allocates in the frame loop and makes the
+SpriteList rebuild its buffers. A pool creates all its sprites up front and
+keeps them in their list for good: spawn() moves a parked sprite into place,
+release() parks it again far outside the world, and nothing is allocated
+after the pool is built::
+
+    pool = SpritePool(lambda: arcade.Sprite("coin_01.png"), level.assets["objects"], capacity=64)
+    coin = pool.spawn(x, y)
+    pool.release(coin)
+"""
+from typing import Callable, Dict, List, Optional
+import arcade
+from .chunks import remove_sprites
+
+# Where released sprites wait, far from anything that draws or collides
+PARK = (-1e7, -1e7)
+
+# What spawn() does when every sprite is out
+GROW, DROP, RECYCLE = "grow", "drop", "recycle"
+
+
+class SpritePool:
+    """
+    A fixed set of sprites in sprite_list, handed out by spawn() and taken
+    back by release().
+
+    When all of them are in use ``full`` decides: "grow" adds ``capacity``
+    more (an allocation, counted in ``grown``), "drop" returns None and
+    "recycle" takes back the sprite spawned longest ago.
+    """
+
+    def __init__(self, factory: Callable[[], arcade.Sprite], sprite_list: arcade.SpriteList,
+                 capacity: int = 32, full: str = GROW):
+        if full not in (GROW, DROP, RECYCLE):
+            raise ValueError(f"Unknown pool mode {full!r}, expected {GROW!r}, {DROP!r} or {RECYCLE!r}")
+        self.factory = factory
+        self.sprite_list = sprite_list
+        self.capacity = 0
+        self.full = full
+        self.sprites: List[arcade.Sprite] = []
+        self._index: Dict[int, int] = {}
+        # Indices of the parked sprites, the next spawn takes the last
+        self._free: List[int] = []
+        # Spawn order of the active sprites, for "recycle"
+        self._serial = []
+        self._next_serial = 0
+
+        self.active = 0
+        self.high_water = 0
+        self.spawned = 0
+        self.released = 0
+        self.grown = 0
+        self.dropped = 0
+
+        self._allocate(capacity)
+
+    def _allocate(self, count: int):
+        for _ in range(count):
+            sprite = self.factory()
+            self._park(sprite)
+            self._index[id(sprite)] = len(self.sprites)
+            self._free.append(len(self.sprites))
+            self.sprites.append(sprite)
+            self._serial.append(-1)
+            self.sprite_list.append(sprite)
+        # Lowest indices are handed out first
+        self._free.sort(reverse=True)
+        self.capacity += count
+
+    @staticmethod
+    def _park(sprite: arcade.Sprite):
+        sprite.position = PARK
+        sprite.change_x = 0
+        sprite.change_y = 0
+
+    def spawn(self, x: float, y: float, change_x: float = 0, change_y: float = 0,
+              **attributes) -> Optional[arcade.Sprite]:
+        """ Place a parked sprite at (x, y) with a velocity and other attributes, None if dropped. """
+        if not self._free:
+            if self.full == GROW:
+                self.grown += 1
+                self._allocate(max(1, self.capacity))
+            elif self.full == RECYCLE and self.active:
+                self.release(self.sprites[self._oldest()])
+            else:
+                self.dropped += 1
+                return None
+
+        index = self._free.pop()
+        sprite = self.sprites[index]
+        sprite.position = (x, y)
+        sprite.change_x = change_x
+        sprite.change_y = change_y
+        for name, value in attributes.items():
+            setattr(sprite, name, value)
+
+        self._serial[index] = self._next_serial
+        self._next_serial += 1
+        self.active += 1
+        self.spawned += 1
+        if self.active > self.high_water:
+            self.high_water = self.active
+        return sprite
+
+    def _oldest(self) -> int:
+        serial = self._serial
+        return min((i for i in range(self.capacity) if serial[i] >= 0), key=serial.__getitem__)
+
+    def release(self, sprite: arcade.Sprite):
+        """ Park a spawned sprite until spawn() hands it out again. """
+        index = self._index[id(sprite)]
+        if self._serial[index] < 0:
+            return
+        self._park(sprite)
+        self._serial[index] = -1
+        self._free.append(index)
+        self.active -= 1
+        self.released += 1
+
+    def release_all(self):
+        for index in range(self.capacity):
+            if self._serial[index] >= 0:
+                self.release(self.sprites[index])
+
+    def owns(self, sprite: arcade.Sprite) -> bool:
+        return id(sprite) in self._index
+
+    def in_use(self) -> List[arcade.Sprite]:
+        """ The spawned sprites, oldest first. """
+        serial = self._serial
+        return [self.sprites[i] for i in sorted((i for i in range(self.capacity) if serial[i] >= 0),
+                                                key=serial.__getitem__)]
+
+    def attach(self, sprite_list: arcade.SpriteList):
+        """ Park every sprite and move them all into sprite_list, as setup() makes new lists. """
+        self.release_all()
+        # Otherwise every sprite keeps notifying the dropped list when it moves
+        remove_sprites(self.sprite_list, self.sprites)
+        self.sprite_list = sprite_list
+        for sprite in self.sprites:
+            sprite_list.append(sprite)
+
+    def state(self):
+        """ Which sprites are out, for set_state(). Their positions are the level snapshot's job. """
+        return self.capacity, list(self._serial), list(self._free), self.active, self._next_serial
+
+    def set_state(self, state):
+        capacity, serial, free, active, next_serial = state
+        # Sprites added by growing after the state was taken go back to the park
+        for index in range(capacity, self.capacity):
+            if self._serial[index] >= 0:
+                self._park(self.sprites[index])
+        self._serial = serial + [-1] * (self.capacity - capacity)
+        self._free = free + list(range(self.capacity - 1, capacity - 1, -1))
+        self._free.sort(reverse=True)
+        self.active = active
+        self._next_serial = next_serial
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "capacity": self.capacity,
+            "active": self.active,
+            "high_water": self.high_water,
+            "spawned": self.spawned,
+            "released": self.released,
+            "grown": self.grown,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,100 @@
+"""
+Background asset preloader.
+
+Decodes a level's images and sounds in a thread pool so a loading screen can
+keep rendering while they load. Decoded images are turned into textures on the
+main thread by ``poll()``, the only thread that may talk to GL. Anything
+``setup()`` asks for before it is ready is waited for on its own, through
+``tools.assets.PENDING``, instead of waiting for the whole level.
+
+An asset that fails to load does not stop the others. Its error is kept and
+raised, as a ``PreloadError`` naming the path, by ``poll()``, ``wait()`` or
+the level's ``setup()``.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+from . import assets
+
+
+class PreloadError(Exception):
+    """ An asset that failed to load in the background, the original error is its __cause__. """
+
+    def __init__(self, path: str, error: Exception):
+        super().__init__(f"could not load {path}: {error}")
+        self.path = path
+
+
+class Preloader:
+    """ Loads texture and sound paths in the background and reports progress. """
+
+    def __init__(self, textures: Iterable[str], sounds: Iterable[str] = (), workers: int = 4):
+        self.workers = workers
+        # Skip what an earlier level already left in the cache
+        self.textures = [path for path in dict.fromkeys(textures)
+                         if ("texture", path, 1, False) not in assets.CACHE]
+        self.sounds = [path for path in dict.fromkeys(sounds) if ("sound", path) not in assets.CACHE]
+        self.total = len(self.textures) + len(self.sounds)
+        self.ready = 0
+        # The first asset that failed to load
+        self.error = None
+        self._futures = {}
+
+    def start(self) -> "Preloader":
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        for path in self.textures:
+            self._queue(pool, ("image", path), assets.decode_image, path)
+        for path in self.sounds:
+            self._queue(pool, ("sound", path), assets.decode_sound, path)
+        # Queued work still runs, the pool just stops taking more
+        pool.shutdown(wait=False)
+        return self
+
+    def _queue(self, pool, key, func, path):
+        future = assets.PENDING.get(key)
+        if future is None:
+            future = assets.PENDING[key] = pool.submit(func, path)
+        self._futures[key] = future
+
+    def _finish(self, key):
+        """ Move one decoded asset into the cache, waiting for it if it is still loading. """
+        kind, path = key
+        try:
+            if kind == "image":
+                assets.load_texture(path)
+            else:
+                assets.load_sound(path)
+        except Exception as exc:
+            if self.error is None:
+                self.error = PreloadError(path, exc)
+                self.error.__cause__ = exc
+        # A failed asset still counts, so the loading screen gets to the error
+        del self._futures[key]
+        self.ready += 1
+
+    def check(self):
+        """ Raise the PreloadError of the first asset that failed to load, if any did. """
+        if self.error is not None:
+            raise self.error
+
+    def poll(self) -> float:
+        """ Cache everything that finished decoding, call once per frame. Returns the progress. """
+        for key, future in list(self._futures.items()):
+            if future.done():
+                self._finish(key)
+        self.check()
+        return self.progress
+
+    def wait(self):
+        """ Block until every asset is loaded. """
+        for key in list(self._futures):
+            self._finish(key)
+        self.check()
+
+    @property
+    def progress(self) -> float:
+        """ Fraction of the assets that are loaded, 1.0 when there was nothing to load. """
+        return self.ready / self.total if self.total else 1.0
+
+    @property
+    def done(self) -> bool:
+        return not self._futures
@@ -0,0 +1,160 @@
+"""
+Hot reload of level code.
+
+Watches the files a running level's class comes from and, when one is saved,
+reloads those modules, moves the level over to the new class and starts it
+again. The window, its GL context and every cache in tools.assets (textures,
+sounds, hit boxes) stay as they are, so an edit is playable in milliseconds
+instead of a restart::
+
+    play level_01 --reload
+
+Code with a syntax error, or that fails while importing or starting, is
+reported, its modules are put back as they were and the level goes on with the
+code it had.
+"""
+from typing import Dict, List
+import importlib
+import os
+import sys
+import time
+import traceback
+import pyglet
+
+BASE_MODULE = "mod_or_die.levels.BaseLevel"
+
+# Level attributes that outlive a reload, the rest is built again by __init__
+KEEP = ("headless", "mixer", "telemetry", "show_telemetry", "recorder")
+
+
+def _source(module) -> str:
+    path = getattr(module, "__file__", None)
+    if path and path.endswith(".pyc"):
+        path = path[:-1]
+    return path
+
+
+class LevelReloader:
+    """
+    Reloads the modules of a level's class when their files change.
+
+    Every module from the level's own class down to BaseLevel is watched.
+    When one changes it is reloaded along with every module that subclasses
+    it, base classes first, so no class is left built on an old base.
+    kwargs are the arguments the level was constructed with. With them
+    ``__init__`` runs again, without opening a window, so edits to it apply
+    too; without them only the class is swapped before ``setup()``.
+    """
+
+    def __init__(self, level, kwargs: Dict = None, interval: float = 0.5):
+        self.level = level
+        self.kwargs = kwargs
+        self.interval = interval
+        self.reloads = 0
+        self.last_seconds = None
+        self.last_error = None
+        self._mtimes = {name: self._mtime(name) for name in self.modules()}
+        if not self._mtimes:
+            raise TypeError(f"{type(level).__name__} is not a BaseLevel, only BaseLevel subclasses can be reloaded")
+
+    def modules(self) -> List[str]:
+        """ Names of the watched modules, the level's own first. """
+        names = []
+        for cls in type(self.level).__mro__:
+            # Compared by name, a reloaded BaseLevel is a new class object
+            is_level = any(base.__module__ == BASE_MODULE and base.__name__ == "BaseLevel" for base in cls.__mro__)
+            if is_level and cls.__module__ not in names:
+                names.append(cls.__module__)
+        return names
+
+    @staticmethod
+    def _mtime(name: str) -> float:
+        path = _source(sys.modules.get(name))
+        try:
+            return os.stat(path).st_mtime if path else 0.0
+        except OSError:
+            return 0.0
+
+    def changed(self) -> List[str]:
+        return [name for name in self.modules() if self._mtime(name) != self._mtimes.get(name)]
+
+    def start(self):
+        """ Check for changes every interval seconds on the pyglet clock. """
+        pyglet.clock.schedule_interval(self._poll, self.interval)
+        return self
+
+    def stop(self):
+        pyglet.clock.unschedule(self._poll)
+
+    def _poll(self, delta_time):
+        self.check()
+
+    def check(self) -> bool:
+        """ Reload if a watched file changed since the last look, True if the level was reloaded. """
+        # Wait for a background preload to finish, it calls setup() itself
+        if getattr(self.level, "preloader", None) is not None:
+            return False
+        changed = self.changed()
+        if not changed:
+            return False
+        return self.reload(changed)
+
+    def reload(self, changed: List[str] = None) -> bool:
+        """ Reload the changed modules, all watched ones by default, and restart the level on them. """
+        start = time.perf_counter()
+        watched = self.modules()
+        changed = changed or watched
+        # A changed module and every module below it in the class hierarchy
+        stale = watched[:max(watched.index(name) for name in changed) + 1]
+        for name in stale:
+            self._mtimes[name] = self._mtime(name)
+
+        level = self.level
+        old_class = type(level)
+        old_state = dict(level.__dict__)
+        old_update, old_on_update = level.update, level.on_update
+        # reload() runs the new code in the old module, so keep what it held
+        old_modules = {name: sys.modules[name] for name in stale}
+        old_namespaces = {name: dict(module.__dict__) for name, module in old_modules.items()}
+        try:
+            for name in reversed(stale):
+                importlib.reload(sys.modules[name])
+            new_class = getattr(sys.modules[old_class.__module__], old_class.__name__)
+            level.__class__ = new_class
+            self._restart(level)
+        except Exception:
+            self.last_error = traceback.format_exc()
+            print(f"Reload of {', '.join(stale)} failed, still running the old code:\n{self.last_error}",
+                  file=sys.stderr)
+            for name, module in old_modules.items():
+                sys.modules[name] = module
+                module.__dict__.clear()
+                module.__dict__.update(old_namespaces[name])
+            level.__class__ = old_class
+            level.__dict__.clear()
+            level.__dict__.update(old_state)
+            return False
+
+        # The clock holds bound methods of the old class, hand it the new ones
+        if not level.headless:
+            pyglet.clock.unschedule(old_update)
+            pyglet.clock.unschedule(old_on_update)
+            pyglet.clock.schedule_interval(level.update, 1 / 60)
+            pyglet.clock.schedule_interval(level.on_update, 1 / 60)
+
+        self.reloads += 1
+        self.last_error = None
+        self.last_seconds = time.perf_counter() - start
+        print(f"Reloaded {', '.join(stale)} in {self.last_seconds * 1000:.0f} ms")
+        return True
+
+    def _restart(self, level):
+        kept = {name: getattr(level, name) for name in KEEP if hasattr(level, name)}
+        if self.kwargs is not None:
+            # headless=True keeps __init__ from opening a second window
+            type(level).__init__(level, headless=True, **self.kwargs)
+            for name, value in kept.items():
+                setattr(level, name, value)
+        level.is_game_over = False
+        level.set_view(0, 0)
+        level.setup()
@@ -0,0 +1,171 @@
+"""
+Input recording and replay.
+
+Levels only move on update() and key events, so the frame index of every key
+event is enough to reproduce a run exactly. A recording is a small JSON header
+(level, its arguments, timestep and the state the run ended in) followed by
+fixed-size event records, laid out like tools.level_format files.
+
+Replays run through tools.headless as fast as the CPU allows and check that
+they end where the recording did::
+
+    python -m mod_or_die.tools.headless mod_or_die.levels.level_01:L1 \\
+        --arg speed=5 --arg title=L1 --press 0:RIGHT --steps 600 --record run.rec
+    python -m mod_or_die.tools.replay run.rec other.rec
+"""
+from typing import Dict, List
+import argparse
+import json
+import sys
+import time
+import numpy as np
+from .headless import HeadlessRunner, Script, SimResult, load_level_class
+
+MAGIC = b"MODREC1\0"
+ALIGN = 16
+
+EVENT = np.dtype([("frame", "<u4"), ("action", "<u1"), ("pad", "<u1", 3),
+                  ("key", "<u4"), ("time", "<f4")])
+ACTIONS = ("press", "release")
+
+# Positions further apart than this, in pixels, fail verification
+TOLERANCE = 1e-3
+
+
+def final_state(level, frames: int) -> Dict:
+    return {
+        "frames": frames,
+        "player_x": level.player.center_x,
+        "player_y": level.player.center_y,
+        "score": level.score,
+    }
+
+
+class InputRecorder:
+    """
+    Logs the key events a level receives with the frame they arrived on.
+
+    Attach it as ``level.recorder`` before the first update, BaseLevel calls
+    tick() once per update and record() for every key event.
+    """
+
+    def __init__(self, level: str, kwargs: Dict = None, dt: float = 1 / 60, attributes: Dict = None):
+        self.level = level
+        self.kwargs = kwargs or {}
+        self.dt = dt
+        # Level attributes set after construction, such as a modded jump_speed
+        self.attributes = attributes or {}
+        self.frame = 0
+        self.events = []
+        self.start = time.perf_counter()
+
+    def tick(self):
+        self.frame += 1
+
+    def record(self, action: str, key: int):
+        self.events.append((self.frame, ACTIONS.index(action), key, time.perf_counter() - self.start))
+
+    def save(self, path: str, level):
+        """ Write the events and the state level is in now. """
+        records = np.zeros(len(self.events), dtype=EVENT)
+        if self.events:
+            for name, column in zip(("frame", "action", "key", "time"), zip(*self.events)):
+                records[name] = column
+
+        header = json.dumps({
+            "level": self.level,
+            "kwargs": self.kwargs,
+            "dt": self.dt,
+            "attributes": self.attributes,
+            "count": len(records),
+            "final": final_state(level, self.frame),
+        }).encode("utf-8")
+        offset = len(MAGIC) + 4 + len(header)
+        padding = -offset % ALIGN
+
+        with open(path, "wb") as fh:
+            fh.write(MAGIC)
+            fh.write(np.uint32(len(header) + padding).tobytes())
+            fh.write(header + b" " * padding)
+            fh.write(records.tobytes())
+
+
+class Recording:
+    """ A loaded recording: the header fields plus the event records. """
+
+    def __init__(self, header: Dict, events: np.ndarray):
+        self.level = header["level"]
+        self.kwargs = header["kwargs"]
+        self.dt = header["dt"]
+        self.attributes = header.get("attributes", {})
+        self.final = header["final"]
+        self.events = events
+
+    def script(self) -> Script:
+        script = {}
+        for frame, action, key in zip(self.events["frame"].tolist(), self.events["action"].tolist(),
+                                      self.events["key"].tolist()):
+            script.setdefault(frame, []).append((ACTIONS[action], key))
+        return script
+
+
+def load(path: str) -> Recording:
+    with open(path, "rb") as fh:
+        if fh.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an input recording")
+        header_size = int(np.frombuffer(fh.read(4), dtype=np.uint32)[0])
+        header = json.loads(fh.read(header_size).decode("utf-8"))
+        events = np.frombuffer(fh.read(header["count"] * EVENT.itemsize), dtype=EVENT)
+    return Recording(header, events)
+
+
+class ReplayResult:
+    """ How a replay ended compared to its recording, and how fast it ran. """
+
+    def __init__(self, path: str, recording: Recording, result: SimResult, level):
+        self.path = path
+        self.expected = recording.final
+        self.actual = final_state(level, result.steps)
+        self.seconds = result.seconds
+        # Simulated time over wall time
+        self.speedup = result.steps * recording.dt / result.seconds if result.seconds > 0 else float("inf")
+        self.mismatches = [
+            name for name in ("player_x", "player_y")
+            if abs(self.expected[name] - self.actual[name]) > TOLERANCE
+        ] + [name for name in ("frames", "score") if self.expected[name] != self.actual[name]]
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatches
+
+    def __repr__(self):
+        status = "ok" if self.ok else "MISMATCH " + ", ".join(
+            f"{name} {self.expected[name]} != {self.actual[name]}" for name in self.mismatches)
+        return f"{self.path}: {status} ({self.actual['frames']} frames, {self.speedup:.0f}x real time)"
+
+
+def replay(path: str) -> ReplayResult:
+    """ Run a recording headless at full speed and compare where it ends. """
+    recording = load(path)
+    runner = HeadlessRunner(load_level_class(recording.level), dt=recording.dt, **recording.kwargs)
+    for name, value in recording.attributes.items():
+        setattr(runner.level, name, value)
+    result = runner.run(recording.final["frames"], recording.script())
+    return ReplayResult(path, recording, result, runner.level)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay input recordings and verify where they end.")
+    parser.add_argument("recordings", nargs="+")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for path in args.recordings:
+        result = replay(path)
+        print(result)
+        failed += not result.ok
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
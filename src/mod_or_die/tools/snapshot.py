@@ -0,0 +1,68 @@
+"""
+Level snapshots used to respawn without rebuilding the level.
+"""
+from typing import Dict, Tuple
+import numpy as np
+import arcade
+
+
+class LevelSnapshot:
+    """
+    Positions, velocities, score and viewport of a level, by default taken
+    right after setup() to respawn, but any frame can be captured.
+
+    Lists named in ``level.static_assets`` are skipped when none of their
+    sprites move, so restoring only touches what the level can change and
+    respawn cost does not grow with the size of the map.
+    """
+
+    def __init__(self, level):
+        self.lists: Dict[str, Tuple[arcade.SpriteList, np.ndarray]] = {}
+        self.keys = tuple(level.assets.keys())
+        self.identity = tuple(id(level.assets[k]) for k in self.keys)
+        self.animations = list(level.animations)
+        self.animation_states = [group.state() for group in self.animations]
+        self.pool_states = [(pool, pool.state()) for pool in level.pools.values()]
+
+        # Animated groups save and restore their own state in bulk
+        animated = {id(group.sprite_list) for group in self.animations}
+
+        for name, sprite_list in level.assets.items():
+            if id(sprite_list) in animated:
+                continue
+            state = np.array([(s.center_x, s.center_y, s.change_x, s.change_y) for s in sprite_list],
+                             dtype=np.float64).reshape(-1, 4)
+            if name in level.static_assets and not state[:, 2:].any():
+                continue
+            self.lists[name] = (sprite_list, state)
+
+        self.score = level.score
+        self.is_game_over = level.is_game_over
+        self.jumps_since_ground = level.physics_engine.jumps_since_ground
+        self.view_left = level.view_left
+        self.view_bottom = level.view_bottom
+
+    def matches(self, level) -> bool:
+        """ True if the level still holds the same sprite lists with the same sprites. """
+        if tuple(level.assets.keys()) != self.keys:
+            return False
+        if tuple(id(level.assets[k]) for k in self.keys) != self.identity:
+            return False
+        return all(len(sprite_list) == len(state) for sprite_list, state in self.lists.values())
+
+    def restore(self, level):
+        """ Put every captured sprite back in place without recreating anything. """
+        for sprite_list, state in self.lists.values():
+            for sprite, (x, y, change_x, change_y) in zip(sprite_list, state.tolist()):
+                sprite.position = (x, y)
+                sprite.change_x = change_x
+                sprite.change_y = change_y
+        for group, state in zip(self.animations, self.animation_states):
+            group.set_state(state)
+        for pool, state in self.pool_states:
+            pool.set_state(state)
+
+        level.score = self.score
+        level.is_game_over = self.is_game_over
+        level.physics_engine.jumps_since_ground = self.jumps_since_ground
+        level.set_view(self.view_left, self.view_bottom)
@@ -0,0 +1,324 @@
+"""
+Search-based level solvability checker.
+
+Explores input sequences against a headless level breadth first. Inputs are
+held for a fixed number of frames per step: run left, run right or stand, each
+with or without a jump. States that land in the same coarse cell (position,
+velocity) at the same step are only explored once. Every step's frontier is
+split across a process pool, each worker owning its own copy of the level.
+
+The first win found is the shortest one at step granularity. The level's own
+``game_over()`` counts as a death and is never run, so respawns do not hide
+failure::
+
+    python -m mod_or_die.tools.solver mod_or_die.levels.level_01:L1 --arg title=L1 \\
+        --speed 5 --speed 3 --gravity 1.0 --jump-speed 10 --save-trace win.rec
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence, Tuple
+import argparse
+import itertools
+import os
+import sys
+import time
+import arcade
+from .headless import HeadlessRunner, Script, load_level_class
+from .snapshot import LevelSnapshot
+
+# (horizontal direction, jump) held for one step
+ACTIONS = ((1, 0), (1, 1), (0, 0), (0, 1), (-1, 0), (-1, 1))
+
+ALIVE, WON, DEAD = "alive", "won", "dead"
+
+Trace = Tuple[int, ...]
+
+
+def action_events(action: int) -> List[Tuple[str, str]]:
+    direction, jump = ACTIONS[action]
+    if direction > 0:
+        events = [("press", "RIGHT")]
+    elif direction < 0:
+        events = [("press", "LEFT")]
+    else:
+        events = [("release", "RIGHT")]
+    if jump:
+        events.append(("press", "UP"))
+    return events
+
+
+def trace_script(trace: Trace, frames_per_step: int) -> Script:
+    """ The key events of a trace as a tools.headless script. """
+    return {step * frames_per_step: action_events(action) for step, action in enumerate(trace)}
+
+
+class Search:
+    """
+    One level instance that jumps between traces by restoring snapshots.
+
+    Traces are visited in sorted order so consecutive ones share a prefix,
+    and only the part after the shared prefix is simulated again.
+    """
+
+    def __init__(self, spec: str, kwargs: Dict, jump_speed: float = None,
+                 frames_per_step: int = 15, cell: float = 16):
+        self.level = load_level_class(spec)(headless=True, **kwargs)
+        if jump_speed is not None:
+            self.level.jump_speed = jump_speed
+        self.level.setup()
+        self.frames_per_step = frames_per_step
+        self.cell = cell
+
+        self.died = False
+        self.level.game_over = self._died
+        self.root = LevelSnapshot(self.level)
+        # [(action, snapshot after it)] along the trace the level is on now
+        self.path = []
+
+    def _died(self):
+        self.died = True
+
+    def _rebuild(self):
+        """ Run setup() again and snapshot it, win() replaces the lists every snapshot so far holds. """
+        level = self.level
+        level.is_game_over = False
+        level.score = self.root.score
+        level.set_view(self.root.view_left, self.root.view_bottom)
+        level.setup()
+        self.root = LevelSnapshot(level)
+        self.path = []
+
+    def _parent(self, trace: Trace) -> LevelSnapshot:
+        """ Put the level at the end of trace and return the snapshot taken there. """
+        if self.level.is_game_over or not self.root.matches(self.level):
+            self._rebuild()
+        self._goto(trace)
+        return self.path[-1][1] if self.path else self.root
+
+    def _restore(self, snapshot: LevelSnapshot):
+        snapshot.restore(self.level)
+        self.level.chunks.update(self.level.player.center_x)
+        self.died = False
+
+    def _goto(self, trace: Trace):
+        shared = 0
+        for (action, _), wanted in zip(self.path, trace):
+            if action != wanted:
+                break
+            shared += 1
+        del self.path[shared:]
+        self._restore(self.path[-1][1] if self.path else self.root)
+        for action in trace[shared:]:
+            self._run(action)
+            self.path.append((action, LevelSnapshot(self.level)))
+
+    def _run(self, action: int) -> Tuple[str, int]:
+        """ Play one step, returns the outcome and the frames it took. """
+        level = self.level
+        for kind, key_name in action_events(action):
+            key = getattr(arcade.key, key_name)
+            if kind == "press":
+                level.on_key_press(key, 0)
+            else:
+                level.on_key_release(key, 0)
+        for frame in range(1, self.frames_per_step + 1):
+            level.update(1 / 60)
+            if self.died:
+                return DEAD, frame
+            if level.is_game_over:
+                return WON, frame
+        return ALIVE, self.frames_per_step
+
+    def key(self) -> Tuple:
+        player = self.level.player
+        return (int(player.center_x // self.cell), int(player.center_y // self.cell),
+                round(player.change_x), round(player.change_y))
+
+    def expand(self, traces: Sequence[Trace]) -> List[Tuple[Trace, str, int, Tuple, float]]:
+        """ (child trace, outcome, frames of its last step, state key, x) for every action after every trace. """
+        children = []
+        for trace in sorted(traces):
+            parent = self._parent(trace)
+            for action in range(len(ACTIONS)):
+                # A sibling that won left the level on lists no snapshot knows
+                if self.level.is_game_over:
+                    parent = self._parent(trace)
+                self._restore(parent)
+                outcome, frames = self._run(action)
+                children.append((trace + (action,), outcome, frames, self.key(), self.level.player.center_x))
+        return children
+
+
+# The Search of a pool worker process
+_WORKER = None
+
+
+def _init_worker(*args):
+    global _WORKER
+    _WORKER = Search(*args)
+
+
+def _expand(traces: Sequence[Trace]):
+    return _WORKER.expand(traces)
+
+
+class SolveResult:
+    """ Whether a level was won and the shortest trace that did it. """
+
+    def __init__(self, spec: str, params: Dict, trace: Trace, frames: int, steps: int,
+                 explored: int, seconds: float, frames_per_step: int, exhausted: bool = False):
+        self.spec = spec
+        self.params = params
+        self.winnable = trace is not None
+        self.trace = trace
+        self.frames = frames
+        self.steps = steps
+        self.explored = explored
+        self.seconds = seconds
+        self.frames_per_step = frames_per_step
+        # True when every input sequence died, not just ran out of steps
+        self.exhausted = exhausted
+
+    def script(self) -> Script:
+        return trace_script(self.trace, self.frames_per_step) if self.winnable else {}
+
+    def as_dict(self) -> Dict:
+        return {
+            "level": self.spec,
+            "params": self.params,
+            "winnable": self.winnable,
+            "exhausted": self.exhausted,
+            "frames": self.frames,
+            "explored": self.explored,
+            "seconds": self.seconds,
+            "script": {str(frame): events for frame, events in self.script().items()},
+        }
+
+    def __repr__(self):
+        params = ", ".join(f"{k}={v}" for k, v in self.params.items())
+        if self.winnable:
+            status = f"winnable in {self.frames} frames ({len(self.trace)} steps)"
+        elif self.exhausted:
+            status = "not winnable, every input sequence dies"
+        else:
+            status = f"not winnable within {self.steps} steps"
+        return f"{self.spec} [{params}]: {status}, {self.explored} states in {self.seconds:.1f}s"
+
+
+def solve(spec: str, kwargs: Dict = None, jump_speed: float = None, frames_per_step: int = 15,
+          max_frames: int = 3600, cell: float = 16, beam: int = None, workers: int = None) -> SolveResult:
+    """
+    Breadth-first search for the shortest winning input trace.
+
+    beam keeps only that many states per step, the ones furthest right, which
+    trades the guarantee of finding a win for speed on long levels.
+    """
+    kwargs = dict(kwargs or {})
+    params = {k: kwargs[k] for k in ("speed", "gravity") if k in kwargs}
+    if jump_speed is not None:
+        params["jump_speed"] = jump_speed
+    args = (spec, kwargs, jump_speed, frames_per_step, cell)
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+
+    pool = local = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=args)
+    else:
+        local = Search(*args)
+
+    def expand(batches):
+        results = pool.map(_expand, batches) if pool is not None else map(local.expand, batches)
+        return [child for batch in results for child in batch]
+
+    frontier = [()]
+    explored = 0
+    steps = max_frames // frames_per_step
+    try:
+        for step in range(steps):
+            # Contiguous slices of the sorted frontier share the most prefix
+            frontier.sort()
+            size = max(1, -(-len(frontier) // (workers * 4)))
+            children = expand([frontier[i:i + size] for i in range(0, len(frontier), size)])
+            explored += len(children)
+
+            # Levels change over time, so only states of the same step are merged
+            seen = set()
+            survivors = []
+            for trace, outcome, frames, key, x in children:
+                if outcome == WON:
+                    return SolveResult(spec, params, trace, step * frames_per_step + frames, steps,
+                                       explored, time.perf_counter() - start, frames_per_step)
+                if outcome == ALIVE and key not in seen:
+                    seen.add(key)
+                    survivors.append((x, trace))
+            if beam is not None:
+                survivors.sort(key=lambda item: -item[0])
+                survivors = survivors[:beam]
+            frontier = [trace for _, trace in survivors]
+            if not frontier:
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return SolveResult(spec, params, None, None, steps, explored, time.perf_counter() - start, frames_per_step,
+                       exhausted=not frontier and beam is None)
+
+
+def save_trace(result: SolveResult, kwargs: Dict, jump_speed: float, path: str):
+    """ Store a winning trace as a tools.replay recording. """
+    from .replay import InputRecorder
+    attributes = {"jump_speed": jump_speed} if jump_speed is not None else {}
+    runner = HeadlessRunner(load_level_class(result.spec), **kwargs)
+    for name, value in attributes.items():
+        setattr(runner.level, name, value)
+    runner.level.recorder = InputRecorder(result.spec, kwargs, runner.dt, attributes)
+    runner.run(result.frames, result.script())
+    runner.level.recorder.save(path, runner.level)
+
+
+def _value(text: str):
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check whether a level can be won, and how.")
+    parser.add_argument("level", help="level class, e.g. mod_or_die.levels.level_01:L1")
+    parser.add_argument("--arg", action="append", default=[], help="other level argument as name=value")
+    parser.add_argument("--speed", type=float, action="append", help="repeat to check several")
+    parser.add_argument("--gravity", type=float, action="append")
+    parser.add_argument("--jump-speed", type=float, action="append")
+    parser.add_argument("--frames-per-step", type=int, default=15)
+    parser.add_argument("--max-frames", type=int, default=3600)
+    parser.add_argument("--cell", type=float, default=16, help="state hash cell size in pixels")
+    parser.add_argument("--beam", type=int, default=None, help="keep only this many states per step")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--save-trace", help="write the winning trace of the first winnable run here")
+    args = parser.parse_args(argv)
+
+    base = dict((name, _value(value)) for name, _, value in (a.partition("=") for a in args.arg))
+    saved = False
+    for speed, gravity, jump_speed in itertools.product(args.speed or [None], args.gravity or [None],
+                                                         args.jump_speed or [None]):
+        kwargs = dict(base)
+        if speed is not None:
+            kwargs["speed"] = speed
+        if gravity is not None:
+            kwargs["gravity"] = gravity
+        result = solve(args.level, kwargs, jump_speed, args.frames_per_step, args.max_frames,
+                       args.cell, args.beam, args.workers)
+        print(result)
+        if result.winnable and args.save_trace and not saved:
+            save_trace(result, kwargs, jump_speed, args.save_trace)
+            print(f"winning trace written to {args.save_trace}")
+            saved = True
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
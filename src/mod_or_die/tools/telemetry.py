@@ -0,0 +1,134 @@
+"""
+Frame-time instrumentation.
+
+Levels time the phases of every frame into a fixed-size ring buffer, so a
+hitch can be traced to physics, sprite updates, animation, scrolling or
+drawing. The buffer summarises itself as percentiles for the on-screen overlay
+and exports to JSONL or CSV for offline analysis::
+
+    telemetry.export("frames.jsonl")
+    telemetry.export("frames.csv")
+
+A level without telemetry does not time anything, see BaseLevel.
+"""
+from typing import Callable, Dict, List, Sequence
+import csv
+import json
+import time
+import numpy as np
+
+PHASES = ("physics", "sprites", "animation", "scrolling", "draw")
+PERCENTILES = (50, 95, 99)
+
+
+class FrameTelemetry:
+    """
+    Ring buffer of per-phase frame times, in seconds, and sprite counts.
+
+    Call begin() at the start of a frame, lap(phase) after each phase and
+    mark() to skip time that belongs to no phase, such as between update and
+    draw. A frame is committed when the next one begins.
+    """
+
+    def __init__(self, size: int = 600, phases: Sequence[str] = PHASES,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.size = size
+        self.phases = tuple(phases)
+        self.clock = clock
+        self.times = np.zeros((size, len(self.phases)))
+        self.counts = [None] * size
+        # Frames committed so far, the newest is at (frames - 1) % size
+        self.frames = 0
+
+        self._index = {phase: i for i, phase in enumerate(self.phases)}
+        self._row = np.zeros(len(self.phases))
+        self._open = False
+        self._last = 0.0
+        self._count = None
+
+    def begin(self, counts: Dict[str, int] = None):
+        """ Commit the frame in progress and start a new one, counts are its sprites per list. """
+        if self._open:
+            slot = self.frames % self.size
+            self.times[slot] = self._row
+            self.counts[slot] = self._count
+            self.frames += 1
+            self._row[:] = 0
+        self._open = True
+        self._count = counts
+        self._last = self.clock()
+
+    def mark(self):
+        self._last = self.clock()
+
+    def lap(self, phase: str):
+        now = self.clock()
+        self._row[self._index[phase]] += now - self._last
+        self._last = now
+
+    def recent(self) -> np.ndarray:
+        """ Committed rows, oldest first. """
+        if self.frames < self.size:
+            return self.times[:self.frames]
+        start = self.frames % self.size
+        return np.concatenate((self.times[start:], self.times[:start]))
+
+    def _recent_counts(self) -> List:
+        if self.frames < self.size:
+            return self.counts[:self.frames]
+        start = self.frames % self.size
+        return self.counts[start:] + self.counts[:start]
+
+    def summary(self, percentiles: Sequence[int] = PERCENTILES) -> Dict[str, Dict[str, float]]:
+        """ {phase or "total": {"p50": seconds, ...}} over the buffered frames. """
+        rows = self.recent()
+        if len(rows) == 0:
+            return {}
+        columns = dict(zip(self.phases, rows.T))
+        columns["total"] = rows.sum(axis=1)
+        return {name: {f"p{q}": float(v) for q, v in zip(percentiles, np.percentile(values, percentiles))}
+                for name, values in columns.items()}
+
+    def _records(self):
+        first = self.frames - len(self.recent())
+        for i, (row, counts) in enumerate(zip(self.recent(), self._recent_counts())):
+            record = {"frame": first + i}
+            record.update(zip(self.phases, row.tolist()))
+            record["total"] = float(row.sum())
+            record["counts"] = counts or {}
+            yield record
+
+    def export_jsonl(self, path: str) -> int:
+        written = 0
+        with open(path, "w") as fh:
+            for record in self._records():
+                fh.write(json.dumps(record) + "\n")
+                written += 1
+        return written
+
+    def export_csv(self, path: str) -> int:
+        """ One row per frame, sprite counts get a count.<list> column each. """
+        records = list(self._records())
+        lists = sorted({name for record in records for name in record["counts"]})
+        with open(path, "w", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["frame"] + list(self.phases) + ["total"] + ["count." + name for name in lists])
+            for record in records:
+                writer.writerow([record["frame"]] + [record[phase] for phase in self.phases] + [record["total"]]
+                                + [record["counts"].get(name, 0) for name in lists])
+        return len(records)
+
+    def export(self, path: str) -> int:
+        """ Write the buffered frames as CSV if path ends in .csv, JSONL otherwise. Returns the row count. """
+        if path.lower().endswith(".csv"):
+            return self.export_csv(path)
+        return self.export_jsonl(path)
+
+    def overlay_lines(self, counts: Dict[str, int]) -> List[str]:
+        """ Text for the on-screen overlay: percentiles in milliseconds and sprites per list. """
+        lines = []
+        for name, values in self.summary().items():
+            text = " ".join(f"{key} {value * 1000:6.2f}" for key, value in values.items())
+            lines.append(f"{name:<10} {text} ms")
+        lines.append("counts     " + " ".join(f"{name}={count}" for name, count in counts.items()))
+        return lines
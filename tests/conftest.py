@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The package lives in src/, run the tests against the checkout
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+L1 = "mod_or_die.levels.level_01:L1"
+L1_KWARGS = {"speed": 5, "title": "L1"}
@@ -0,0 +1,58 @@
+import arcade
+import numpy as np
+from mod_or_die.tools.animation import WaveGroup
+from mod_or_die.tools.funcs import scale_generator
+
+RADIUS = 64
+FRAMES = 400
+
+
+def water(count=12):
+    sprite_list = arcade.SpriteList()
+    for i in range(count):
+        sprite = arcade.Sprite()
+        sprite.center_x, sprite.center_y = i * 2 * RADIUS, -(i % 3) * 2 * RADIUS
+        sprite_list.append(sprite)
+    return sprite_list
+
+
+def old_water(sprite_list, frames):
+    """ The per-sprite generator loop L1 ran before WaveGroup, one (xs, ys) per frame. """
+    for sprite in sprite_list:
+        sprite.start_x = sprite.center_x
+        sprite.waves = scale_generator(x=0, offset=0, step=0.02)
+    positions = []
+    for _ in range(frames):
+        for sprite in sprite_list:
+            sprite.center_x = sprite.start_x + next(sprite.waves) * RADIUS
+            sprite.center_y += 0.18
+        positions.append(([s.center_x for s in sprite_list], [s.center_y for s in sprite_list]))
+    return positions
+
+
+def test_step_matches_the_generator_loop():
+    expected = old_water(water(), FRAMES)
+    sprite_list = water()
+    group = WaveGroup(sprite_list, phase=0, offset=0, step=0.02, amplitude=RADIUS, rise=0.18)
+    for xs, ys in expected:
+        group.step()
+        assert np.allclose(group.x, xs) and np.allclose(group.y, ys)
+        assert np.allclose([s.center_x for s in sprite_list], xs)
+        assert np.allclose([s.center_y for s in sprite_list], ys)
+
+
+def test_reset_and_set_state():
+    sprite_list = water()
+    group = WaveGroup(sprite_list, step=0.02, amplitude=RADIUS, rise=0.18)
+    start = [tuple(s.position) for s in sprite_list]
+    for _ in range(10):
+        group.step()
+    middle = group.state()
+    positions = [tuple(s.position) for s in sprite_list]
+    for _ in range(10):
+        group.step()
+
+    group.set_state(middle)
+    assert [tuple(s.position) for s in sprite_list] == positions
+    group.reset()
+    assert [tuple(s.position) for s in sprite_list] == start
@@ -0,0 +1,40 @@
+from mod_or_die.levels.BaseLevel import Conf
+from mod_or_die.tools import assets
+from mod_or_die.tools.assets import AssetCache
+
+
+def test_hits_and_misses_are_counted():
+    cache = AssetCache()
+    calls = []
+    loader = lambda: calls.append(1) or len(calls)
+    assert cache.get("a", loader) == 1
+    assert cache.get("a", loader) == 1
+    assert cache.get("b", loader) == 2
+    assert len(calls) == 2
+    assert cache.stats() == {"size": 2, "max_size": 256, "hits": 1, "misses": 2}
+
+    cache.clear()
+    assert cache.stats() == {"size": 0, "max_size": 256, "hits": 0, "misses": 0}
+
+
+def test_least_recently_used_is_evicted_at_max_size():
+    cache = AssetCache(max_size=2)
+    cache.get("a", lambda: "a")
+    cache.get("b", lambda: "b")
+    # Touching a makes b the least recently used
+    cache.get("a", lambda: "stale")
+    cache.get("c", lambda: "c")
+    assert len(cache) == 2
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.get("b", lambda: "reloaded") == "reloaded"
+    assert "a" not in cache
+
+
+def test_sprites_of_one_path_share_a_texture():
+    path = Conf().TILE_RESOURCES + "/grassMid.png"
+    first = assets.sprite(path)
+    second = assets.sprite(path)
+    assert first is not second
+    assert first.texture is second.texture
+    assert assets.sprite(path, mirrored=True).texture is not first.texture
+    assert assets.load_texture(path) is first.texture
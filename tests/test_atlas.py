@@ -0,0 +1,85 @@
+import os
+import random
+import numpy as np
+import pytest
+from PIL import Image
+from mod_or_die.tools import assets, atlas
+
+
+def images(count=40, seed=5):
+    rng = random.Random(seed)
+    return [(f"img{i:02d}.png", Image.new("RGBA", (rng.randint(4, 90), rng.randint(4, 90)))) for i in range(count)]
+
+
+def boxes_overlap(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def test_packed_regions_fit_their_page_and_do_not_overlap():
+    items = images()
+    pages, regions = atlas.pack(items, page_size=256, padding=1)
+    assert len(pages) > 1
+    assert set(regions) == {name for name, _ in items}
+
+    boxes = {}
+    for name, image in items:
+        page, x, y, width, height = regions[name]
+        assert (width, height) == image.size
+        assert x + width <= pages[page][0] <= 256 and y + height <= pages[page][1] <= 256
+        # Padding keeps neighbours from bleeding into each other when filtered
+        boxes.setdefault(page, []).append((x, y, x + width + 1, y + height + 1))
+    for page_boxes in boxes.values():
+        for i, a in enumerate(page_boxes):
+            assert not any(boxes_overlap(a, b) for b in page_boxes[i + 1:])
+
+
+def test_image_larger_than_a_page_is_refused():
+    with pytest.raises(ValueError):
+        atlas.pack([("huge.png", Image.new("RGBA", (300, 10)))], page_size=256)
+
+
+def save_folder(root, folder, count):
+    os.makedirs(os.path.join(root, folder))
+    rng = np.random.default_rng(count)
+    for i in range(count):
+        pixels = rng.integers(0, 256, (8 + i, 5 + 2 * i, 4), dtype=np.uint8)
+        Image.fromarray(pixels, "RGBA").save(os.path.join(root, folder, f"{i}.png"))
+
+
+def test_find_returns_the_pixels_of_the_loose_file(tmp_path):
+    root = str(tmp_path / "res")
+    save_folder(root, "tiles", 12)
+    save_folder(root, "chars", 3)
+    index = atlas.build(root, ("tiles", "chars"), page_size=64)
+    assert len(index["pages"]) > 1
+
+    packed = atlas.Atlas.load(os.path.join(root, "atlas"))
+    assert len(packed) == 15
+    for folder, count in (("tiles", 12), ("chars", 3)):
+        for i in range(count):
+            path = os.path.join(root, folder, f"{i}.png")
+            page, box = packed.find(path)
+            with Image.open(page) as page_image:
+                region = page_image.crop(box)
+            with Image.open(path) as loose:
+                assert region.tobytes() == loose.convert("RGBA").tobytes()
+
+    assert packed.find(os.path.join(root, "tiles", "other.png")) is None
+    assert packed.find(os.path.join(root, "elsewhere", "0.png")) is None
+
+
+def test_decode_image_reads_from_the_atlas(tmp_path, monkeypatch):
+    root = str(tmp_path / "res")
+    save_folder(root, "tiles", 4)
+    atlas.build(root, ("tiles",), page_size=64)
+    monkeypatch.setattr(assets, "ATLAS", None)
+    assets.use_atlas(os.path.join(root, "atlas"))
+    assert assets.ATLAS is not None
+
+    path = os.path.join(root, "tiles", "2.png")
+    with Image.open(path) as loose:
+        assert assets.decode_image(path).tobytes() == loose.convert("RGBA").tobytes()
+
+
+def test_unbuilt_atlas_loads_as_none(tmp_path):
+    assert atlas.Atlas.load(str(tmp_path)) is None
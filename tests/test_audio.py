@@ -0,0 +1,127 @@
+import pyglet
+import pytest
+from mod_or_die.tools.audio import Mixer
+
+
+class Source:
+    def __init__(self, duration):
+        self.duration = duration
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakePlayer:
+    """ Stands in for pyglet.media.Player, which needs an audio driver. """
+    created = []
+
+    def __init__(self):
+        self.volume = 1.0
+        self.handlers = {}
+        self.deleted = False
+        FakePlayer.created.append(self)
+
+    def queue(self, source):
+        self.source = source
+
+    def play(self):
+        pass
+
+    def pause(self):
+        pass
+
+    def delete(self):
+        self.deleted = True
+
+    def push_handlers(self, **handlers):
+        self.handlers.update(handlers)
+
+
+def mixer(voices=3, limit=2):
+    clock = Clock()
+    mix = Mixer(voices, limit=limit, muted=True, clock=clock)
+    mix.add("jump", Source(1.0))
+    mix.add("coin", Source(1.0), limit=5)
+    mix.add("music", Source(60.0), priority=5)
+    mix.add("death", Source(2.0), priority=9)
+    return mix, clock
+
+
+def test_sounds_play_on_free_voices():
+    mix, clock = mixer()
+    assert mix.play("jump") is not None
+    assert mix.play("coin") is not None
+    assert sorted(mix.active()) == ["coin", "jump"]
+    clock.now = 1.5
+    assert mix.active() == []
+
+
+def test_limit_replaces_the_oldest_copy():
+    mix, clock = mixer(voices=8, limit=2)
+    first = mix.play("jump")
+    clock.now = 0.1
+    mix.play("jump")
+    clock.now = 0.2
+    third = mix.play("jump")
+    assert third is first and third.started == 0.2
+    assert mix.active().count("jump") == 2
+    assert mix.stats()["stolen"] == 1
+
+
+def test_full_mixer_steals_the_oldest_lowest_priority_voice():
+    mix, clock = mixer(voices=3)
+    mix.play("music")
+    clock.now = 0.1
+    oldest = mix.play("coin")
+    clock.now = 0.2
+    mix.play("coin")
+    clock.now = 0.3
+    voice = mix.play("death")
+    assert voice is oldest
+    assert sorted(mix.active()) == ["coin", "death", "music"]
+    assert mix.stats()["stolen"] == 1
+
+
+def test_low_priority_sounds_are_dropped_when_everything_matters_more():
+    mix, clock = mixer(voices=2)
+    mix.play("music")
+    mix.play("death")
+    assert mix.play("coin") is None
+    assert mix.stats()["dropped"] == 1
+    assert sorted(mix.active()) == ["death", "music"]
+
+
+@pytest.fixture
+def audible(monkeypatch):
+    FakePlayer.created = []
+    monkeypatch.setattr(pyglet.media, "Player", FakePlayer)
+    mix, clock = mixer()
+    mix.muted = False
+    return mix
+
+
+def test_voice_frees_itself_when_its_sound_ends(audible):
+    voice = audible.play("jump", volume=0.5)
+    player = voice.player
+    assert isinstance(player, FakePlayer) and player.volume == 0.5
+
+    player.handlers["on_player_eos"]()
+    assert voice.player is None and voice.name is None
+    assert player.deleted
+
+
+def test_late_end_of_a_replaced_player_is_ignored(audible):
+    voice = audible.play("jump")
+    old = voice.player
+    audible.sounds["jump"] = (Source(1.0), 1, 0)
+    assert audible.play("jump") is voice
+    new = voice.player
+    assert old.deleted and new is not old
+
+    old.handlers["on_player_eos"]()
+    assert voice.player is new and voice.name == "jump"
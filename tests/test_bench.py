@@ -0,0 +1,60 @@
+import json
+import pytest
+from mod_or_die.tools import bench
+
+
+def fake_suite(monkeypatch, *cases):
+    monkeypatch.setattr(bench, "suite", lambda sizes: [(name, {}, func) for name, func in cases])
+
+
+def skip():
+    raise bench.Skipped("no display")
+
+
+def broken():
+    raise AttributeError("broken benchmark")
+
+
+def test_skipped_benchmarks_are_reported(monkeypatch):
+    fake_suite(monkeypatch, ("fast", lambda: 1e-6), ("draw", skip))
+    assert bench.run([]) == [{"name": "fast", "params": {}, "seconds": 1e-6},
+                             {"name": "draw", "params": {}, "skipped": "no display"}]
+
+
+def test_broken_benchmarks_end_the_run(monkeypatch):
+    fake_suite(monkeypatch, ("fast", lambda: 1e-6), ("broken", broken))
+    with pytest.raises(AttributeError):
+        bench.run([])
+
+
+def test_untimed_baseline_entries_fail_the_gate(monkeypatch, tmp_path):
+    baseline = str(tmp_path / "baseline.json")
+    fake_suite(monkeypatch, ("fast", lambda: 1e-6), ("draw", lambda: 1e-6))
+    assert bench.main(["--save-baseline", baseline]) == 0
+    assert bench.main(["--baseline", baseline]) == 0
+
+    fake_suite(monkeypatch, ("fast", lambda: 1e-6), ("draw", skip))
+    assert bench.main(["--baseline", baseline]) == 1
+    # Benchmarks left out with --only are not missing
+    assert bench.main(["--baseline", baseline, "--only", "fast"]) == 0
+
+
+def test_regressions_fail_the_gate(monkeypatch, tmp_path):
+    baseline = str(tmp_path / "baseline.json")
+    fake_suite(monkeypatch, ("fast", lambda: 1e-6))
+    bench.main(["--save-baseline", baseline])
+    fake_suite(monkeypatch, ("fast", lambda: 2e-6))
+    assert bench.main(["--baseline", baseline, "--tolerance", "0.5"]) == 1
+    with open(baseline) as fh:
+        assert json.load(fh)["results"][0]["seconds"] == 1e-6
+
+
+def test_draw_without_a_display_is_skipped():
+    try:
+        import pyglet.canvas
+        pyglet.canvas.get_display()
+    except bench._no_display_errors():
+        with pytest.raises(bench.Skipped):
+            bench.bench_draw(10, frames=1)
+    else:
+        pytest.skip("a display is available")
@@ -0,0 +1,60 @@
+import pytest
+from mod_or_die.tools import level_format
+from mod_or_die.tools.bench import FlatLevel
+
+TILES = 200
+FLOOR = {"layers": {"block": {"0": {str(i): "grassMid" for i in range(TILES)}}}}
+
+
+@pytest.fixture(params=["placed", "map", "compiled"])
+def level(request, tmp_path):
+    level_map = None
+    if request.param == "map":
+        level_map = FLOOR
+    elif request.param == "compiled":
+        level_map = str(tmp_path / "floor.lvl")
+        level_format.save(level_format.compile_map(FLOOR), level_map)
+    level = FlatLevel(tiles=TILES, map=level_map, headless=True)
+    level.setup()
+    return level
+
+
+def tiles_per_chunk(level):
+    return int(level.conf.CHUNK_WIDTH / (2 * level.conf.TILE_RADIUS))
+
+
+def test_only_chunks_near_the_player_are_loaded(level):
+    assert sorted(level.chunks.loaded) == [0, 1]
+    assert len(level.assets["block"]) == 2 * tiles_per_chunk(level)
+
+
+def test_far_chunks_are_evicted_and_near_ones_loaded(level):
+    width = level.conf.CHUNK_WIDTH
+    level.chunks.update(6.5 * width)
+    assert sorted(level.chunks.loaded) == [5, 6, 7]
+    blocks = level.assets["block"]
+    assert len(blocks) == 3 * tiles_per_chunk(level)
+    assert all(5 * width <= block.center_x < 8 * width for block in blocks)
+
+
+def test_evicted_chunks_come_back_the_same(level):
+    before = sorted((b.center_x, b.center_y, b.texture.name) for b in level.assets["block"])
+    level.chunks.update(6.5 * level.conf.CHUNK_WIDTH)
+    level.chunks.update(level.player.center_x)
+    after = sorted((b.center_x, b.center_y, b.texture.name) for b in level.assets["block"])
+    assert after == before
+
+
+def test_streamed_chunks_are_solid(level):
+    width = level.conf.CHUNK_WIDTH
+    level.player.center_x = 6.5 * width
+    level.chunks.update(level.player.center_x)
+    for _ in range(60):
+        level.physics_engine.update()
+    assert level.player.bottom == pytest.approx(2 * level.conf.TILE_RADIUS, abs=1)
+
+    # Nothing left to stand on once the floor under the player is evicted
+    level.chunks.update(20.5 * width)
+    level.physics_engine.update()
+    level.physics_engine.update()
+    assert level.player.bottom < 2 * level.conf.TILE_RADIUS
@@ -0,0 +1,86 @@
+import os
+import numpy as np
+import pytest
+from PIL import Image
+from mod_or_die.tools import color_to_alpha
+
+WHITE = (255, 255, 255)
+
+
+def old_transparent(img, color):
+    """ The per-pixel loop color_to_alpha.transparent used to run, without the save. """
+    pixdata = img.load()
+    width, height = img.size
+    for y in range(height):
+        for x in range(width):
+            if pixdata[x, y][:3] == color:
+                pixdata[x, y] = (255, 255, 255, 0)
+    return img
+
+
+def sample(side=24, seed=1):
+    """ Random RGBA pixels, a third of them the key color. """
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, (side, side, 4), dtype=np.uint8)
+    pixels[rng.random((side, side)) < 1 / 3, :3] = WHITE
+    return pixels
+
+
+def test_default_key_out_matches_the_per_pixel_loop():
+    for color in (WHITE, (12, 200, 7)):
+        pixels = sample()
+        pixels[::3, ::2, :3] = color
+        expected = np.asarray(old_transparent(Image.fromarray(pixels, "RGBA").copy(), color))
+        keyed = color_to_alpha.key_out(pixels, color)
+        assert keyed.tobytes() == expected.tobytes()
+
+
+def test_softness_fades_and_unmixes():
+    pixels = np.array([[[255, 255, 255, 255], [235, 235, 255, 255], [0, 0, 255, 255]]], dtype=np.uint8)
+    keyed = color_to_alpha.key_out(pixels, WHITE, tolerance=10, softness=20)
+    assert keyed[0, :, 3].tolist() == [0, 128, 255]
+    assert keyed[0, 2].tolist() == [0, 0, 255, 255]
+
+
+def save(path, side=4):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.fromarray(sample(side), "RGBA").save(path)
+
+
+def test_outputs_newer_than_their_source_are_skipped(tmp_path):
+    root, out = str(tmp_path / "in"), str(tmp_path / "out")
+    save(os.path.join(root, "a.png"))
+    save(os.path.join(root, "sub", "b.png"))
+    assert [target for _, target in color_to_alpha.find_images(root, out)] == [
+        os.path.join(out, "a.png"), os.path.join(out, "sub", "b.png")]
+
+    images, _, _ = color_to_alpha.batch(root, WHITE, out_root=out, workers=1)
+    assert images == 2
+    assert color_to_alpha.find_images(root, out) == []
+
+    # A source edited after its output was written is keyed again
+    source = os.path.join(root, "sub", "b.png")
+    later = os.path.getmtime(os.path.join(out, "sub", "b.png")) + 10
+    os.utime(source, (later, later))
+    assert color_to_alpha.find_images(root, out) == [(source, os.path.join(out, "sub", "b.png"))]
+
+
+def test_out_or_in_place_is_required(tmp_path):
+    root = str(tmp_path / "in")
+    source = os.path.join(root, "a.png")
+    save(source)
+    with open(source, "rb") as fh:
+        original = fh.read()
+
+    for argv in ([root], [root, "--out", str(tmp_path / "out"), "--in-place"], []):
+        with pytest.raises(SystemExit):
+            color_to_alpha.main(argv)
+
+    color_to_alpha.main([root, "--out", str(tmp_path / "out"), "--workers", "1"])
+    assert os.path.exists(str(tmp_path / "out" / "a.png"))
+    with open(source, "rb") as fh:
+        assert fh.read() == original
+
+    color_to_alpha.main([root, "--in-place", "--workers", "1"])
+    with open(source, "rb") as fh:
+        assert fh.read() != original
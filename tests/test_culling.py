@@ -0,0 +1,102 @@
+import random
+import arcade
+from mod_or_die.tools.culling import ViewCuller, sprite_bounds
+
+MARGIN = 100
+WIDTH, HEIGHT = 800, 600
+
+
+def long_row(count=600, seed=3):
+    """ Sprites of mixed sizes along x, a few wide ones reaching far to the right, some up high. """
+    rng = random.Random(seed)
+    sprite_list = arcade.SpriteList()
+    for i in range(count):
+        sprite = arcade.Sprite()
+        sprite.width = rng.choice((32, 64, 64, 128, 900))
+        sprite.height = rng.choice((32, 64, 128))
+        sprite.center_x = i * 50 + rng.uniform(-20, 20)
+        sprite.center_y = rng.choice((0, 100, 300, 900, 1500))
+        sprite_list.append(sprite)
+    # Shuffled, the layer has to sort them itself
+    sprites = list(sprite_list)
+    rng.shuffle(sprites)
+    shuffled = arcade.SpriteList()
+    for sprite in sprites:
+        shuffled.append(sprite)
+    return shuffled
+
+
+def brute_force(sprite_list, window):
+    w_left, w_right, w_bottom, w_top = window
+    return [i for i, s in enumerate(sprite_list)
+            if s.right >= w_left and s.left <= w_right and s.top >= w_bottom and s.bottom <= w_top]
+
+
+def visible_indices(layer):
+    index = {id(sprite): i for i, sprite in enumerate(layer.sprite_list)}
+    return sorted(index[id(sprite)] for sprite in layer.visible)
+
+
+def test_visible_window_matches_a_brute_force_filter():
+    sprite_list = long_row()
+    culler = ViewCuller(MARGIN)
+    layer = culler.add(sprite_list)
+    windows = set()
+    for left in range(-500, 31000, 37):
+        bottom = (left // 3000) * 200
+        culler.update(left, bottom, WIDTH, HEIGHT)
+        windows.add(layer.window)
+        expected = brute_force(sprite_list, layer.window)
+        assert layer.indices.tolist() == expected
+        assert visible_indices(layer) == expected
+        # Everything in the view itself is drawn
+        view = (left, left + WIDTH, bottom, bottom + HEIGHT)
+        assert set(brute_force(sprite_list, view)) <= set(expected)
+        assert culler.visible(sprite_list) is layer.visible
+    # Steps of 37 px outrun the 50 px slack on every other frame at most
+    assert 1 < len(windows) < len(range(-500, 31000, 37))
+
+
+def test_window_is_only_rebuilt_past_the_slack():
+    culler = ViewCuller(MARGIN)
+    layer = culler.add(long_row())
+    culler.update(0, 0, WIDTH, HEIGHT)
+    first = layer.window
+    assert first == (-MARGIN, WIDTH + MARGIN, -MARGIN, HEIGHT + MARGIN)
+
+    # Within half the margin the window stays
+    culler.update(MARGIN / 2, 0, WIDTH, HEIGHT)
+    assert layer.window is first
+    culler.update(MARGIN / 2 + 1, 0, WIDTH, HEIGHT)
+    assert layer.window == (MARGIN / 2 + 1 - MARGIN, MARGIN / 2 + 1 + WIDTH + MARGIN, -MARGIN, HEIGHT + MARGIN)
+    culler.update(MARGIN / 2 + 1, -MARGIN, WIDTH, HEIGHT)
+    assert layer.window[2] == -2 * MARGIN
+
+
+def test_moving_layers_read_fresh_bounds():
+    sprite_list = long_row(50)
+    culler = ViewCuller(MARGIN)
+    layer = culler.add(sprite_list, bounds=lambda: sprite_bounds(sprite_list))
+    culler.update(0, 0, WIDTH, HEIGHT)
+    before = visible_indices(layer)
+    for sprite in sprite_list:
+        sprite.center_x += 1000
+    # The view did not move, the sprites did
+    culler.update(0, 0, WIDTH, HEIGHT)
+    assert visible_indices(layer) == brute_force(sprite_list, layer.window) != before
+
+
+def test_refresh_picks_up_added_sprites():
+    sprite_list = long_row(50)
+    culler = ViewCuller(MARGIN)
+    layer = culler.add(sprite_list)
+    culler.update(0, 0, WIDTH, HEIGHT)
+    added = arcade.Sprite()
+    added.width = added.height = 10
+    added.center_x, added.center_y = 400, 300
+    sprite_list.append(added)
+    culler.refresh(sprite_list)
+    refreshed = culler.layers[id(sprite_list)]
+    assert refreshed.visible is layer.visible
+    assert added in list(refreshed.visible)
+    assert visible_indices(refreshed) == brute_force(sprite_list, refreshed.window)
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+import arcade
+from mod_or_die.tools.entities import EntityStore
+
+
+def store_with_hp():
+    store = EntityStore(capacity=4)
+    store.define("hp", default=100)
+    return store
+
+
+def test_add_sets_columns_and_defaults():
+    store = store_with_hp()
+    index = store.add(x=3, y=4)
+    entity = store.entity(index)
+    assert (entity.x, entity.y, entity.hp) == (3, 4, 100)
+
+
+def test_removed_rows_are_reused_with_defaults():
+    store = store_with_hp()
+    first = store.add(x=1, hp=5)
+    second = store.add(x=2)
+    store.remove(first)
+    assert len(store) == 1
+    assert list(store.indices()) == [second]
+
+    reused = store.add(x=7)
+    assert reused == first
+    assert store.entity(reused).hp == 100
+    assert len(store) == 2
+
+
+def test_clear_does_not_leak_old_values():
+    store = store_with_hp()
+    store.add(x=3, hp=50)
+    store.clear()
+    assert len(store) == 0
+    index = store.add(x=3)
+    assert store.entity(index).hp == 100
+
+
+def test_set_state_does_not_leak_values_into_new_rows():
+    store = store_with_hp()
+    state = store.state()
+    store.add(hp=1)
+    store.set_state(state)
+    assert store.entity(store.add()).hp == 100
+
+
+def test_grows_past_capacity():
+    store = store_with_hp()
+    for i in range(10):
+        store.add(x=i)
+    assert store.capacity >= 10
+    assert np.array_equal(store["x"], np.arange(10))
+    assert np.all(store["hp"] == 100)
+
+
+def test_state_round_trip():
+    store = store_with_hp()
+    index = store.add(x=1, hp=10)
+    state = store.state()
+    store.entity(index).hp = 0
+    store.remove(index)
+    store.set_state(state)
+    assert len(store) == 1
+    assert store.entity(index).hp == 10
+
+
+def test_entity_rejects_unknown_columns():
+    store = store_with_hp()
+    entity = store.entity(store.add())
+    with pytest.raises(AttributeError):
+        entity.speed = 3
+
+
+def test_write_back_moves_and_scales_sprites():
+    store = store_with_hp()
+    store.define("scale", default=1.0)
+    sprite = arcade.Sprite()
+    store.add(sprite, x=10, y=20, scale=2.0)
+    store.write_back([0], scale="scale")
+    assert list(sprite.position) == [10, 20]
+    assert sprite.scale == 2.0
@@ -0,0 +1,59 @@
+from mod_or_die.tools.environment import LevelEnv, VecEnv
+from .conftest import L1, L1_KWARGS
+
+RIGHT = 0
+
+
+def run_episode(env):
+    env.reset()
+    done = False
+    while not done:
+        observation, reward, done, info = env.step(RIGHT)
+    return info
+
+
+def test_episode_is_won_running_right():
+    info = run_episode(LevelEnv(L1, L1_KWARGS))
+    assert info["won"] and not info["died"]
+
+
+def test_reset_after_win_starts_a_fresh_episode():
+    env = LevelEnv(L1, L1_KWARGS)
+    first = run_episode(env)
+    second = run_episode(env)
+    assert second["won"]
+    assert second["steps"] == first["steps"]
+
+
+def test_reset_after_win_restores_start_state():
+    env = LevelEnv(L1, L1_KWARGS)
+    start = env.reset()
+    run_episode(env)
+    assert (env.reset() == start).all()
+    for _ in range(50):
+        observation, *_ = env.step(RIGHT)
+    fresh = LevelEnv(L1, L1_KWARGS)
+    fresh.reset()
+    for _ in range(50):
+        expected, *_ = fresh.step(RIGHT)
+    assert (observation == expected).all()
+
+
+def test_reset_after_death_restores_snapshot():
+    env = LevelEnv(L1, L1_KWARGS)
+    start = env.reset()
+    done = False
+    while not done:
+        observation, reward, done, info = env.step(2)
+    assert info["died"]
+    assert (env.reset() == start).all()
+
+
+def test_vec_env_batches():
+    with VecEnv(L1, 3, L1_KWARGS) as env:
+        observations = env.reset()
+        assert observations.shape == (3, env.observation_size)
+        observations, rewards, dones, infos = env.step([RIGHT] * 3)
+        assert observations.shape == (3, env.observation_size)
+        assert rewards.shape == dones.shape == (3,)
+        assert len(infos) == 3
@@ -0,0 +1,100 @@
+import os
+import shutil
+import numpy as np
+from PIL import Image
+from mod_or_die.tools import hitbox
+from mod_or_die.tools.hitbox import HitBoxCache
+
+
+def save(path, box, size=(10, 8), mtime=None):
+    """ A transparent image with the opaque (left, top, right, bottom) box. """
+    pixels = np.zeros((size[1], size[0], 4), dtype=np.uint8)
+    left, top, right, bottom = box
+    pixels[top:bottom, left:right] = 255
+    Image.fromarray(pixels, "RGBA").save(path)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_compute_is_centre_relative_and_y_up():
+    image = Image.new("RGBA", (10, 8))
+    image.paste((255, 0, 0, 255), (2, 1, 6, 3))
+    assert hitbox.compute(image) == ((-3.0, 1.0), (1.0, 1.0), (1.0, 3.0), (-3.0, 3.0))
+    # Fully transparent or no alpha at all collides everywhere
+    assert hitbox.compute(Image.new("RGBA", (4, 2))) == ((-2.0, -1.0), (2.0, -1.0), (2.0, 1.0), (-2.0, 1.0))
+    assert hitbox.compute(Image.new("RGB", (4, 2))) == hitbox.compute(Image.new("RGBA", (4, 2)))
+    assert hitbox.transform(((1.0, 2.0),), scale=2, mirrored=True) == ((-2.0, 4.0),)
+
+
+def counted_hashes(monkeypatch):
+    hashed = []
+    file_hash = hitbox.file_hash
+    monkeypatch.setattr(hitbox, "file_hash", lambda path: hashed.append(path) or file_hash(path))
+    return hashed
+
+
+def test_unchanged_files_are_not_read_again(tmp_path, monkeypatch):
+    image = str(tmp_path / "a.png")
+    save(image, (0, 0, 4, 4), mtime=1000)
+    cache = HitBoxCache(str(tmp_path / "cache.json"))
+    first = cache.get(image)
+    cache.save()
+
+    hashed = counted_hashes(monkeypatch)
+    reopened = HitBoxCache(str(tmp_path / "cache.json"))
+    assert reopened.get(image) == first
+    assert hashed == [] and reopened.computed == 0 and not reopened.dirty
+
+
+def test_changed_content_is_rescanned(tmp_path):
+    image = str(tmp_path / "a.png")
+    save(image, (0, 0, 4, 4), mtime=1000)
+    cache = HitBoxCache(str(tmp_path / "cache.json"))
+    before = cache.get(image)
+
+    save(image, (2, 2, 10, 8), mtime=2000)
+    after = cache.get(image)
+    assert after != before and after == hitbox.compute(Image.open(image))
+    assert cache.computed == 2
+
+
+def test_touched_or_copied_files_are_hashed_but_not_rescanned(tmp_path, monkeypatch):
+    image = str(tmp_path / "a.png")
+    save(image, (1, 1, 5, 5), mtime=1000)
+    cache = HitBoxCache(str(tmp_path / "cache.json"))
+    box = cache.get(image)
+
+    hashed = counted_hashes(monkeypatch)
+    os.utime(image, (3000, 3000))
+    copy = str(tmp_path / "b.png")
+    shutil.copy(image, copy)
+    assert cache.get(image) == box and cache.get(copy) == box
+    assert hashed == [image, copy]
+    assert cache.computed == 1 and len(cache) == 1
+
+
+def test_cache_survives_the_tree_moving(tmp_path):
+    old = tmp_path / "old"
+    old.mkdir()
+    save(str(old / "a.png"), (0, 0, 3, 3), mtime=1000)
+    cache = HitBoxCache(str(old / "cache.json"))
+    box = cache.get(str(old / "a.png"))
+    cache.save()
+    assert list(cache.files) == ["a.png"]
+
+    new = tmp_path / "new"
+    shutil.copytree(str(old), str(new), copy_function=shutil.copy2)
+    moved = HitBoxCache(str(new / "cache.json"))
+    assert moved.get(str(new / "a.png")) == box and moved.computed == 0
+
+
+def test_corrupt_cache_is_rebuilt(tmp_path):
+    path = tmp_path / "cache.json"
+    path.write_text("{not json")
+    image = str(tmp_path / "a.png")
+    save(image, (0, 0, 2, 2))
+    cache = HitBoxCache(str(path))
+    assert len(cache) == 0
+    cache.get(image)
+    cache.save()
+    assert len(HitBoxCache(str(path))) == 1
@@ -0,0 +1,113 @@
+import arcade
+import PIL.Image
+import pytest
+from mod_or_die.tools.animation import WaveGroup
+from mod_or_die.tools.layers import RIGID, STATIC, BakedLayer
+
+SIZE = 32
+CELL = 128
+
+
+def tile(x, y, color=(255, 0, 0, 255)):
+    sprite = arcade.Sprite()
+    sprite.texture = arcade.Texture(f"tile{color}", PIL.Image.new("RGBA", (SIZE, SIZE), color))
+    sprite.center_x, sprite.center_y = x, y
+    return sprite
+
+
+def row(count):
+    """ count tiles side by side, cells hold four each. """
+    sprite_list = arcade.SpriteList()
+    for i in range(count):
+        sprite_list.append(tile(i * SIZE + SIZE / 2, SIZE / 2))
+    return sprite_list
+
+
+def baked_sprite(layer, key):
+    return layer.cells[key][1][0]
+
+
+def test_sprites_are_baked_per_cell():
+    layer = BakedLayer(row(8), STATIC, cell=CELL)
+    layer.rebake()
+    assert sorted(layer.cells) == [(0, 0), (1, 0)]
+    baked = baked_sprite(layer, (1, 0))
+    assert (baked.left, baked.right, baked.bottom, baked.top) == (CELL, 2 * CELL, 0, SIZE)
+    assert not layer.dirty
+
+
+def test_rebake_only_redoes_changed_cells():
+    sprite_list = row(8)
+    layer = BakedLayer(sprite_list, STATIC, cell=CELL)
+    layer.rebake()
+    kept, changed = layer.cells[(0, 0)], layer.cells[(1, 0)]
+    texture = changed[1][0].texture
+
+    sprite_list[7].texture = tile(0, 0, (0, 0, 255, 255)).texture
+    layer.dirty = True
+    layer.rebake()
+    assert layer.cells[(0, 0)] is kept
+    signature, baked_list = layer.cells[(1, 0)]
+    assert signature != changed[0]
+    # The cell keeps its list and texture name, only the image is new
+    assert baked_list is changed[1]
+    assert baked_list[0].texture is not texture
+    assert baked_list[0].texture.name == texture.name
+    assert baked_list[0].texture.image.getpixel((SIZE * 3 + 1, 1)) == (0, 0, 255, 255)
+
+
+def test_cells_without_sprites_are_dropped():
+    sprite_list = row(8)
+    layer = BakedLayer(sprite_list, STATIC, cell=CELL)
+    layer.rebake()
+    for sprite in list(sprite_list)[4:]:
+        sprite_list.remove(sprite)
+    layer.dirty = True
+    layer.rebake()
+    assert list(layer.cells) == [(0, 0)]
+
+
+def test_rigid_layer_follows_its_first_sprite():
+    sprite_list = row(8)
+    layer = BakedLayer(sprite_list, RIGID, cell=CELL)
+    layer.rebake()
+    start = {key: tuple(baked_sprite(layer, key).position) for key in layer.cells}
+
+    for sprite in sprite_list:
+        sprite.center_x += 5
+        sprite.center_y += 3
+    layer._follow()
+    assert layer.offset == (5, 3)
+    for key, (x, y) in start.items():
+        assert tuple(baked_sprite(layer, key).position) == (x + 5, y + 3)
+
+    # Following again without a move changes nothing
+    layer._follow()
+    assert tuple(baked_sprite(layer, (0, 0)).position) == (start[(0, 0)][0] + 5, start[(0, 0)][1] + 3)
+
+    # A rebake starts from the sprites where they are now
+    layer.dirty = True
+    layer.rebake()
+    assert layer.offset == (0.0, 0.0)
+    assert baked_sprite(layer, (0, 0)).center_y == pytest.approx(SIZE / 2 + 3)
+
+
+def test_baked_wave_group_moves_only_its_first_sprite():
+    sprite_list = row(8)
+    group = WaveGroup(sprite_list, step=0.1, amplitude=10, rise=1)
+    layer = BakedLayer(sprite_list, RIGID, cell=CELL)
+    group.bake(layer)
+    layer.rebake()
+    for _ in range(5):
+        group.step()
+    assert tuple(sprite_list[0].position) == (group.x[0], group.y[0])
+    assert sprite_list[7].center_y == SIZE / 2
+
+    layer._follow()
+    assert layer.offset == (group.x[0] - SIZE / 2, group.y[0] - SIZE / 2)
+
+    # Rebaking writes the others first
+    layer.dirty = True
+    layer.rebake()
+    assert [s.center_y for s in sprite_list] == group.y.tolist()
+    assert [s.center_x for s in sprite_list] == group.x.tolist()
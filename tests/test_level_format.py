@@ -0,0 +1,76 @@
+import json
+import numpy as np
+import pytest
+from mod_or_die.tools import level_format
+
+SOURCE = {
+    "layers": {
+        "block": {"0": {"2": "grassRight", "0": "grassLeft", "1": "grassMid"}},
+        "statics": {"3": {"1": "signExit"}},
+    },
+    "objects": [{"name": "exit", "list": "statics", "tile": "signExit", "x": 6400, "y": 185}],
+}
+
+
+def test_compile_flattens_and_sorts_by_x():
+    level_map = level_format.compile_map(SOURCE)
+    assert level_map.tiles == ["grassRight", "grassLeft", "grassMid", "signExit"]
+    assert level_map.lists == ["block", "statics"]
+    assert level_map.records["x"].tolist() == [0, 128, 128, 256]
+    assert level_map.records["y"].tolist() == [64, 64, 448, 64]
+    names = [level_map.tiles[t] for t in level_map.records["tile"].tolist()]
+    assert names == ["grassLeft", "grassMid", "signExit", "grassRight"]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    level_map = level_format.compile_map(SOURCE)
+    path = str(tmp_path / "level.lvl")
+    level_format.save(level_map, path)
+    loaded = level_format.load(path)
+
+    assert isinstance(loaded.records, np.memmap)
+    assert np.array_equal(loaded.records, level_map.records)
+    assert loaded.tiles == level_map.tiles
+    assert loaded.lists == level_map.lists
+    assert loaded.objects == level_map.objects
+    assert loaded.tile_size == level_map.tile_size
+
+
+def test_records_are_aligned(tmp_path):
+    path = str(tmp_path / "level.lvl")
+    level_format.save(level_format.compile_map(SOURCE), path)
+    assert level_format.load(path).records.offset % level_format.ALIGN == 0
+
+
+def test_empty_map_round_trip(tmp_path):
+    path = str(tmp_path / "empty.lvl")
+    level_format.save(level_format.compile_map({}), path)
+    loaded = level_format.load(path)
+    assert len(loaded) == 0 and loaded.records.dtype == level_format.RECORD
+
+
+def test_load_json_file_and_dict(tmp_path):
+    path = tmp_path / "level.json"
+    path.write_text(json.dumps(SOURCE))
+    from_file = level_format.load(str(path))
+    from_dict = level_format.load(SOURCE)
+    assert np.array_equal(from_file.records, from_dict.records)
+    assert level_format.load(from_dict) is from_dict
+
+
+def test_tile_size_scales_the_grid():
+    level_map = level_format.compile_map(dict(SOURCE, tile_size=10))
+    assert level_map.records["x"].max() == 20
+    assert level_map.tile_size == 10
+
+
+def test_too_many_tiles_is_an_error():
+    row = {str(column): f"tile{column}" for column in range(level_format.MAX_TILES + 1)}
+    with pytest.raises(ValueError):
+        level_format.compile_map({"layers": {"block": {"0": row}}})
+
+
+def test_too_many_lists_is_an_error():
+    layers = {f"list{i}": {"0": {"0": "grassMid"}} for i in range(level_format.MAX_LISTS + 1)}
+    with pytest.raises(ValueError):
+        level_format.compile_map({"layers": layers})
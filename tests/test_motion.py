@@ -0,0 +1,63 @@
+import math
+import numpy as np
+import pytest
+from mod_or_die.tools import motion
+
+U = np.linspace(0, 1, 1001)
+
+
+@pytest.mark.parametrize("name", sorted(motion.EASINGS))
+def test_easings_run_from_0_to_1_without_turning_back(name):
+    eased = np.asarray(motion.EASINGS[name](U), dtype=np.float64)
+    assert eased[0] == pytest.approx(0, abs=1e-12) and eased[-1] == pytest.approx(1)
+    assert np.all(np.diff(eased) >= -1e-12)
+    if name.startswith("in_out") or name == "smoothstep":
+        assert np.allclose(eased + eased[::-1], 1)
+
+
+def test_tween_holds_outside_its_duration():
+    begin = np.array([0.0, 1.0, 2.0])
+    assert motion.tween(-5, 10, 20).tolist() == 10
+    assert motion.tween(1.5, 10, 20, begin=begin, duration=2).tolist() == [17.5, 12.5, 10]
+    assert motion.tween(9, 10, 20, begin=begin, duration=2).tolist() == [20, 20, 20]
+    assert motion.tween(.5, [0, 10], [10, 0], easing="in_quad").tolist() == [2.5, 7.5]
+
+
+def test_sine_and_rotation():
+    phases = np.linspace(0, 3, 7)
+    assert np.allclose(motion.sine(2.0, phase=phases, rate=.6, amplitude=3, offset=1),
+                       3 * np.sin(phases + 1.2) + 1)
+    assert np.all(motion.sine(2.0, phase=phases, absolute=True) >= 0)
+
+    x, y = np.array([1.0, 3.0]), np.array([0.0, 2.0])
+    rx, ry = motion.rotation(1.0, x, y, 1.0, 1.0, rate=math.pi / 2)
+    assert np.allclose(rx, [2, 0]) and np.allclose(ry, [1, 3])
+    assert np.allclose(np.hypot(rx - 1, ry - 1), np.hypot(x - 1, y - 1))
+
+
+def test_sine_table_matches_numpy():
+    x = np.linspace(-20, 20, 100001)
+    assert np.max(np.abs(motion.SINE_TABLE(x) - np.sin(x))) < 3e-7
+
+
+def test_lookup_table_interpolates_between_samples():
+    table = motion.LookupTable(lambda x: x * x, 0.0, 4.0, size=4)
+    assert table(2.5).tolist() == 6.5
+    assert table([0.0, 3.0, 4.0]).tolist() == [0, 9, 16]
+    # Held at the ends unless periodic
+    assert table([-1.0, 5.0]).tolist() == [0, 16]
+    periodic = motion.LookupTable(lambda x: x * x, 0.0, 4.0, size=4, periodic=True)
+    assert periodic([-1.5, 5.0]).tolist() == [6.5, 1]
+
+
+def test_noise_is_smooth_repeatable_and_in_range():
+    seeds = np.arange(20)
+    t = np.linspace(0, 50, 5001)
+    curves = np.array([motion.noise(t, seed=seed, rate=2, amplitude=3) for seed in seeds])
+    assert np.all(np.abs(curves) <= 3)
+    assert np.array_equal(curves[4], motion.noise(t, seed=4, rate=2, amplitude=3))
+    # Seeds give independent curves
+    assert not np.allclose(curves[0], curves[1])
+    # No steeper than amplitude * widest lattice gap * smoothstep's peak slope * rate
+    assert np.max(np.abs(np.diff(curves, axis=1))) <= 3 * 2 * 1.5 * 2 * (t[1] - t[0]) + 1e-9
+    assert motion.noise(.3, seed=seeds).shape == seeds.shape
@@ -0,0 +1,101 @@
+import arcade
+from mod_or_die.tools.physics import GridPhysicsEngine, SpatialGrid
+
+TILE = 128
+
+
+def block(x, y, size=TILE):
+    sprite = arcade.Sprite()
+    sprite.texture = arcade.Texture(f"block{size}", None)
+    sprite.width = sprite.height = size
+    sprite.center_x, sprite.center_y = x, y
+    return sprite
+
+
+def world():
+    """ A floor with a step, a wall and a floating ledge. """
+    blocks = arcade.SpriteList()
+    for i in range(40):
+        blocks.append(block(i * TILE, TILE / 2))
+    blocks.append(block(8 * TILE, 1.5 * TILE))
+    for j in range(1, 4):
+        blocks.append(block(20 * TILE, (j + .5) * TILE))
+    for i in range(12, 15):
+        blocks.append(block(i * TILE, 3.5 * TILE))
+    return blocks
+
+
+def player():
+    sprite = arcade.Sprite()
+    sprite.texture = arcade.Texture("player", None)
+    sprite.width, sprite.height = 90, 120
+    sprite.center_x, sprite.center_y = 200, 300
+    return sprite
+
+
+def inputs(frame):
+    """ Run right, stop and turn, jump every so often. """
+    change_x = 7 if frame < 260 else -5 if frame < 330 else 0
+    return change_x, frame % 37 == 0
+
+
+def trace(engine_class, frames=400):
+    sprite = player()
+    engine = engine_class(sprite, world(), 1.0)
+    positions = []
+    for frame in range(frames):
+        sprite.change_x, jump = inputs(frame)
+        if jump and engine.can_jump():
+            sprite.change_y = 20
+        engine.update()
+        positions.append((sprite.center_x, sprite.center_y, sprite.change_y))
+    return positions
+
+
+def test_grid_engine_moves_the_player_like_arcade():
+    assert trace(GridPhysicsEngine) == trace(arcade.PhysicsEnginePlatformer)
+
+
+def test_grid_engine_can_jump_like_arcade():
+    for engine_class in (GridPhysicsEngine, arcade.PhysicsEnginePlatformer):
+        sprite = player()
+        engine = engine_class(sprite, world(), 1.0)
+        assert not engine.can_jump()
+        for _ in range(30):
+            engine.update()
+        assert engine.can_jump()
+
+
+def test_added_and_removed_blocks_collide():
+    sprite = player()
+    floor = arcade.SpriteList()
+    engine = GridPhysicsEngine(sprite, floor, 1.0)
+    streamed = [block(i * TILE, TILE / 2) for i in range(4)]
+    engine.add(streamed)
+    assert len(floor) == 4
+    for _ in range(30):
+        engine.update()
+    assert sprite.bottom == TILE
+
+    engine.remove(streamed)
+    assert len(floor) == 0
+    for _ in range(10):
+        engine.update()
+    assert sprite.bottom < TILE
+
+
+def test_spatial_grid_query_and_remove():
+    grid = SpatialGrid(TILE)
+    near, far = block(0, 0), block(10 * TILE, 0)
+    # Spans four cells, still found once
+    wide = block(TILE / 2, TILE / 2, size=2 * TILE)
+    for sprite in (near, far, wide):
+        grid.insert(sprite)
+    found = list(grid.query(block(TILE / 4, 0)))
+    assert len(found) == 2 and near in found and wide in found
+
+    grid.remove(wide)
+    assert list(grid.query(block(TILE / 4, 0))) == [near]
+    grid.remove(near)
+    grid.remove(far)
+    assert len(grid) == 0
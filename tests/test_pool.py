@@ -0,0 +1,92 @@
+import arcade
+import pytest
+from mod_or_die.tools.pool import DROP, GROW, PARK, RECYCLE, SpritePool
+
+
+def make_pool(capacity=4, full=GROW):
+    return SpritePool(arcade.Sprite, arcade.SpriteList(), capacity=capacity, full=full)
+
+
+def test_sprites_are_created_up_front_and_parked():
+    pool = make_pool()
+    assert len(pool.sprite_list) == pool.capacity == 4
+    assert all(tuple(sprite.position) == PARK for sprite in pool.sprite_list)
+
+
+def test_spawn_places_a_sprite_and_release_parks_it():
+    pool = make_pool()
+    sprite = pool.spawn(10, 20, change_x=3, alpha=128)
+    assert tuple(sprite.position) == (10, 20)
+    assert sprite.change_x == 3 and sprite.alpha == 128
+    assert pool.active == 1 and pool.in_use() == [sprite]
+
+    pool.release(sprite)
+    assert tuple(sprite.position) == PARK and sprite.change_x == 0
+    assert pool.active == 0 and pool.in_use() == []
+    # Releasing twice is a no-op
+    pool.release(sprite)
+    assert pool.released == 1
+
+
+def test_released_sprites_are_handed_out_again():
+    pool = make_pool()
+    first = pool.spawn(0, 0)
+    pool.release(first)
+    assert pool.spawn(0, 0) is first
+    assert len(pool.sprite_list) == 4
+
+
+def test_full_pool_grows():
+    pool = make_pool(capacity=2)
+    spawned = [pool.spawn(i, 0) for i in range(3)]
+    assert all(sprite is not None for sprite in spawned)
+    assert pool.capacity == 4 and pool.grown == 1
+    assert len(pool.sprite_list) == 4
+
+
+def test_full_pool_drops():
+    pool = make_pool(capacity=2, full=DROP)
+    pool.spawn(0, 0)
+    pool.spawn(1, 0)
+    assert pool.spawn(2, 0) is None
+    assert pool.dropped == 1 and pool.capacity == 2
+
+
+def test_full_pool_recycles_the_oldest():
+    pool = make_pool(capacity=2, full=RECYCLE)
+    oldest = pool.spawn(0, 0)
+    newer = pool.spawn(1, 0)
+    again = pool.spawn(2, 0)
+    assert again is oldest and tuple(again.position) == (2, 0)
+    assert pool.in_use() == [newer, again]
+    assert pool.active == 2 and pool.capacity == 2
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        make_pool(full="explode")
+
+
+def test_set_state_parks_sprites_from_later_growth():
+    pool = make_pool(capacity=2)
+    kept = pool.spawn(0, 0)
+    state = pool.state()
+    extra = [pool.spawn(i, 0) for i in range(1, 4)]
+    pool.set_state(state)
+    assert pool.active == 1 and pool.in_use() == [kept]
+    assert all(tuple(sprite.position) == PARK for sprite in extra[1:])
+    # Every parked sprite can be handed out once
+    spawned = {id(pool.spawn(0, 0)) for _ in range(pool.capacity - 1)}
+    assert len(spawned) == pool.capacity - 1 and id(kept) not in spawned
+    assert pool.grown == 1
+
+
+def test_attach_moves_every_sprite():
+    pool = make_pool()
+    old_list = pool.sprite_list
+    pool.spawn(0, 0)
+    new_list = arcade.SpriteList()
+    pool.attach(new_list)
+    assert len(old_list) == 0 and len(new_list) == pool.capacity
+    assert pool.active == 0
+    assert all(sprite.sprite_lists == [new_list] for sprite in pool.sprites)
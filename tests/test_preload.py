@@ -0,0 +1,40 @@
+import pytest
+from concurrent.futures import wait
+from mod_or_die.levels.BaseLevel import Conf
+from mod_or_die.tools import assets
+from mod_or_die.tools.headless import load_level_class
+from mod_or_die.tools.preload import PreloadError, Preloader
+from .conftest import L1, L1_KWARGS
+
+GOOD = Conf().TILE_RESOURCES + "/grassCenter.png"
+
+
+def test_missing_file_is_raised_with_its_path(tmp_path):
+    missing = str(tmp_path / "missing.png")
+    preloader = Preloader([missing, GOOD], workers=1).start()
+    with pytest.raises(PreloadError) as raised:
+        preloader.wait()
+    assert raised.value.path == missing
+    assert isinstance(raised.value.__cause__, FileNotFoundError)
+    # The rest still loaded
+    assert preloader.done and preloader.progress == 1.0
+    assert ("texture", GOOD, 1, False) in assets.CACHE
+    assert ("image", missing) not in assets.PENDING
+
+    with pytest.raises(PreloadError):
+        preloader.poll()
+
+
+def test_loading_screen_hands_the_error_to_setup(tmp_path, monkeypatch):
+    missing = str(tmp_path / "missing.png")
+    level_class = load_level_class(L1)
+    monkeypatch.setattr(level_class, "preload_assets", lambda self: ([missing], []))
+    level = level_class(headless=True, **L1_KWARGS)
+    preloader = level.preload(workers=1)
+    wait(list(preloader._futures.values()))
+
+    # What the pyglet clock runs while the loading screen is up
+    with pytest.raises(PreloadError) as raised:
+        level._load_step(1 / 60)
+    assert raised.value.path == missing
+    assert level.preloader is None
@@ -0,0 +1,77 @@
+import os
+import sys
+import pytest
+from mod_or_die.tools.reload import LevelReloader
+from .conftest import L1_KWARGS
+
+MODULE = "reloaded_level"
+
+SOURCE = """
+from mod_or_die.levels.level_01 import L1
+
+VERSION = {version}
+
+
+class Level(L1):
+    def setup(self):
+        super().setup()
+        self.version = VERSION
+{tail}
+"""
+
+
+def write(folder, version, tail=""):
+    path = os.path.join(folder, MODULE + ".py")
+    with open(path, "w") as fh:
+        fh.write(SOURCE.format(version=version, tail=tail))
+    # Newer than any bytecode cached for the last version
+    later = os.path.getmtime(path) + version
+    os.utime(path, (later, later))
+
+
+@pytest.fixture
+def level(tmp_path, monkeypatch):
+    write(str(tmp_path), 1)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import reloaded_level
+    level = reloaded_level.Level(headless=True, **L1_KWARGS)
+    level.setup()
+    yield level
+    sys.modules.pop(MODULE, None)
+
+
+def test_reload_moves_the_level_to_the_new_class(level, tmp_path):
+    reloader = LevelReloader(level, dict(L1_KWARGS))
+    assert reloader.modules()[0] == MODULE
+    write(str(tmp_path), 2)
+    assert reloader.changed() == [MODULE]
+
+    assert reloader.check()
+    assert level.version == 2 and type(level) is sys.modules[MODULE].Level
+    assert reloader.changed() == [] and reloader.reloads == 1
+
+
+@pytest.mark.parametrize("tail", [
+    # Fails while importing, after replacing part of the module
+    "raise RuntimeError('broken import')",
+    # And after putting something else in sys.modules
+    "import sys\nsys.modules[__name__] = object()\nraise RuntimeError('broken import')",
+    # Imports fine, fails while starting
+    "    def draw_map(self):\n        raise RuntimeError('broken setup')",
+])
+def test_failed_reload_rolls_back(level, tmp_path, tail, capsys):
+    module = sys.modules[MODULE]
+    old_class, old_state = type(level), dict(level.__dict__)
+    reloader = LevelReloader(level, dict(L1_KWARGS))
+    write(str(tmp_path), 2, tail)
+
+    assert not reloader.reload()
+    assert "broken" in reloader.last_error and "still running the old code" in capsys.readouterr().err
+    assert sys.modules[MODULE] is module
+    assert module.Level is old_class and module.VERSION == 1
+    assert type(level) is old_class and level.__dict__ == old_state and level.version == 1
+
+    # The old code keeps running, and a fixed file reloads over it
+    level.update(1 / 60)
+    write(str(tmp_path), 3)
+    assert reloader.check() and level.version == 3
@@ -0,0 +1,69 @@
+import json
+import arcade
+import pytest
+from mod_or_die.tools import replay
+from mod_or_die.tools.headless import HeadlessRunner, load_level_class
+from .conftest import L1, L1_KWARGS
+
+SCRIPT = {0: [("press", "RIGHT")], 45: [("press", "UP")], 46: [("release", "UP")], 200: [("release", "RIGHT")]}
+
+
+def record(path, frames=300):
+    runner = HeadlessRunner(load_level_class(L1), **L1_KWARGS)
+    runner.level.recorder = replay.InputRecorder(L1, L1_KWARGS)
+    runner.run(frames, SCRIPT)
+    runner.level.recorder.save(path, runner.level)
+    return runner.level
+
+
+def test_recording_round_trip(tmp_path):
+    path = str(tmp_path / "run.rec")
+    level = record(path)
+    recording = replay.load(path)
+    assert recording.level == L1 and recording.kwargs == L1_KWARGS
+    assert recording.final == replay.final_state(level, 300)
+    assert recording.script() == {frame: [(action, getattr(arcade.key, key)) for action, key in events]
+                                  for frame, events in SCRIPT.items()}
+
+
+def test_replay_ends_where_the_recording_did(tmp_path):
+    path = str(tmp_path / "run.rec")
+    record(path)
+    result = replay.replay(path)
+    assert result.ok, result
+    assert result.actual["frames"] == 300
+
+
+def tamper(path):
+    """ Change the recorded final score, keeping the header the same length. """
+    with open(path, "rb") as fh:
+        data = fh.read()
+    tampered = data.replace(b'"score": 0', b'"score": 9')
+    assert tampered != data
+    with open(path, "wb") as fh:
+        fh.write(tampered)
+
+
+def test_replay_reports_a_different_ending(tmp_path):
+    path = str(tmp_path / "run.rec")
+    record(path)
+    tamper(path)
+    result = replay.replay(path)
+    assert not result.ok
+    assert result.mismatches == ["score"]
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "level.json"
+    path.write_text(json.dumps({}))
+    with pytest.raises(ValueError):
+        replay.load(str(path))
+
+
+def test_main_fails_on_mismatch(tmp_path):
+    good, bad = str(tmp_path / "good.rec"), str(tmp_path / "bad.rec")
+    record(good)
+    record(bad)
+    tamper(bad)
+    assert replay.main([good]) == 0
+    assert replay.main([good, bad]) == 1
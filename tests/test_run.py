@@ -0,0 +1,55 @@
+import json
+from types import SimpleNamespace
+import pytest
+from mod_or_die import run
+
+
+def points(**specs):
+    return [SimpleNamespace(name=name, value=spec) for name, spec in specs.items()]
+
+
+@pytest.fixture
+def installed(monkeypatch):
+    found = points(snakes="my_mod.snakes:Snakes", level_01="my_mod.fake:L1")
+    monkeypatch.setattr(run, "_entry_points", lambda: found)
+
+
+def test_registry_adds_entry_points_and_built_ins_win(installed):
+    levels = run.registry()
+    assert list(levels) == ["snakes", "level_01", "spiral"]
+    assert levels["snakes"].spec == "my_mod.snakes:Snakes" and levels["snakes"].source == "entry point"
+    assert levels["level_01"] is run.LEVELS["level_01"]
+
+    assert run.find("snakes").spec == "my_mod.snakes:Snakes"
+    assert run.find("level_01") is run.LEVELS["level_01"]
+    assert run.find("nope") is None
+
+
+def test_list_shows_every_level(installed, capsys):
+    assert run.main(["--list"]) == 0
+    out = capsys.readouterr().out
+    assert "snakes" in out and "(entry point)" in out and "spiral" in out
+
+
+@pytest.mark.parametrize("argv, message", [
+    (["nope"], "unknown level 'nope'"),
+    (["spiral", "--record", "spiral.rec"], "--record needs a BaseLevel"),
+    (["spiral", "--reload"], "--reload needs a BaseLevel"),
+])
+def test_bad_arguments_are_refused(argv, message, capsys):
+    with pytest.raises(SystemExit) as raised:
+        run.main(argv)
+    assert raised.value.code == 2
+    assert message in capsys.readouterr().err
+
+
+def test_headless_launch_appends_its_startup_times(tmp_path):
+    metrics = str(tmp_path / "startup.jsonl")
+    for _ in range(2):
+        assert run.main(["level_01", "--headless", "--quiet", "--metrics", metrics, "--arg", "speed=7"]) == 0
+    with open(metrics) as fh:
+        records = [json.loads(line) for line in fh]
+    assert len(records) == 2
+    assert records[0]["level"] == "level_01" and records[0]["headless"]
+    assert list(records[0]["phases"]) == ["launcher", "import", "construct", "setup", "first_frame"]
+    assert records[0]["first_frame"] >= sum(records[0]["phases"].values()) - 1e-9
@@ -0,0 +1,82 @@
+import arcade
+import numpy as np
+from mod_or_die.tools.headless import HeadlessRunner, load_level_class
+from mod_or_die.tools.snapshot import LevelSnapshot
+from .conftest import L1, L1_KWARGS
+
+
+def runner():
+    return HeadlessRunner(load_level_class(L1), **L1_KWARGS)
+
+
+def state(level):
+    water = level.water_list
+    return (tuple(level.player.position), level.player.change_x, level.player.change_y, level.score,
+            level.view_left, level.view_bottom, water.x.tolist(), water.y.tolist(), water.phase.tolist())
+
+
+def test_restore_puts_the_level_back():
+    run = runner()
+    level = run.level
+    start = state(level)
+    snapshot = LevelSnapshot(level)
+    run.run(120, {0: [("press", "RIGHT")], 30: [("press", "UP")]})
+    assert state(level) != start
+
+    snapshot.restore(level)
+    assert state(level) == start
+
+
+def test_restored_level_plays_like_a_fresh_one():
+    script = {0: [("press", "RIGHT")], 40: [("press", "UP")], 41: [("release", "UP")]}
+    run = runner()
+    snapshot = LevelSnapshot(run.level)
+    run.run(200, script)
+    snapshot.restore(run.level)
+    run.frame = 0
+    run.run(150, script)
+
+    fresh = runner()
+    fresh.run(150, script)
+    assert state(run.level) == state(fresh.level)
+
+
+def test_restore_from_a_later_frame():
+    run = runner()
+    run.run(60, {0: [("press", "RIGHT")]})
+    snapshot = LevelSnapshot(run.level)
+    middle = state(run.level)
+    run.run(60)
+    snapshot.restore(run.level)
+    assert state(run.level) == middle
+
+
+def test_pools_are_restored():
+    run = runner()
+    level = run.level
+    pool = level.add_pool("coin", "objects", arcade.Sprite, capacity=2)
+    kept = level.spawn("coin", 10, 20)
+    snapshot = LevelSnapshot(level)
+
+    level.despawn(kept)
+    level.spawn("coin", 0, 0)
+    snapshot.restore(level)
+
+    assert pool.in_use() == [kept]
+    assert tuple(kept.position) == (10, 20)
+
+
+def test_snapshot_does_not_match_rebuilt_lists():
+    run = runner()
+    snapshot = LevelSnapshot(run.level)
+    assert snapshot.matches(run.level)
+    run.level.win()
+    assert not snapshot.matches(run.level)
+
+
+def test_static_lists_are_skipped():
+    level = runner().level
+    snapshot = LevelSnapshot(level)
+    assert "block" not in snapshot.lists
+    assert "player" in snapshot.lists
+    assert np.array_equal(snapshot.lists["player"][1][0, :2], level.player.position)
@@ -0,0 +1,42 @@
+from mod_or_die.levels.level_01 import L1
+from mod_or_die.tools.solver import ACTIONS, DEAD, WON, Search, solve
+
+SPEC = "tests.test_solver:FloodedL1"
+KWARGS = {"speed": 5, "title": "flooded"}
+
+
+class FloodedL1(L1):
+    """ L1 with the exit one step to the right and water that drowns a player who waits. """
+
+    def draw_map(self):
+        super().draw_map()
+        self.exit.center_x = 250
+        self.water_list.rise = 2
+
+
+def child(trace, action):
+    """ What expand() should report for trace + action, simulated on a level of its own. """
+    search = Search(SPEC, KWARGS)
+    search._goto(trace)
+    outcome, frames = search._run(action)
+    return trace + (action,), outcome, frames, search.key(), search.level.player.center_x
+
+
+def test_siblings_of_a_win_are_expanded_on_a_fresh_level():
+    search = Search(SPEC, KWARGS)
+    trace = ()
+    outcomes = []
+    # Running right wins at every step, standing still drowns after a few
+    while not outcomes or outcomes[-1] != DEAD:
+        children = search.expand([trace])
+        assert children == [child(trace, action) for action in range(len(ACTIONS))]
+        assert children[0][1] == WON
+        outcomes.append(children[2][1])
+        trace += (2,)
+        assert len(trace) < 20, "standing still never drowned"
+
+
+def test_solve_finds_the_one_step_win():
+    result = solve(SPEC, KWARGS, workers=1)
+    assert result.winnable
+    assert result.trace == (0,)
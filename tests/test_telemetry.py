@@ -0,0 +1,86 @@
+import csv
+import json
+import numpy as np
+import pytest
+from mod_or_die.tools.telemetry import FrameTelemetry
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def record(frames, size=4, start=1):
+    """ Frame n takes n ms of physics and 2n ms of draw, with 5 ms between them in no phase. """
+    clock = Clock()
+    telemetry = FrameTelemetry(size, phases=("physics", "draw"), clock=clock)
+    for n in range(start, start + frames):
+        telemetry.begin({"block": n, "player": 1} if n % 2 else {"block": n})
+        clock.now += n / 1000
+        telemetry.lap("physics")
+        clock.now += 5 / 1000
+        telemetry.mark()
+        clock.now += 2 * n / 1000
+        telemetry.lap("draw")
+    # Commits the last frame
+    telemetry.begin()
+    return telemetry
+
+
+def test_ring_buffer_keeps_the_newest_frames_oldest_first():
+    telemetry = record(3)
+    assert telemetry.frames == 3
+    assert np.allclose(telemetry.recent()[:, 0], [.001, .002, .003])
+
+    telemetry = record(7)
+    assert telemetry.frames == 7
+    assert np.allclose(telemetry.recent(), [[n / 1000, 2 * n / 1000] for n in range(4, 8)])
+
+
+def test_uncommitted_frame_is_not_counted():
+    telemetry = FrameTelemetry(4, phases=("physics",), clock=Clock())
+    telemetry.begin()
+    telemetry.lap("physics")
+    assert telemetry.frames == 0 and telemetry.summary() == {}
+
+
+def test_summary_percentiles():
+    telemetry = record(100, size=100)
+    summary = telemetry.summary()
+    assert summary["physics"]["p50"] == pytest.approx(.0505)
+    assert summary["physics"]["p99"] == pytest.approx(np.percentile(np.arange(1, 101), 99) / 1000)
+    assert summary["draw"]["p95"] == pytest.approx(2 * summary["physics"]["p95"])
+    assert summary["total"]["p50"] == pytest.approx(3 * .0505)
+    assert list(summary["total"]) == ["p50", "p95", "p99"]
+
+
+def test_jsonl_export(tmp_path):
+    path = str(tmp_path / "frames.jsonl")
+    assert record(6).export(path) == 4
+    with open(path) as fh:
+        rows = [json.loads(line) for line in fh]
+    assert [row["frame"] for row in rows] == [2, 3, 4, 5]
+    assert rows[0] == {"frame": 2, "physics": pytest.approx(.003), "draw": pytest.approx(.006),
+                       "total": pytest.approx(.009), "counts": {"block": 3, "player": 1}}
+
+
+def test_csv_export(tmp_path):
+    path = str(tmp_path / "frames.CSV")
+    assert record(6).export(path) == 4
+    with open(path, newline="") as fh:
+        rows = list(csv.DictReader(fh))
+    assert list(rows[0]) == ["frame", "physics", "draw", "total", "count.block", "count.player"]
+    assert [int(row["frame"]) for row in rows] == [2, 3, 4, 5]
+    assert [int(row["count.block"]) for row in rows] == [3, 4, 5, 6]
+    # Lists missing from a frame count as 0
+    assert [int(row["count.player"]) for row in rows] == [1, 0, 1, 0]
+    assert float(rows[-1]["total"]) == pytest.approx(.018)
+
+
+def test_overlay_lines():
+    lines = record(4).overlay_lines({"block": 10})
+    assert lines[0].startswith("physics") and lines[0].endswith("ms")
+    assert lines[-1] == "counts     block=10"